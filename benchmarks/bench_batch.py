@@ -0,0 +1,81 @@
+"""Measure how ``edk2_expression.batch.preprocess_files`` scales with the
+number of worker processes, on a generated workspace of DSC files.
+
+Usage: python -m benchmarks.bench_batch [--files N] [--blocks N] [--workers 1 2 4]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from edk2_expression.batch import preprocess_files
+
+ATOMS = [
+    '$(TARGET) == "DEBUG"',
+    "$(SECURE_BOOT_ENABLE) == TRUE",
+    "$(TPM_ENABLE)",
+    "$(SMM_REQUIRE) && !$(NETWORK_ENABLE)",
+    "$(FD_SIZE_IN_KB) >= 4096",
+]
+
+CONTEXT = {
+    "TARGET": "DEBUG",
+    "SECURE_BOOT_ENABLE": True,
+    "TPM_ENABLE": False,
+    "SMM_REQUIRE": True,
+    "NETWORK_ENABLE": False,
+    "FD_SIZE_IN_KB": 4096,
+}
+
+
+def write_workspace(directory: Path, files: int, blocks: int) -> list[Path]:
+    rand = random.Random(0)
+    paths = []
+    for index in range(files):
+        lines = []
+        for block in range(blocks):
+            lines.append(f"!if {rand.choice(ATOMS)}")
+            lines.append(f"  Pkg/Module{block}/Module{block}.inf")
+            lines.append("!else")
+            lines.append(f"  Pkg/Module{block}/Null.inf")
+            lines.append("!endif")
+        path = directory / f"Platform{index}.dsc"
+        path.write_text("\n".join(lines))
+        paths.append(path)
+    return paths
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=800)
+    parser.add_argument("--blocks", type=int, default=200)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[0, *(n for n in (1, 2, 4, 8, 16) if n < cpus), cpus],
+        help="worker counts to compare; 0 runs in this process",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_workspace(Path(directory), args.files, args.blocks)
+        print(f"files: {args.files}, lines per file: {args.blocks * 5}, CPUs: {cpus}")
+        print(f"{'workers':>8} {'time':>10} {'speedup':>8}")
+
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            for result in preprocess_files(paths, CONTEXT, workers=workers):
+                assert result.ok, result.error
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>8.2f} s {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare evaluating DSC-like conditions for a batch of configurations one
+configuration at a time with ``edk2_expression.bitparallel.BitEvaluator``.
+
+Usage: python -m benchmarks.bench_bitparallel [--conditions N] [--configs 64 1024]
+"""
+
+import argparse
+import random
+import time
+
+import edk2_expression
+from edk2_expression.bitparallel import BitEvaluator
+from edk2_expression.codegen import compile_expression
+
+ATOMS = [
+    '$(TARGET) == "DEBUG"',
+    '$(TARGET) != "NOOPT"',
+    '$(ARCH) == "X64"',
+    "$(SECURE_BOOT_ENABLE) == TRUE",
+    "$(TPM_ENABLE)",
+    "!$(NETWORK_ENABLE)",
+    "$(SMM_REQUIRE)",
+    "$(FD_SIZE_IN_KB) == 4096",
+]
+
+VALUES = {
+    "TARGET": ["DEBUG", "RELEASE", "NOOPT"],
+    "ARCH": ["X64", "IA32"],
+    "SECURE_BOOT_ENABLE": [True, False],
+    "TPM_ENABLE": [True, False],
+    "NETWORK_ENABLE": [True, False],
+    "SMM_REQUIRE": [True, False],
+    "FD_SIZE_IN_KB": [1024, 2048, 4096],
+}
+
+
+def generate_conditions(rand: random.Random, count: int) -> list[str]:
+    return [
+        f" {rand.choice(['&&', '||'])} ".join(rand.sample(ATOMS, rand.randint(1, 4)))
+        for _ in range(count)
+    ]
+
+
+def generate_configs(rand: random.Random, count: int) -> list[dict[str, object]]:
+    return [
+        {name: rand.choice(values) for name, values in VALUES.items()}
+        for _ in range(count)
+    ]
+
+
+def best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conditions", type=int, default=500)
+    parser.add_argument("--configs", type=int, nargs="+", default=[64, 1024])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rand = random.Random(0)
+    texts = generate_conditions(rand, args.conditions)
+    exprs = [edk2_expression.parse(text) for text in texts]
+    funcs = [compile_expression(expr) for expr in exprs]
+
+    print(f"conditions: {len(exprs)}")
+    print(f"{'configs':>8} {'evaluate':>10} {'compiled':>10} {'bitmask':>10}")
+    for count in args.configs:
+        configs = generate_configs(rand, count)
+
+        def per_config():
+            return [[bool(e.evaluate(c)) for c in configs] for e in exprs]
+
+        def compiled():
+            return [[bool(f(c)) for c in configs] for f in funcs]
+
+        def bitmask():
+            # the index of the macros is built on each run
+            evaluator = BitEvaluator(configs)
+            return [evaluator.evaluate(expr) for expr in exprs]
+
+        masks = [sum(r << i for i, r in enumerate(rs)) for rs in per_config()]
+        assert masks == bitmask()
+        times = [best_of(args.repeat, func) for func in (per_config, compiled, bitmask)]
+        print(f"{count:>8}" + "".join(f" {t * 1e3:>7.1f} ms" for t in times))
+
+
+if __name__ == "__main__":
+    main()
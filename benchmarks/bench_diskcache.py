@@ -0,0 +1,83 @@
+"""Compare parsing a synthetic workspace from scratch (cold build) with loading
+it from a warm ``edk2_expression.diskcache.DiskCache``, per expression and as
+one entry for the whole file.
+
+Usage: python -m benchmarks.bench_diskcache [--expressions N]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+
+import edk2_expression
+from edk2_expression.diskcache import DiskCache
+
+ATOMS = [
+    '$(TARGET) == "DEBUG"',
+    '$(ARCH) == "X64"',
+    "$(SECURE_BOOT_ENABLE) == TRUE",
+    "$(TPM_ENABLE)",
+    "$(NETWORK_ENABLE) == FALSE",
+    "$(SMM_REQUIRE) ? 0x100 : 0x10",
+    "$(FD_SIZE_IN_KB) >= 4096",
+    "($(BLD_OPT) & 0x03) != 0",
+]
+
+
+def generate_workspace(count: int) -> list[str]:
+    rand = random.Random(0)
+    return [
+        f" {rand.choice(['&&', '||'])} ".join(rand.sample(ATOMS, rand.randint(1, 4)))
+        for _ in range(count)
+    ]
+
+
+def best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--expressions", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = generate_workspace(args.expressions)
+    whole = "\n".join(texts)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = DiskCache(directory)
+
+        def cold():
+            return [edk2_expression.parse(text, cache=False) for text in texts]
+
+        def warm():
+            return [
+                edk2_expression.parse(text, cache=False, disk_cache=cache)
+                for text in texts
+            ]
+
+        def warm_file():
+            return cache.get(whole)
+
+        warm()
+        cache.put(whole, cold())
+
+        print(f"expressions: {len(texts)}")
+        for name, func in (
+            ("cold parse", cold),
+            ("warm, per expression", warm),
+            ("warm, whole file", warm_file),
+        ):
+            elapsed = best_of(args.repeat, func)
+            print(f"{name:<22} {elapsed * 1e3:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Measure the throughput and the peak memory of ``edk2_expression.dsc`` on a
+generated DSC file with nested conditional blocks.
+
+Usage: python -m benchmarks.bench_dsc [--blocks N]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+
+from edk2_expression import dsc
+
+ATOMS = [
+    '$(TARGET) == "DEBUG"',
+    "$(SECURE_BOOT_ENABLE) == TRUE",
+    "$(TPM_ENABLE)",
+    "$(SMM_REQUIRE) && !$(NETWORK_ENABLE)",
+    "$(FD_SIZE_IN_KB) >= 4096",
+]
+
+CONTEXT = {
+    "TARGET": "DEBUG",
+    "SECURE_BOOT_ENABLE": True,
+    "TPM_ENABLE": False,
+    "SMM_REQUIRE": True,
+    "NETWORK_ENABLE": False,
+    "FD_SIZE_IN_KB": 4096,
+}
+
+
+def write_dsc(file, blocks: int) -> None:
+    rand = random.Random(0)
+    for index in range(blocks):
+        file.write(f"!if {rand.choice(ATOMS)}\n")
+        file.write(f"  DEFINE BLOCK_{index % 100} = {index}\n")
+        file.write(f"  !if {rand.choice(ATOMS)}\n")
+        file.write(f"    Pkg/Module{index}/Module{index}.inf\n")
+        file.write("  !else\n")
+        file.write(f"    Pkg/Module{index}/Null.inf  # fallback\n")
+        file.write("  !endif\n")
+        file.write("!endif\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryFile("w+") as file:
+        write_dsc(file, args.blocks)
+        size = file.tell()
+
+        file.seek(0)
+        start = time.perf_counter()
+        active = sum(1 for _ in dsc.active_lines(file, CONTEXT))
+        elapsed = time.perf_counter() - start
+
+        # tracing slows down the run, so it is measured separately
+        file.seek(0)
+        tracemalloc.start()
+        for _ in dsc.active_lines(file, CONTEXT):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"input: {args.blocks * 8} lines, {size / 1024 / 1024:.1f} MiB")
+    print(f"active lines: {active}")
+    print(f"time: {elapsed:.2f} s ({args.blocks * 8 / elapsed / 1000:.0f}k lines/s)")
+    print(f"peak traced memory: {peak / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compare ``Expression.evaluate()`` with the functions from
+``Expression.compile()`` and ``edk2_expression.codegen.compile_expression()``.
+
+Each expression is evaluated against the same set of contexts, which is the
+typical pattern when one condition is checked for many build configurations.
+
+Usage: python -m benchmarks.bench_evaluate [--contexts N]
+"""
+
+import argparse
+import time
+
+import edk2_expression
+from edk2_expression.ast.core import NestMethod
+from edk2_expression.codegen import compile_expression
+
+EXPRESSIONS = [
+    "$(FOO)",
+    "$(FOO) + 1 * $(BAR)",
+    '$(TARGET) == "DEBUG" && $(ARCH) != "X64" || $(FOO) > 3',
+    "$(FOO) ? ($(BAR) << 2) & 0xff : ~$(BAR)",
+    " || ".join(f"$(FOO) == {i}" for i in range(20)),
+]
+
+
+def generate_contexts(count: int) -> list[dict[str, object]]:
+    return [
+        {
+            "FOO": i % 7,
+            "BAR": i,
+            "TARGET": ("DEBUG", "RELEASE")[i % 2],
+            "ARCH": ("IA32", "X64")[i % 2],
+        }
+        for i in range(count)
+    ]
+
+
+def best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contexts", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    contexts = generate_contexts(args.contexts)
+    nest = NestMethod.Error
+
+    print(
+        f"{'expression':<40} {'evaluate':>10} {'compile':>10} {'codegen':>10}"
+        "  (us/eval)"
+    )
+    for text in EXPRESSIONS:
+        expr = edk2_expression.parse(text)
+        columns = []
+        for func in (
+            lambda ctx: expr.evaluate(ctx, nest),
+            expr.compile(nest),
+            compile_expression(expr, nest),
+        ):
+            elapsed = best_of(args.repeat, lambda: [func(ctx) for ctx in contexts])
+            columns.append(f"{elapsed / len(contexts) * 1e6:>10.3f}")
+
+        label = text if len(text) <= 40 else text[:37] + "..."
+        print(f"{label:<40} " + " ".join(columns))
+
+
+if __name__ == "__main__":
+    main()
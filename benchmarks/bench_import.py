@@ -0,0 +1,52 @@
+"""Measure the time of ``import edk2_expression`` in a fresh interpreter, and
+list the modules that take the longest to import, from ``-X importtime``.
+
+Usage: python -m benchmarks.bench_import [--repeat N] [--top N]
+"""
+
+import argparse
+import subprocess
+import sys
+
+CODE = "import edk2_expression; edk2_expression.parse('1')"
+
+
+def import_times() -> dict[str, tuple[int, int]]:
+    """Return the self and cumulative import times, in microseconds, by
+    module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CODE],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        times[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    # keep the fastest run of each module, to filter out the noise
+    best: dict[str, tuple[int, int]] = {}
+    for _ in range(args.repeat):
+        for module, times in import_times().items():
+            best[module] = min(best.get(module, times), times)
+
+    print(f"import edk2_expression: {best['edk2_expression'][1] / 1e3:.1f} ms")
+    print(f"{'self':>9} {'cumulative':>11}  module")
+    slowest = sorted(best.items(), key=lambda item: item[1][0], reverse=True)
+    for module, (self_time, cumulative) in slowest[: args.top]:
+        print(f"{self_time / 1e3:>6.1f} ms {cumulative / 1e3:>8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare re-evaluating all expressions against incremental updates when one
+macro changes at a time.
+
+A synthetic platform of conditions over many feature flags is generated, with
+some flags defined as expressions of other flags. Each step flips one flag.
+
+Usage: python -m benchmarks.bench_incremental [--expressions N] [--macros N]
+"""
+
+import argparse
+import random
+import time
+
+import edk2_expression
+from edk2_expression.ast import NestMethod
+from edk2_expression.incremental import IncrementalEvaluator
+
+
+def generate_platform(
+    expressions: int, macros: int
+) -> tuple[dict[str, object], list[edk2_expression.ast.Expression]]:
+    rand = random.Random(0)
+    names = [f"FEATURE_{i}" for i in range(macros)]
+    context: dict[str, object] = {name: rand.random() < 0.5 for name in names}
+    # every tenth flag is derived from two others
+    for i in range(0, macros, 10):
+        a, b = rand.sample(names[i + 1 :] or names, 2)
+        context[names[i]] = edk2_expression.parse(f"$({a}) && !$({b})", cache=False)
+
+    exprs = []
+    for _ in range(expressions):
+        atoms = [f"$({name})" for name in rand.sample(names, rand.randint(1, 3))]
+        exprs.append(edk2_expression.parse(" || ".join(atoms), cache=False))
+    return context, exprs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--expressions", type=int, default=5000)
+    parser.add_argument("--macros", type=int, default=500)
+    parser.add_argument("--steps", type=int, default=200)
+    args = parser.parse_args()
+
+    context, exprs = generate_platform(args.expressions, args.macros)
+    rand = random.Random(1)
+    flips = [f"FEATURE_{rand.randrange(1, args.macros)}" for _ in range(args.steps)]
+
+    full = dict(context)
+    start = time.perf_counter()
+    for name in flips:
+        full[name] = not full[name]
+        for expr in exprs:
+            try:
+                expr.evaluate(full, NestMethod.Evaluate)
+            except Exception:
+                pass
+    elapsed_full = time.perf_counter() - start
+
+    engine = IncrementalEvaluator(context)
+    for i, expr in enumerate(exprs):
+        engine.register(i, expr)
+    changed = 0
+    start = time.perf_counter()
+    for name in flips:
+        changed += len(engine.update(name, not engine.context[name]))
+    elapsed_incremental = time.perf_counter() - start
+
+    print(f"expressions: {len(exprs)}, macros: {args.macros}, steps: {args.steps}")
+    print(f"full:        {elapsed_full / args.steps * 1e3:>10.3f} ms/step")
+    print(
+        f"incremental: {elapsed_incremental / args.steps * 1e3:>10.3f} ms/step"
+        f"  ({changed / args.steps:.1f} results changed/step)"
+    )
+
+
+if __name__ == "__main__":
+    main()
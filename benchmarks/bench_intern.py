@@ -0,0 +1,63 @@
+"""Measure the memory held by parsed expressions with and without interning.
+
+A synthetic workspace is generated by combining common DSC conditions, so most
+sub-trees like ``$(TARGET) == "DEBUG"`` appear many times.
+
+Usage: python -m benchmarks.bench_intern [--expressions N]
+"""
+
+import argparse
+import random
+import tracemalloc
+
+import edk2_expression
+from edk2_expression.intern import InternTable
+
+ATOMS = [
+    '$(TARGET) == "DEBUG"',
+    '$(TARGET) == "RELEASE"',
+    '$(ARCH) == "X64"',
+    '$(ARCH) == "IA32"',
+    "$(SECURE_BOOT_ENABLE) == TRUE",
+    "$(TPM_ENABLE)",
+    "$(NETWORK_ENABLE) == FALSE",
+    "$(SMM_REQUIRE)",
+]
+
+
+def generate_workspace(count: int) -> list[str]:
+    rand = random.Random(0)
+    return [
+        f" {rand.choice(['&&', '||'])} ".join(rand.sample(ATOMS, rand.randint(1, 4)))
+        for _ in range(count)
+    ]
+
+
+def measure(texts: list[str], table: InternTable | None) -> tuple[int, list]:
+    tracemalloc.start()
+    exprs = [edk2_expression.parse(text, cache=False, intern=table) for text in texts]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, exprs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--expressions", type=int, default=20000)
+    args = parser.parse_args()
+
+    texts = generate_workspace(args.expressions)
+    plain, exprs = measure(texts, None)
+    nodes = sum(1 for expr in exprs for _ in expr.walk())
+    del exprs
+
+    table = InternTable()
+    interned, _ = measure(texts, table)
+
+    print(f"expressions: {len(texts)}, nodes: {nodes}")
+    print(f"plain:    {plain / 1024:>10.1f} KiB")
+    print(f"interned: {interned / 1024:>10.1f} KiB  {table.info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare the recursive ``Expression.evaluate()`` with the explicit-stack
+evaluator in ``edk2_expression.iterative`` on expressions of growing depth.
+
+``iterative`` includes flattening the tree into a program on each call, as
+``evaluate_iterative()`` does; ``program`` only runs the program built once by
+``compile_iterative()``.
+
+Two shapes are measured: a chain of ``+``, where every operand is evaluated,
+and a chain of ``||`` comparisons, where evaluation stops at the first match.
+The recursive path is reported as failed when it exceeds the recursion limit.
+
+Usage: python -m benchmarks.bench_iterative [--depths N [N ...]]
+"""
+
+import argparse
+import time
+
+from edk2_expression.ast.operand import Integer, MacroVal
+from edk2_expression.ast.operator import Addition, Equal, LogicalOr
+from edk2_expression.iterative import compile_iterative, evaluate_iterative
+
+
+def build_sum(depth: int) -> Addition:
+    expr = Integer(0)
+    for _ in range(depth):
+        expr = Addition(expr, MacroVal("FOO"))
+    return expr
+
+
+def build_chain(depth: int) -> LogicalOr:
+    expr = Equal(MacroVal("FOO"), Integer(0))
+    for i in range(1, depth):
+        expr = LogicalOr(expr, Equal(MacroVal("FOO"), Integer(i)))
+    return expr
+
+
+def best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(repeat: int, func) -> str:
+    try:
+        elapsed = best_of(repeat, func)
+    except RecursionError:
+        return f"{'RecursionError':>14}"
+    return f"{elapsed * 1e3:>11.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--depths", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'shape':<8} {'depth':>8} {'recursive':>14} {'iterative':>14} "
+        f"{'program':>14}"
+    )
+    for shape, build, context in (
+        ("sum", build_sum, {"FOO": 1}),
+        ("or", build_chain, {"FOO": -1}),
+    ):
+        for depth in args.depths:
+            expr = build(depth)
+            recursive = measure(args.repeat, lambda: expr.evaluate(context))
+            iterative = measure(args.repeat, lambda: evaluate_iterative(expr, context))
+            func = compile_iterative(expr)
+            program = measure(args.repeat, lambda: func(context))
+            print(f"{shape:<8} {depth:>8} {recursive} {iterative} {program}")
+
+
+if __name__ == "__main__":
+    main()
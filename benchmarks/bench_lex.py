@@ -0,0 +1,55 @@
+"""Compare the tokenization throughput of the Pygments lexer and the fast
+tokenizer used by ``edk2_expression.parse()``.
+
+Usage: python -m benchmarks.bench_lex [--repeat N]
+"""
+
+import argparse
+import time
+
+from edk2_expression.lex import Edk2ExpressionLexer
+from edk2_expression.tokenizer import Edk2ExpressionTokenizer
+
+CORPUS = [
+    "$(TARGET) == DEBUG",
+    '$(ARCH) == "X64"',
+    "$(TOOL_CHAIN_TAG) != GCC5 && $(TARGET) != NOOPT",
+    "$(SECURE_BOOT_ENABLE) == TRUE || $(TPM2_ENABLE) == TRUE",
+    "gEfiMdePkgTokenSpaceGuid.PcdDebugPropertyMask & 0x02",
+    "($(FD_SIZE_IN_KB) == 1024) ? 0x100000 : 0x200000",
+    "{0x123e4567, 0xe89b, 0x12d3, {0xa4, 0x56, 0x42, 0x66, 0x55, 0x44, 0x00, 0x00}}",
+    "not $(SMM_REQUIRE) and $(NETWORK_ENABLE) # comment",
+]
+
+
+def measure(get_tokens, texts, repeat):
+    num_tokens = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            for _ in get_tokens(text):
+                num_tokens += 1
+    return num_tokens / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    texts = CORPUS + [" || ".join(f"$(VAR{i}) == {i}" for i in range(200))]
+
+    pygments_rate = measure(
+        Edk2ExpressionLexer().get_tokens_unprocessed, texts, args.repeat
+    )
+    fast_rate = measure(
+        Edk2ExpressionTokenizer().get_tokens_unprocessed, texts, args.repeat
+    )
+
+    print(f"pygments lexer: {pygments_rate:12,.0f} tokens/sec")
+    print(f"fast tokenizer: {fast_rate:12,.0f} tokens/sec")
+    print(f"speedup:        {fast_rate / pygments_rate:12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
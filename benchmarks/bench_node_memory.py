@@ -0,0 +1,68 @@
+"""Measure the memory per AST node.
+
+The AST classes are slotted dataclasses. For comparison, each class is also
+measured through a plain subclass, which adds back the per-instance
+``__dict__`` (and ``__weakref__``) that the nodes carried before.
+
+Usage: python -m benchmarks.bench_node_memory [--nodes N]
+"""
+
+import argparse
+import sys
+import tracemalloc
+
+from edk2_expression.ast.operand import Boolean, Integer, MacroVal
+from edk2_expression.ast.operator import Equal, LogicalAnd, TernaryOp
+
+
+def build(classes: dict[type, type], count: int) -> list:
+    foo = classes[MacroVal]("FOO")
+    one = classes[Integer](1)
+    true = classes[Boolean](True)
+    equal = classes[Equal](foo, one)
+    decision = classes[TernaryOp.Decision](one, true)
+    return [
+        (
+            classes[MacroVal](f"MACRO{i % 100}"),
+            classes[Integer](i),
+            classes[Equal](foo, one),
+            classes[LogicalAnd](equal, true),
+            classes[TernaryOp](equal, decision),
+        )
+        for i in range(count)
+    ]
+
+
+def measure(classes: dict[type, type], count: int) -> float:
+    tracemalloc.start()
+    nodes = build(classes, count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # exclude the containers, the shared nodes are negligible
+    size -= sum(sys.getsizeof(item) for item in nodes) + sys.getsizeof(nodes)
+    return size / (count * len(nodes[0]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, default=100000)
+    args = parser.parse_args()
+
+    types = [
+        MacroVal,
+        Integer,
+        Boolean,
+        Equal,
+        LogicalAnd,
+        TernaryOp.Decision,
+        TernaryOp,
+    ]
+    slotted = {cls: cls for cls in types}
+    with_dict = {cls: type(cls.__name__, (cls,), {}) for cls in types}
+
+    print(f"with __dict__: {measure(with_dict, args.nodes):>7.1f} bytes/node")
+    print(f"slotted:       {measure(slotted, args.nodes):>7.1f} bytes/node")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Measure how ``ast.parse()`` scales with the number of tokens.
+
+The time per token should stay flat as the expression grows; consuming the
+tokens with ``list.pop(0)`` made it grow linearly (quadratic in total). Both
+parsing algorithms are reported.
+
+Usage: python -m benchmarks.bench_parse_scaling [--sizes N [N ...]]
+"""
+
+import argparse
+import time
+
+import edk2_expression.ast
+from edk2_expression.ast.core import ParseMethod, TokenStream
+from edk2_expression.tokenizer import tokenize
+
+
+def generate_or_chain(size: int) -> str:
+    return " || ".join(f"$(VAR{i}) == {i}" for i in range(size))
+
+
+def generate_array(size: int) -> str:
+    return "{" + ", ".join(f"0x{i % 256:02x}" for i in range(size)) + "}"
+
+
+def measure(text: str, method: ParseMethod, repeat: int) -> tuple[int, float]:
+    tokens = tokenize(text)
+    best = float("inf")
+    for _ in range(repeat):
+        stream = TokenStream(tokens)
+        start = time.perf_counter()
+        edk2_expression.ast.parse(stream, method)
+        best = min(best, time.perf_counter() - start)
+    return len(tokens), best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'input':<10} {'terms':>7} {'tokens':>8} "
+        + " ".join(f"{method.value:>20}" for method in ParseMethod)
+        + "  (us/token)"
+    )
+    for name, generate in (("or-chain", generate_or_chain), ("array", generate_array)):
+        for size in args.sizes:
+            text = generate(size)
+            columns = []
+            for method in ParseMethod:
+                num_tokens, elapsed = measure(text, method, args.repeat)
+                columns.append(f"{elapsed / num_tokens * 1e6:>20.3f}")
+            print(f"{name:<10} {size:>7} {num_tokens:>8} " + " ".join(columns))
+
+
+if __name__ == "__main__":
+    main()
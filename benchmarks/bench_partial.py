@@ -0,0 +1,88 @@
+"""Compare evaluating the conditions of a platform for every module with
+specializing them once for the global macros with
+``Expression.partial_evaluate()`` and evaluating the residuals per module.
+
+Usage: python -m benchmarks.bench_partial [--conditions N] [--modules N]
+"""
+
+import argparse
+import random
+import time
+
+import edk2_expression
+
+GLOBAL_ATOMS = [
+    '$(TARGET) == "DEBUG"',
+    '$(ARCH) == "X64"',
+    "$(SECURE_BOOT_ENABLE) == TRUE",
+    "$(TPM_ENABLE)",
+    "$(FD_SIZE_IN_KB) >= 4096",
+]
+
+MODULE_ATOMS = [
+    '$(MODULE_TYPE) == "DXE_DRIVER"',
+    "$(MODULE_INDEX) % 4 == 0",
+]
+
+GLOBALS = {
+    "TARGET": "DEBUG",
+    "ARCH": "X64",
+    "SECURE_BOOT_ENABLE": True,
+    "TPM_ENABLE": False,
+    "FD_SIZE_IN_KB": 4096,
+}
+
+
+def generate_conditions(rand: random.Random, count: int) -> list[str]:
+    conditions = []
+    for _ in range(count):
+        atoms = rand.sample(GLOBAL_ATOMS, rand.randint(1, 3))
+        atoms.append(rand.choice(MODULE_ATOMS))
+        rand.shuffle(atoms)
+        conditions.append(f" {rand.choice(['&&', '||'])} ".join(atoms))
+    return conditions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conditions", type=int, default=500)
+    parser.add_argument("--modules", type=int, default=200)
+    args = parser.parse_args()
+
+    rand = random.Random(0)
+    exprs = [
+        edk2_expression.parse(text)
+        for text in generate_conditions(rand, args.conditions)
+    ]
+    modules = [
+        {
+            **GLOBALS,
+            "MODULE_TYPE": rand.choice(["DXE_DRIVER", "PEIM", "UEFI_APPLICATION"]),
+            "MODULE_INDEX": index,
+        }
+        for index in range(args.modules)
+    ]
+
+    start = time.perf_counter()
+    full = [[expr.evaluate(module) for expr in exprs] for module in modules]
+    elapsed_full = time.perf_counter() - start
+
+    start = time.perf_counter()
+    residuals = [expr.partial_evaluate(GLOBALS) for expr in exprs]
+    elapsed_specialize = time.perf_counter() - start
+    start = time.perf_counter()
+    partial = [[expr.evaluate(module) for expr in residuals] for module in modules]
+    elapsed_partial = time.perf_counter() - start
+    assert partial == full
+
+    nodes = sum(1 for expr in exprs for _ in expr.walk())
+    residual_nodes = sum(1 for expr in residuals for _ in expr.walk())
+    print(f"conditions: {len(exprs)}, modules: {len(modules)}")
+    print(f"nodes:      {nodes} -> {residual_nodes} after specialization")
+    print(f"full:       {elapsed_full * 1e3:>8.1f} ms")
+    print(f"specialize: {elapsed_specialize * 1e3:>8.1f} ms")
+    print(f"residual:   {elapsed_partial * 1e3:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
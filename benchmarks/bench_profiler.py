@@ -0,0 +1,65 @@
+"""Measure the cost of ``edk2_expression.profiler.Profiler`` on
+``Expression.evaluate()``: before it is ever enabled, while it is enabled, and
+after it is disabled again, which must match the first.
+
+Usage: python -m benchmarks.bench_profiler [--contexts N]
+"""
+
+import argparse
+import time
+
+import edk2_expression
+from edk2_expression.profiler import Profiler
+
+EXPRESSIONS = [
+    '$(TARGET) == "DEBUG" && $(ARCH) != "X64" || $(FOO) > 3',
+    "$(FOO) ? ($(BAR) << 2) & 0xff : ~$(BAR)",
+    " || ".join(f"$(FOO) == {i}" for i in range(20)),
+]
+
+
+def best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contexts", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    exprs = [edk2_expression.parse(text) for text in EXPRESSIONS]
+    contexts = [
+        {"FOO": i % 7, "BAR": i, "TARGET": ("DEBUG", "RELEASE")[i % 2], "ARCH": "X64"}
+        for i in range(args.contexts)
+    ]
+
+    def run():
+        for expr in exprs:
+            for context in contexts:
+                expr.evaluate(context)
+
+    evaluations = len(exprs) * len(contexts)
+    profiler = Profiler()
+    before = best_of(args.repeat, run)
+    with profiler:
+        enabled = best_of(args.repeat, run)
+    after = best_of(args.repeat, run)
+
+    for label, elapsed in (
+        ("never enabled", before),
+        ("enabled", enabled),
+        ("disabled", after),
+    ):
+        print(f"{label:<14} {elapsed / evaluations * 1e6:>8.3f} us/eval")
+    print()
+    print(profiler.report(5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compare the size and the store/load throughput of the binary encoding in
+``edk2_expression.serialize`` with pickle, on a synthetic workspace.
+
+Usage: python -m benchmarks.bench_serialize [--expressions N]
+"""
+
+import argparse
+import pickle
+import random
+import time
+
+import edk2_expression
+from edk2_expression import serialize
+
+ATOMS = [
+    '$(TARGET) == "DEBUG"',
+    '$(ARCH) == "X64"',
+    "$(SECURE_BOOT_ENABLE) == TRUE",
+    "$(TPM_ENABLE)",
+    "$(NETWORK_ENABLE) == FALSE",
+    "$(SMM_REQUIRE) ? 0x100 : 0x10",
+    "$(FD_SIZE_IN_KB) >= 4096",
+    "($(BLD_OPT) & 0x03) != 0",
+]
+
+
+def generate_workspace(count: int) -> list[str]:
+    rand = random.Random(0)
+    return [
+        f" {rand.choice(['&&', '||'])} ".join(rand.sample(ATOMS, rand.randint(1, 4)))
+        for _ in range(count)
+    ]
+
+
+def best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--expressions", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = generate_workspace(args.expressions)
+    exprs = [edk2_expression.parse(text, cache=False) for text in texts]
+
+    print(f"expressions: {len(exprs)}")
+    print(f"{'format':<10} {'size':>12} {'store':>12} {'load':>12}")
+    for name, dumps, loads in (
+        ("pickle", lambda e: pickle.dumps(e, pickle.HIGHEST_PROTOCOL), pickle.loads),
+        ("serialize", serialize.dumps, serialize.loads),
+    ):
+        data = dumps(exprs)
+        store = best_of(args.repeat, lambda: dumps(exprs))
+        load = best_of(args.repeat, lambda: loads(data))
+        print(
+            f"{name:<10} {len(data) / 1024:>8.1f} KiB {store * 1e3:>9.1f} ms "
+            f"{load * 1e3:>9.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
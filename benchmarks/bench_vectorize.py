@@ -0,0 +1,64 @@
+"""Compare per-context evaluation with columnar evaluation on NumPy arrays.
+
+Requires NumPy.
+
+Usage: python -m benchmarks.bench_vectorize [--configurations N]
+"""
+
+import argparse
+import time
+
+import numpy
+
+import edk2_expression
+from edk2_expression.vectorize import evaluate_columns
+
+EXPRESSIONS = [
+    '$(ARCH) == "X64"',
+    '$(ARCH) == "X64" && $(TARGET) != "RELEASE" || $(SIZE) > 0x100',
+    "$(SIZE) > 0x100 ? ($(SIZE) << 2) & 0xffff : $(SIZE) + 1",
+]
+
+
+def generate_columns(count: int) -> dict[str, numpy.ndarray]:
+    rng = numpy.random.default_rng(0)
+    return {
+        "ARCH": rng.choice(["IA32", "X64", "AARCH64"], count),
+        "TARGET": rng.choice(["DEBUG", "RELEASE", "NOOPT"], count),
+        "SIZE": rng.integers(0, 0x200, count),
+    }
+
+
+def best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--configurations", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    columns = generate_columns(args.configurations)
+    contexts = [
+        {name: values[i].item() for name, values in columns.items()}
+        for i in range(args.configurations)
+    ]
+
+    print(f"{'expression':<40} {'evaluate_many':>14} {'columns':>10}  (ms)")
+    for text in EXPRESSIONS:
+        expr = edk2_expression.parse(text)
+        rows = best_of(args.repeat, lambda: list(expr.evaluate_many(contexts)))
+        vectorized = best_of(args.repeat, lambda: evaluate_columns(expr, columns))
+
+        label = text if len(text) <= 40 else text[:37] + "..."
+        print(f"{label:<40} {rows * 1e3:>14.1f} {vectorized * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Run the benchmark suite for lexing, parsing, evaluating and printing
+expressions, and compare the results against a stored baseline.
+
+The suite only uses the standard library. Each benchmark runs over a corpus of
+DSC-style conditions and PCD values plus a few synthetic large expressions, and
+reports the best time of one pass over its corpus.
+
+Usage:
+    python -m benchmarks.run --output baseline.json
+    python -m benchmarks.run --baseline baseline.json [--threshold 0.1]
+
+Without a file name, ``--baseline`` (or ``--compare``) reads the results stored
+in ``benchmarks/baseline.json``. Its ``platform`` and ``python`` fields tell
+where it was recorded; timings from another machine are not comparable, so
+regenerate it there first with ``python -m benchmarks.run --output
+benchmarks/baseline.json``, e.g. on the commit before the change to check.
+
+The exit status is 1 if a benchmark is slower than its baseline by more than
+the threshold.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+
+import edk2_expression
+import edk2_expression.ast
+from edk2_expression.ast import NestMethod
+from edk2_expression.ast.core import TokenStream
+from edk2_expression.lex import Edk2ExpressionLexer
+from edk2_expression.tokenizer import tokenize
+
+STORED_BASELINE = Path(__file__).with_name("baseline.json")
+"""The results ``--baseline`` compares against when no file is given."""
+
+CONDITIONS = [
+    '$(TARGET) == "DEBUG"',
+    '$(ARCH) == "X64" || $(ARCH) == "IA32"',
+    '$(TOOL_CHAIN_TAG) != "GCC5" && $(TARGET) != "NOOPT"',
+    "$(SECURE_BOOT_ENABLE) == TRUE || $(TPM2_ENABLE) == TRUE",
+    "$(SMM_REQUIRE) && !$(NETWORK_ENABLE)",
+    "($(FD_SIZE_IN_KB) == 1024) ? 0x100000 : 0x200000",
+    "$(FD_SIZE_IN_KB) >= 4096 and not $(DEBUG_ON_SERIAL_PORT)",
+    "($(DEBUG_PRINT_LEVEL) & 0x80000000) != 0",
+    '$(TARGET) == "RELEASE" ? $(FD_SIZE_IN_KB) : $(FD_SIZE_IN_KB) * 2',
+]
+"""Conditions that can be evaluated with :data:`CONTEXT`."""
+
+VALUES = [
+    "gEfiMdePkgTokenSpaceGuid.PcdDebugPropertyMask & 0x02",
+    "{0x123e4567, 0xe89b, 0x12d3, {0xa4, 0x56, 0x42, 0x66, 0x55, 0x44, 0x00, 0x00}}",
+    '{GUID("12345678-1234-1234-1234-123456789abc"), UINT16(16), L"Boot"}',
+    "not $(SMM_REQUIRE) and $(NETWORK_ENABLE) # comment",
+]
+"""PCD values and conditions that are only lexed, parsed and printed."""
+
+CONTEXT = {
+    "TARGET": "DEBUG",
+    "ARCH": "X64",
+    "TOOL_CHAIN_TAG": "GCC5",
+    "SECURE_BOOT_ENABLE": True,
+    "TPM2_ENABLE": False,
+    "SMM_REQUIRE": True,
+    "NETWORK_ENABLE": False,
+    "FD_SIZE_IN_KB": 4096,
+    "DEBUG_ON_SERIAL_PORT": False,
+    "DEBUG_PRINT_LEVEL": 0x8000004F,
+}
+
+NESTED_CONTEXT = {
+    **CONTEXT,
+    "SMM_REQUIRE": edk2_expression.parse("$(SECURE_BOOT_ENABLE) || $(TPM2_ENABLE)"),
+    "DEBUG_ON_SERIAL_PORT": edk2_expression.parse('$(TARGET) == "RELEASE"'),
+}
+"""Same as :data:`CONTEXT`, with some macros defined as expressions, for the
+nest methods that accept them. The condition of ``?:`` is always evaluated with
+``NestMethod.Error``, so its macros stay plain values."""
+
+
+def synthetic_conditions(size: int) -> list[str]:
+    return [
+        " || ".join(f"$(ARCH) == {i}" for i in range(size)),
+        " && ".join(f"$(FD_SIZE_IN_KB) > {i}" for i in range(size)),
+        "(" * (size // 10) + "$(ARCH) == 1" + ") || 1" * (size // 10),
+    ]
+
+
+def synthetic_values(size: int) -> list[str]:
+    return ["{" + ", ".join(f"0x{i % 256:02x}" for i in range(size)) + "}"]
+
+
+def benchmarks(size: int) -> dict[str, Callable[[], object]]:
+    """Return the benchmarks by name. Each benchmark is a function that makes
+    one pass over its corpus."""
+    conditions = CONDITIONS + synthetic_conditions(size)
+    texts = conditions + VALUES + synthetic_values(size)
+    token_lists = [tokenize(text) for text in texts]
+    exprs = [edk2_expression.parse(text, cache=False) for text in texts]
+    condition_exprs = exprs[: len(conditions)]
+
+    lexer = Edk2ExpressionLexer()
+
+    def lex():
+        for text in texts:
+            for _ in lexer.get_tokens_unprocessed(text):
+                pass
+
+    def parse():
+        for tokens in token_lists:
+            edk2_expression.ast.parse(TokenStream(tokens))
+
+    def to_str():
+        for expr in exprs:
+            str(expr)
+
+    def evaluate(nest: NestMethod) -> Callable[[], object]:
+        context = CONTEXT if nest == NestMethod.Error else NESTED_CONTEXT
+
+        def run():
+            for expr in condition_exprs:
+                expr.evaluate(context, nest)
+
+        return run
+
+    suite = {"lex": lex, "parse": parse}
+    for nest in NestMethod:
+        suite[f"evaluate[{nest.value}]"] = evaluate(nest)
+    suite["str"] = to_str
+    return suite
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict[str, float | int]:
+    timer = timeit.Timer(func)
+    # enough runs for about 0.2 s per repeat
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat, number)) / number
+    return {"seconds": best, "number": number}
+
+
+def compare(
+    results: dict[str, dict], baseline: dict[str, dict], threshold: float
+) -> list[str]:
+    """Print the ratio of each result to its baseline.
+
+    :return: The names of the benchmarks slower than the baseline by more than
+        ``threshold``.
+    :rtype: list[str]
+    """
+    regressions = []
+    print(f"{'benchmark':<20} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<20} {'-':>12} {result['seconds'] * 1e3:>9.3f} ms")
+            continue
+        before = baseline[name]["seconds"]
+        ratio = result["seconds"] / before
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<20} {before * 1e3:>9.3f} ms {result['seconds'] * 1e3:>9.3f} ms"
+            f" {ratio:>7.2f}x{flag}"
+        )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--size", type=int, default=500, help="size of the synthetic expressions"
+    )
+    parser.add_argument(
+        "-k", dest="select", help="only run the benchmarks whose name contains this"
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument(
+        "--baseline",
+        "--compare",
+        nargs="?",
+        const=str(STORED_BASELINE),
+        help="compare against the results in this file (default: %(const)s)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown reported as a regression, as a fraction (default: 0.1)",
+    )
+    args = parser.parse_args(argv)
+
+    # the synthetic expressions are deeper than the default recursion limit
+    # allows for parsing and printing
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), args.size * 10))
+
+    results = {}
+    for name, func in benchmarks(args.size).items():
+        if args.select and args.select not in name:
+            continue
+        results[name] = measure(func, args.repeat)
+        if not args.baseline:
+            print(f"{name:<20} {results[name]['seconds'] * 1e3:>9.3f} ms")
+
+    if args.output:
+        report = {
+            "version": edk2_expression.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "size": args.size,
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("size") != args.size:
+            print(f"warning: the baseline was run with --size {baseline.get('size')}")
+        if compare(results, baseline["results"], args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,109 @@ from __future__ import annotations
 
 __version__ = "0.2.1"
 
+import importlib
+import typing
+
 import edk2_expression.ast
-import edk2_expression.lex
-from edk2_expression.ast import Expression, NestMethod
+import edk2_expression.tokenizer
+from edk2_expression.ast import EvaluationSession, Expression, NestMethod, ParseMethod
+from edk2_expression.cache import ParseCache
+
+if typing.TYPE_CHECKING:
+    from edk2_expression.diskcache import DiskCache
+    from edk2_expression.intern import InternTable
+
+_LAZY_ATTRIBUTES = {
+    # name: (module, attribute or None for the module itself)
+    "lex": ("edk2_expression.lex", None),
+    "DiskCache": ("edk2_expression.diskcache", "DiskCache"),
+    "InternTable": ("edk2_expression.intern", "InternTable"),
+}
+"""Attributes imported on first access, so ``import edk2_expression`` does not
+import Pygments' lexer machinery or the modules only needed by options of
+:func:`parse`."""
+
+
+def __getattr__(name: str) -> object:
+    try:
+        module, attribute = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = importlib.import_module(module)
+    if attribute is not None:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_LAZY_ATTRIBUTES})
+
+
+parse_cache = ParseCache()
+"""The cache used by :func:`parse`. Use ``parse_cache.resize()`` to change its
+limits, ``parse_cache.clear()`` to drop all entries and ``parse_cache.info()``
+for hit/miss statistics."""
+
+
+def parse(
+    text: str,
+    *,
+    cache: bool = True,
+    method: ParseMethod | str = edk2_expression.ast.core._DEFAULT_PARSE_METHOD,
+    optimize: bool = False,
+    intern: InternTable | None = None,
+    disk_cache: DiskCache | None = None,
+) -> edk2_expression.ast.Expression:
+    """Parse the expression text into an expression AST.
+
+    :param text: The expression text.
+    :type text: str
+    :param cache: Look up and store the result in :data:`parse_cache`. The
+        cached AST is shared by all callers, which is safe since all the nodes
+        are immutable.
+    :type cache: bool
+    :param method: The parsing algorithm, see :func:`edk2_expression.ast.parse`.
+    :type method: ParseMethod | str
+    :param optimize: Fold constant sub-expressions, see
+        :meth:`Expression.fold`. The optimized and the plain AST are cached
+        separately.
+    :type optimize: bool
+    :param intern: Share identical sub-trees with all the other expressions
+        interned in this table, see :class:`InternTable`.
+    :type intern: InternTable | None
+    :param disk_cache: Look up the expression in this on-disk cache before
+        parsing, and store it after parsing. It is checked after
+        :data:`parse_cache`.
+    :type disk_cache: DiskCache | None
+    :return: The parsed expression AST.
+    :rtype: Expression
+    :raises ParseError: If the text cannot be parsed.
+    """
+    key = (text, "optimize") if optimize else text
+    if cache and (expr := parse_cache.get(key)) is not None:
+        if intern is not None:
+            expr = intern.intern(expr)
+        return expr
+
+    options = "optimize" if optimize else ""
+    if disk_cache is not None and (exprs := disk_cache.get(text, options)):
+        expr = exprs[0]
+    else:
+        tokens = edk2_expression.tokenizer.tokenize(text)
+        expr = edk2_expression.ast.parse(tokens, method)
+        if optimize:
+            expr = expr.fold()
+        if disk_cache is not None:
+            try:
+                disk_cache.put(text, (expr,), options)
+            except OSError:
+                # the result is still valid, it is just not stored
+                pass
 
+    if intern is not None:
+        expr = intern.intern(expr)
 
-def parse(text: str) -> edk2_expression.ast.Expression:
-    lexer = edk2_expression.lex.Edk2ExpressionLexer()
-    tokens = list(lexer.get_tokens_unprocessed(text))
-    return edk2_expression.ast.parse(tokens)
+    if cache:
+        parse_cache.put(key, expr)
+    return expr
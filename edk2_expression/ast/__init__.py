@@ -2,19 +2,77 @@ from __future__ import annotations
 
 from pygments.token import Token
 
-from edk2_expression.ast.core import Expression, NestMethod
+from edk2_expression.ast.core import (
+    _DEFAULT_PARSE_METHOD,
+    EvaluationSession,
+    Expression,
+    NestMethod,
+    ParseMethod,
+    TokenStream,
+)
 from edk2_expression.ast.operand import parse_operand
 from edk2_expression.ast.operator import pop_operator, push_operator
+from edk2_expression.ast.precedence import parse_precedence_climbing
 from edk2_expression.error import ParseError
 
 
-def parse(tokens: list[tuple[int, Token, str]]) -> Expression:
+def parse(
+    tokens: TokenStream | list[tuple[int, Token, str]],
+    method: ParseMethod | str = _DEFAULT_PARSE_METHOD,
+) -> Expression:
     """Parse a list of tokens into an expression AST.
 
     :param tokens: A list of tokens to parse.
        The tokens is the output of ``RegexLexer.get_tokens_unprocessed`` from
-       Pygments, which is a list of tuples of ``(position, token_type, token_text)``.
-    :type tokens: list[tuple[int, Token, str]]
+       Pygments or :func:`edk2_expression.tokenizer.tokenize`, which is a list
+       of tuples of ``(position, token_type, token_text)``.
+    :type tokens: TokenStream | list[tuple[int, Token, str]]
+    :param method: The parsing algorithm. Both algorithms produce the same AST.
+        Default to ``ParseMethod.PrecedenceClimbing`` ("precedence-climbing");
+        use ``ParseMethod.ShuntingYard`` ("shunting-yard") for the original
+        implementation.
+    :type method: ParseMethod | str
+    :return: The parsed expression AST.
+    :rtype: Expression
+    :raises ParseError: If the tokens cannot be parsed into an expression AST.
+    """
+    method = ParseMethod(method)
+    if method == ParseMethod.PrecedenceClimbing:
+        parse_tokens = parse_precedence_climbing
+    else:
+        parse_tokens = parse_shunting_yard
+
+    if isinstance(tokens, TokenStream):
+        return parse_tokens(tokens)
+
+    # consume the tokens through a cursor; the list is trimmed once afterward
+    # to keep the behavior of popping from the list
+    stream = TokenStream(tokens)
+    try:
+        return parse_tokens(stream)
+    finally:
+        del tokens[: stream.position]
+
+
+def optimize(expr: Expression) -> tuple[Expression, int]:
+    """Fold the constant sub-expressions, see :meth:`Expression.fold`.
+
+    :param expr: The expression to optimize.
+    :type expr: Expression
+    :return: The folded expression and the number of nodes eliminated.
+    :rtype: tuple[Expression, int]
+    """
+    folded = expr.fold()
+    if folded is expr:
+        return expr, 0
+    return folded, sum(1 for _ in expr.walk()) - sum(1 for _ in folded.walk())
+
+
+def parse_shunting_yard(tokens: TokenStream) -> Expression:
+    """Parse tokens into an expression AST with the shunting yard algorithm.
+
+    :param tokens: The tokens to parse.
+    :type tokens: TokenStream
     :return: The parsed expression AST.
     :rtype: Expression
     :raises ParseError: If the tokens cannot be parsed into an expression AST.
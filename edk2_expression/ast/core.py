@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import dataclasses
 import enum
 import typing
 from abc import ABC, abstractmethod
+from collections.abc import Mapping
 from dataclasses import dataclass
 
-from edk2_expression.error import NotSupported
+from edk2_expression.error import CircularReference, NotSupported
 
 if typing.TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+
     from pygments.token import Token
 
 
@@ -32,18 +36,98 @@ class NestMethod(str, enum.Enum):
 _DEFAULT_NEST_METHOD = NestMethod.Error
 
 
-@dataclass(frozen=True)
+class ParseMethod(str, enum.Enum):
+    PrecedenceClimbing = "precedence-climbing"
+    """Iterative precedence climbing driven by precomputed operator tables."""
+
+    ShuntingYard = "shunting-yard"
+    """Shunting yard algorithm."""
+
+    @classmethod
+    def _missing_(cls, value: str) -> ParseMethod | None:
+        name = value.lower()
+        for member in cls:
+            if member.value == name:
+                return member
+
+
+_DEFAULT_PARSE_METHOD = ParseMethod.PrecedenceClimbing
+
+
+class TokenStream:
+    """A cursor over a list of tokens.
+
+    Consuming a token only advances the cursor, so parsing is linear in the
+    number of tokens. It supports the subset of the ``list`` interface used by
+    the parsers, i.e. ``tokens[0]``, ``tokens.pop(0)``, ``len(tokens)``, truth
+    testing and iteration; the indexes are relative to the cursor.
+
+    :param tokens: The tokens, i.e. the output of ``get_tokens_unprocessed``.
+    :type tokens: Sequence[tuple[int, Token, str]]
+    :param position: Index of the first unconsumed token.
+    :type position: int
+    """
+
+    __slots__ = ("tokens", "position")
+
+    def __init__(
+        self, tokens: Sequence[tuple[int, Token, str]], position: int = 0
+    ) -> None:
+        self.tokens = tokens
+        self.position = position
+
+    def __len__(self) -> int:
+        return len(self.tokens) - self.position
+
+    def __bool__(self) -> bool:
+        return self.position < len(self.tokens)
+
+    def __iter__(self) -> Iterator[tuple[int, Token, str]]:
+        # do not use islice(); it walks from the head of the list
+        tokens = self.tokens
+        for index in range(self.position, len(tokens)):
+            yield tokens[index]
+
+    def __getitem__(self, index: int) -> tuple[int, Token, str]:
+        if index < 0:
+            index += len(self)
+            if index < 0:
+                raise IndexError("token index out of range")
+        return self.tokens[self.position + index]
+
+    def pop(self, index: int = 0) -> tuple[int, Token, str]:
+        """Consume the token at the cursor.
+
+        :param index: Must be 0; it exists for compatibility with ``list.pop(0)``.
+        :type index: int
+        :return: The consumed token.
+        :rtype: tuple[int, Token, str]
+        """
+        if index != 0:
+            raise ValueError("TokenStream only supports consuming the head token")
+        if self.position >= len(self.tokens):
+            raise IndexError("pop from empty token stream")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+
+@dataclass(frozen=True, slots=True)
 class Expression(ABC):
     """Base class for all expressions."""
 
     @classmethod
     @abstractmethod
-    def parse(cls, tokens: list[tuple[int, Token, str]]) -> Expression | None:
+    def parse(
+        cls, tokens: TokenStream | list[tuple[int, Token, str]]
+    ) -> Expression | None:
         """Parse a list of tokens into an expression AST. This method may pop
         items from the list when a expression is parsed.
 
-        :param tokens: A list of tokens.
-        :type tokens: list[tuple[int, Token, str]]
+        :param tokens: The tokens. A :class:`TokenStream` consumes tokens in
+            constant time; a plain list is still accepted for compatibility
+            but each pop is linear in its length.
+        :type tokens: TokenStream | list[tuple[int, Token, str]]
         :return: The parsed expression. The return value may be None if the
             input does not match format for this class.
         :rtype: Expression | None
@@ -73,3 +157,272 @@ class Expression(ABC):
         raise NotSupported(
             f"Evaluation not supported for {type(self).__name__}: {self}"
         )
+
+    def compile(
+        self, nest: NestMethod | str = _DEFAULT_NEST_METHOD
+    ) -> Callable[[dict[str, object]], object]:
+        """Compile the expression into a function that takes the context and
+        returns the same result as :meth:`evaluate`. The tree is walked and the
+        nest method is resolved once on compilation, so repeated evaluations
+        are cheaper.
+
+        :param nest: How to handle nested expressions. See :meth:`evaluate`.
+        :type nest: NestMethod | str
+        :return: A function ``f(context) -> value``.
+        :rtype: Callable[[dict[str, object]], object]
+        """
+        evaluate = self.evaluate
+        nest = NestMethod(nest)
+
+        def evaluate_expression(context: dict[str, object]) -> object:
+            return evaluate(context, nest)
+
+        return evaluate_expression
+
+    def macros(self) -> frozenset[str]:
+        """Return the names of the macros the expression depends on, i.e. the
+        ones referenced by ``$(NAME)`` and ``DEFINED(NAME)``, without
+        evaluating it. The result of an operator is computed once and cached.
+
+        Macros whose values are expressions are not followed.
+
+        :return: The macro names.
+        :rtype: frozenset[str]
+        """
+        return frozenset()
+
+    def walk(self) -> Iterator[Expression]:
+        """Iterate over the expression and all its sub-expressions, depth first.
+
+        :return: An iterator of expressions, starting with this one.
+        :rtype: Iterator[Expression]
+        """
+        pending = [self]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, Expression):
+                yield node
+            for field in reversed(dataclasses.fields(node)):
+                value = getattr(node, field.name)
+                if isinstance(value, Expression) or dataclasses.is_dataclass(value):
+                    pending.append(value)
+
+    def fold(self) -> Expression:
+        """Return an equivalent expression with constant sub-expressions
+        collapsed into :class:`Constant` nodes, e.g. ``(1 + 2) * 3`` into ``9``.
+
+        Sub-expressions that would raise an error, or whose result cannot be
+        written as a constant, are kept so the error is still raised on
+        evaluation. This is :meth:`partial_evaluate` with no macro known.
+
+        :return: The folded expression, or this expression if nothing can be
+            folded.
+        :rtype: Expression
+        """
+        return self.partial_evaluate({})
+
+    def partial_evaluate(
+        self,
+        context: Mapping[str, object],
+        nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+    ) -> Expression:
+        """Evaluate the parts of the expression that only depend on the macros
+        in the context, and return the residual expression, e.g.
+        ``$(TARGET) == "DEBUG" && $(ARCH) == "X64"`` with ``TARGET`` set to
+        ``"DEBUG"`` gives ``$(ARCH) == "X64"``, and ``FALSE && $(ARCH)`` gives
+        ``FALSE``. Evaluating the residual gives the same result as evaluating
+        the expression, with any context that agrees with this one; the macros
+        replaced by their values are no longer looked up.
+
+        The macros not in the context, or whose values have no constant form,
+        are kept as ``$(NAME)``. Sub-expressions that would raise an error are
+        kept so the error is still raised on evaluation, and ``&&``, ``||``
+        and ``?:`` are only simplified where the skipped operand would not
+        have been evaluated.
+
+        :param context: The known macro definitions.
+        :type context: Mapping[str, object]
+        :param nest: How to handle macros whose values are expressions. With
+            ``NestMethod.Evaluate`` ("evaluate"), the reference is replaced by
+            the residual of the value; otherwise it is kept, so evaluating the
+            residual handles it as :meth:`evaluate` would.
+        :type nest: NestMethod | str
+        :return: The residual expression, a :class:`Constant` if the whole
+            expression is known, or this expression if nothing can be
+            evaluated.
+        :rtype: Expression
+        """
+        return self
+
+    def to_bytes(self) -> bytes:
+        """Encode the expression in the compact binary format of
+        :mod:`edk2_expression.serialize`.
+
+        :return: The encoded expression.
+        :rtype: bytes
+        :raises NotSupported: If the expression contains a node type that has
+            no encoding.
+        """
+        from edk2_expression.serialize import dumps
+
+        return dumps((self,))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Expression:
+        """Decode an expression encoded by :meth:`to_bytes`.
+
+        :param data: The encoded expression.
+        :type data: bytes
+        :return: The expression.
+        :rtype: Expression
+        :raises ValueError: If the data is not a single encoded expression.
+        :raises TypeError: If the decoded expression is not an instance of
+            this class.
+        """
+        from edk2_expression.serialize import loads
+
+        exprs = loads(data)
+        if len(exprs) != 1:
+            raise ValueError(f"Expected 1 expression, got {len(exprs)}")
+        if not isinstance(expr := exprs[0], cls):
+            raise TypeError(f"Decoded {type(expr).__name__}, expected {cls.__name__}")
+        return expr
+
+    def evaluate_many(
+        self,
+        contexts: Iterable[dict[str, object]],
+        nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+    ) -> Iterator[object]:
+        """Evaluate the expression against each of the contexts.
+
+        The expression is compiled once with
+        :func:`edk2_expression.codegen.compile_expression`, so the per-context
+        cost is a single function call. An error for one context does not stop
+        the batch: the exception instance is yielded in place of its result.
+        An error raised while compiling is yielded for every context.
+
+        :param contexts: The dictionaries of macro definitions.
+        :type contexts: Iterable[dict[str, object]]
+        :param nest: How to handle nested expressions. See :meth:`evaluate`.
+        :type nest: NestMethod | str
+        :return: An iterator of results, in the same order as ``contexts``.
+            Contexts that fail to evaluate yield the raised exception.
+        :rtype: Iterator[object]
+        """
+        from edk2_expression.codegen import compile_expression
+
+        try:
+            func = compile_expression(self, nest)
+        except Exception as e:
+            # e.g. an invalid nest method, reported for each context as well
+            for _ in contexts:
+                yield e
+            return
+        for context in contexts:
+            try:
+                result = func(context)
+            except Exception as e:
+                result = e
+            yield result
+
+
+_RESOLVING = object()
+"""Marker for a macro whose nested expression is being evaluated."""
+
+
+class EvaluationSession(Mapping):
+    """A read-only view of a context that memoizes nested expressions.
+
+    With ``NestMethod.Evaluate``, a macro whose value is an expression is
+    evaluated each time it is referenced, so a chain of ``DEFINE`` where each
+    level references the previous one several times takes exponential time.
+    Evaluating with a session as the context evaluates each nested expression
+    at most once, keyed by the macro name. :meth:`MacroVal.evaluate` wraps a
+    plain context in a session on the first nested expression, so the nested
+    levels are memoized automatically; a session passed explicitly also shares
+    the results among several top-level evaluations.
+
+    A macro that is referenced while its own expression is being evaluated
+    raises :class:`CircularReference` instead of recursing.
+
+    The results are not invalidated when the underlying context changes; use
+    a new session, or :meth:`clear`, after modifying it.
+
+    :param context: The dictionary of macro definitions.
+    :type context: Mapping[str, object]
+    """
+
+    __slots__ = ("context", "_results", "_resolving")
+
+    def __init__(self, context: Mapping[str, object]) -> None:
+        self.context = context
+        self._results: dict[str, object] = {}
+        self._resolving: list[str] = []
+
+    def __getitem__(self, name: str) -> object:
+        return self.context[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.context)
+
+    def __len__(self) -> int:
+        return len(self.context)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.context
+
+    def get(self, name: str, default: object = None) -> object:
+        return self.context.get(name, default)
+
+    def evaluate(
+        self, expr: Expression, nest: NestMethod | str = NestMethod.Evaluate
+    ) -> object:
+        """Evaluate an expression in this session.
+
+        :param expr: The expression to evaluate.
+        :type expr: Expression
+        :param nest: How to handle nested expressions. See
+            :meth:`Expression.evaluate`.
+        :type nest: NestMethod | str
+        :return: The result of the evaluation.
+        :rtype: object
+        """
+        return expr.evaluate(self, nest)
+
+    def resolve(self, macro: str, expr: Expression) -> object:
+        """Return the result of the nested expression defined for the macro,
+        evaluating it on the first call.
+
+        :param macro: The macro name.
+        :type macro: str
+        :param expr: The value of the macro.
+        :type expr: Expression
+        :return: The result of the evaluation with ``NestMethod.Evaluate``.
+        :rtype: object
+        :raises CircularReference: If the macro is already being resolved.
+        """
+        try:
+            result = self._results[macro]
+        except KeyError:
+            pass
+        else:
+            if result is _RESOLVING:
+                start = self._resolving.index(macro)
+                raise CircularReference([*self._resolving[start:], macro])
+            return result
+
+        self._results[macro] = _RESOLVING
+        self._resolving.append(macro)
+        try:
+            result = expr.evaluate(self, NestMethod.Evaluate)
+        except BaseException:
+            del self._results[macro]
+            raise
+        finally:
+            self._resolving.pop()
+        self._results[macro] = result
+        return result
+
+    def clear(self) -> None:
+        """Drop the memoized results."""
+        self._results.clear()
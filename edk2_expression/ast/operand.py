@@ -1,16 +1,29 @@
 from __future__ import annotations
 
 import re
+import typing
 import uuid
+from collections import ChainMap
 from dataclasses import dataclass
 
 from pygments.token import Token
 
-from edk2_expression.ast.core import _DEFAULT_NEST_METHOD, Expression, NestMethod
+from edk2_expression.ast.core import (
+    _DEFAULT_NEST_METHOD,
+    EvaluationSession,
+    Expression,
+    NestMethod,
+    TokenStream,
+)
 from edk2_expression.error import EvaluationError, ParseError
 
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
 
-def parse_operand(tokens: list[tuple[int, Token, str]]) -> Expression:
+
+def parse_operand(
+    tokens: TokenStream | list[tuple[int, Token, str]],
+) -> Expression | None:
     for class_ in (
         Boolean,
         HexNumber,
@@ -27,7 +40,30 @@ def parse_operand(tokens: list[tuple[int, Token, str]]) -> Expression:
             return obj
 
 
-@dataclass(frozen=True)
+def make_constant(value: object, hex_: bool = False) -> Constant | None:
+    """Wrap an evaluated value into a constant expression.
+
+    :param value: The value.
+    :type value: object
+    :param hex_: Use :class:`HexNumber` for non-negative integers.
+    :type hex_: bool
+    :return: The constant, or None if there is no constant type for the value.
+    :rtype: Constant | None
+    """
+    if isinstance(value, bool):
+        return Boolean(value)
+    if isinstance(value, int):
+        if hex_ and value >= 0:
+            return HexNumber(value)
+        return Integer(value)
+    if isinstance(value, str):
+        return String(value)
+    if isinstance(value, uuid.UUID):
+        return Guid(value.bytes)
+    return None
+
+
+@dataclass(frozen=True, slots=True)
 class Constant(Expression):
     value: object
 
@@ -47,13 +83,25 @@ class Constant(Expression):
     ) -> object:
         return self.value
 
+    def compile(
+        self, nest: NestMethod | str = _DEFAULT_NEST_METHOD
+    ) -> Callable[[dict[str, object]], object]:
+        value = self.evaluate({})
+
+        def evaluate_constant(context: dict[str, object]) -> object:
+            return value
+
+        return evaluate_constant
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Integer(Constant):
     value: int
 
     @classmethod
-    def parse(cls, tokens: list[tuple[int, Token, str]]) -> Integer | None:
+    def parse(
+        cls, tokens: TokenStream | list[tuple[int, Token, str]]
+    ) -> Integer | None:
         _, token, text = tokens[0]
         if token in Token.Number.Integer:
             tokens.pop(0)
@@ -65,7 +113,7 @@ class Integer(Constant):
     def __eq__(self, other: object) -> bool:
         if isinstance(other, (Integer, int)):
             return self.value == int(other)
-        return super().__eq__(other)
+        return Constant.__eq__(self, other)
 
     def __lt__(self, other: object) -> bool:
         if isinstance(other, (Integer, int)):
@@ -103,10 +151,12 @@ class Integer(Constant):
         return str(self.value)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class HexNumber(Integer):
     @classmethod
-    def parse(cls, tokens: list[tuple[int, Token, str]]) -> Integer | None:
+    def parse(
+        cls, tokens: TokenStream | list[tuple[int, Token, str]]
+    ) -> Integer | None:
         _, token, text = tokens[0]
         if token in Token.Number.Hex:
             tokens.pop(0)
@@ -117,12 +167,14 @@ class HexNumber(Integer):
         return f"0x{self.value:x}"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Boolean(Constant):
     value: bool
 
     @classmethod
-    def parse(cls, tokens: list[tuple[int, Token, str]]) -> Boolean | None:
+    def parse(
+        cls, tokens: TokenStream | list[tuple[int, Token, str]]
+    ) -> Boolean | None:
         _, token, text = tokens[0]
         if token not in Token.Keyword.Constant:
             return
@@ -138,7 +190,7 @@ class Boolean(Constant):
     def __eq__(self, other: object) -> bool:
         if isinstance(other, bool):
             return self.value == other
-        return super().__eq__(other)
+        return Constant.__eq__(self, other)
 
     def __bool__(self) -> bool:
         return self.value
@@ -147,12 +199,14 @@ class Boolean(Constant):
         return str(self.value)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class String(Constant):
     value: str
 
     @classmethod
-    def parse(cls, tokens: list[tuple[int, Token, str]]) -> Boolean | None:
+    def parse(
+        cls, tokens: TokenStream | list[tuple[int, Token, str]]
+    ) -> Boolean | None:
         _, _, prefix = tokens[0]
         if prefix not in ('"', "'", 'L"', "L'"):
             return None
@@ -180,18 +234,18 @@ class String(Constant):
     def __eq__(self, other: object) -> bool:
         if isinstance(other, str):
             return self.value == other
-        return super().__eq__(other)
+        return Constant.__eq__(self, other)
 
     def __str__(self) -> str:
         return f'"{self.value}"'
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Guid(Constant):
     value: bytes
 
     @classmethod
-    def parse(cls, tokens: list[tuple[int, Token, str]]) -> Guid | None:
+    def parse(cls, tokens: TokenStream | list[tuple[int, Token, str]]) -> Guid | None:
         _, token, text = tokens[0]
         if (
             True
@@ -210,7 +264,7 @@ class Guid(Constant):
             return self.value == other.value
         if isinstance(other, uuid.UUID):
             return self.value == other.bytes
-        return super().__eq__(other)
+        return Constant.__eq__(self, other)
 
     def __str__(self) -> str:
         return str(uuid.UUID(bytes=self.value))
@@ -221,12 +275,14 @@ class Guid(Constant):
         return uuid.UUID(bytes=self.value)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MacroVal(Expression):
     macro: str
 
     @classmethod
-    def parse(cls, tokens: list[tuple[int, Token, str]]) -> MacroVal | None:
+    def parse(
+        cls, tokens: TokenStream | list[tuple[int, Token, str]]
+    ) -> MacroVal | None:
         if not match_token_types(
             tokens,
             Token.Keyword.Declaration,
@@ -247,6 +303,9 @@ class MacroVal(Expression):
     def __str__(self) -> str:
         return f"$({self.macro})"
 
+    def macros(self) -> frozenset[str]:
+        return frozenset((self.macro,))
+
     def evaluate(
         self, context: dict[str, object], nest: NestMethod | str = _DEFAULT_NEST_METHOD
     ) -> object:
@@ -262,11 +321,52 @@ class MacroVal(Expression):
             elif nest == NestMethod.Ignore:
                 return self
             elif nest == NestMethod.Evaluate:
-                return val.evaluate(context, nest)
+                if not isinstance(context, EvaluationSession):
+                    context = EvaluationSession(context)
+                return context.resolve(self.macro, val)
         return val
 
-
-@dataclass(frozen=True)
+    def compile(
+        self, nest: NestMethod | str = _DEFAULT_NEST_METHOD
+    ) -> Callable[[dict[str, object]], object]:
+        macro = self.macro
+        nest = NestMethod(nest)
+
+        def evaluate_macro(context: dict[str, object]) -> object:
+            val = context.get(macro)
+            if val is None:
+                raise EvaluationError(f"Macro '{macro}' is not defined")
+            if isinstance(val, Expression):
+                return self.evaluate(context, nest)
+            return val
+
+        return evaluate_macro
+
+    def partial_evaluate(
+        self,
+        context: Mapping[str, object],
+        nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+    ) -> Expression:
+        val = context.get(self.macro)
+        if val is None:
+            return self
+        if isinstance(val, Constant):
+            return val
+        if isinstance(val, Expression):
+            if NestMethod(nest) != NestMethod.Evaluate:
+                return self
+            # the macro is unknown inside its own value, so a circular
+            # definition is kept and raises when the residual is evaluated
+            return val.partial_evaluate(ChainMap({self.macro: None}, context), nest)
+        # negative numbers have no literal form
+        if isinstance(val, int) and val < 0:
+            return self
+        if (constant := make_constant(val)) is None:
+            return self
+        return constant
+
+
+@dataclass(frozen=True, slots=True)
 class MacroDefined(Expression):
     """Function to check if a macro is defined. This is NOT a EDK II standard
     expression and therefore is not enabled by default. See readme for more
@@ -275,7 +375,9 @@ class MacroDefined(Expression):
     macro: str
 
     @classmethod
-    def parse(cls, tokens: list[tuple[int, Token, str]]) -> MacroVal | None:
+    def parse(
+        cls, tokens: TokenStream | list[tuple[int, Token, str]]
+    ) -> MacroVal | None:
         if not match_token_types(
             tokens,
             Token.Keyword.Type,
@@ -298,18 +400,39 @@ class MacroDefined(Expression):
     def __str__(self) -> str:
         return f"DEFINED({self.macro})"
 
+    def macros(self) -> frozenset[str]:
+        return frozenset((self.macro,))
+
     def evaluate(
         self, context: dict[str, object], nest: NestMethod | str = _DEFAULT_NEST_METHOD
     ) -> object:
         return self.macro in context
 
+    def compile(
+        self, nest: NestMethod | str = _DEFAULT_NEST_METHOD
+    ) -> Callable[[dict[str, object]], object]:
+        macro = self.macro
+
+        def evaluate_macro_defined(context: dict[str, object]) -> bool:
+            return macro in context
+
+        return evaluate_macro_defined
+
+    def partial_evaluate(
+        self,
+        context: Mapping[str, object],
+        nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+    ) -> Expression:
+        # a macro not in the context may still be defined later
+        return Boolean(True) if self.macro in context else self
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CName(Expression):
     name: str
 
     @classmethod
-    def parse(cls, tokens: list[tuple[int, Token, str]]) -> CName | None:
+    def parse(cls, tokens: TokenStream | list[tuple[int, Token, str]]) -> CName | None:
         _, token, text = tokens[0]
         if token in Token.Name.Variable:
             tokens.pop(0)
@@ -319,12 +442,14 @@ class CName(Expression):
         return self.name
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PcdName(Expression):
     name: str
 
     @classmethod
-    def parse(cls, tokens: list[tuple[int, Token, str]]) -> PcdName | None:
+    def parse(
+        cls, tokens: TokenStream | list[tuple[int, Token, str]]
+    ) -> PcdName | None:
         _, token, text = tokens[0]
         if (
             True
@@ -338,14 +463,16 @@ class PcdName(Expression):
         return self.name
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Array(Expression):
     """Array expression - NOT PARSED"""
 
     raw: str
 
     @classmethod
-    def parse(cls, tokens: list[tuple[int, Token, str]]) -> PcdName | None:
+    def parse(
+        cls, tokens: TokenStream | list[tuple[int, Token, str]]
+    ) -> PcdName | None:
         _, token, text = tokens[0]
         if token not in Token.Punctuation or text != "{":
             return None
@@ -376,7 +503,9 @@ class Array(Expression):
         return self.raw
 
 
-def match_token_types(tokens: list[tuple[int, Token, str]], *expect: Token) -> bool:
+def match_token_types(
+    tokens: TokenStream | list[tuple[int, Token, str]], *expect: Token
+) -> bool:
     if len(tokens) < len(expect):
         return False
     for expect_type, (_, token_type, _) in zip(expect, tokens):
@@ -1,13 +1,27 @@
 from __future__ import annotations
 
+import dataclasses
 import typing
 from abc import abstractmethod
 from dataclasses import dataclass
 
-from edk2_expression.ast.core import _DEFAULT_NEST_METHOD, Expression, NestMethod
+from edk2_expression.ast.core import (
+    _DEFAULT_NEST_METHOD,
+    EvaluationSession,
+    Expression,
+    NestMethod,
+)
+from edk2_expression.ast.operand import (
+    Boolean,
+    Constant,
+    HexNumber,
+    MacroDefined,
+    make_constant,
+)
 from edk2_expression.error import ParseError
 
 if typing.TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
     from typing import NoReturn
 
     from pygments.token import Token
@@ -81,19 +95,13 @@ def push_operator(
     if not current_precedence:
         raise ParseError(f"Unknown operator '{current_operator}'")
 
-    # stack empty, direct insert
-    if not operator_stack:
-        operator_stack.append(operator)
-        return
+    # pop operators with higher or equal precedence, then insert
+    while (
+        operator_stack and OPERATOR_PRECEDENCE[operator_stack[-1]] <= current_precedence
+    ):
+        pop_operator(operator_stack, output_stack)
 
-    last_precedence = OPERATOR_PRECEDENCE[operator_stack[-1]]
-    if current_precedence < last_precedence:
-        operator_stack.append(operator)
-        return
-
-    # pop last operator and retry
-    pop_operator(operator_stack, output_stack)
-    return push_operator(operator, operator_stack, output_stack)
+    operator_stack.append(operator)
 
 
 def pop_operator(
@@ -111,33 +119,6 @@ def pop_operator(
     :rtype: str
     :raises ParseError: If the operator is unknown or missing operands.
     """
-    OPERATOR_CLASS = {
-        "(": (None, None),
-        "!": (1, LogicalNot),
-        "~": (1, BitwiseNot),
-        "*": (2, Multiplication),
-        "/": (2, Division),
-        "%": (2, Modulo),
-        "+": (2, Addition),
-        "-": (2, Subtraction),
-        "<<": (2, BitwiseLeftShift),
-        ">>": (2, BitwiseRightShift),
-        "<": (2, LessThan),
-        "<=": (2, LessEqual),
-        ">": (2, GreaterThan),
-        ">=": (2, GreaterEqual),
-        "==": (2, Equal),
-        "!=": (2, NotEqual),
-        "&": (2, BitwiseAnd),
-        "^": (2, BitwiseXor),
-        "|": (2, BitwiseOr),
-        "&&": (2, LogicalAnd),
-        "||": (2, LogicalOr),
-        "xor": (2, LogicalXor),
-        ":": (2, TernaryOp.Decision),
-        "?": (2, TernaryOp),  # values should be wrapped by ':' first
-    }
-
     num_operands, operator_class = OPERATOR_CLASS.get(
         last_operator := operator_stack.pop(),
         (-1, None),
@@ -159,8 +140,51 @@ def pop_operator(
     return last_operator
 
 
+def share_session(
+    context: dict[str, object], nest: NestMethod | str
+) -> dict[str, object]:
+    """Wrap the context in an :class:`EvaluationSession` for
+    ``NestMethod.Evaluate``, so a nested expression referenced by several
+    operands is evaluated once per top-level evaluation, not once per
+    reference.
+
+    :param context: The context passed to the operator.
+    :type context: dict[str, object]
+    :param nest: The nest method.
+    :type nest: NestMethod | str
+    :return: The context to pass to the operands.
+    :rtype: dict[str, object]
+    """
+    if nest is NestMethod.Error or isinstance(context, EvaluationSession):
+        return context
+    if NestMethod(nest) == NestMethod.Evaluate:
+        return EvaluationSession(context)
+    return context
+
+
+def in_session(
+    func: Callable[[dict[str, object]], object], nest: NestMethod
+) -> Callable[[dict[str, object]], object]:
+    """Wrap a compiled operator so it evaluates its operands in one
+    :class:`EvaluationSession` with ``NestMethod.Evaluate``, the same as
+    :func:`share_session` does for :meth:`Expression.evaluate`."""
+    if nest != NestMethod.Evaluate:
+        return func
+
+    def evaluate_in_session(context: dict[str, object]) -> object:
+        if not isinstance(context, EvaluationSession):
+            context = EvaluationSession(context)
+        return func(context)
+
+    return evaluate_in_session
+
+
 @dataclass(frozen=True)
 class Operator(Expression):
+    # a plain slot rather than a field, so the cache of :meth:`macros` is not
+    # part of fields(), asdict() or astuple()
+    __slots__ = ("_macros",)
+
     @classmethod
     def parse(cls, tokens: list[tuple[int, Token, str]]) -> NoReturn:
         """``Operator.parse()`` should not be called.
@@ -169,8 +193,23 @@ class Operator(Expression):
         """
         raise RuntimeError("Operator.parse() should not be called")
 
+    def operands(self) -> tuple[Expression, ...]:
+        """Return the operands of the operator.
 
-@dataclass(frozen=True)
+        :rtype: tuple[Expression, ...]
+        """
+        return ()
+
+    def macros(self) -> frozenset[str]:
+        try:
+            return self._macros
+        except AttributeError:
+            macros = frozenset().union(*(sub.macros() for sub in self.operands()))
+            object.__setattr__(self, "_macros", macros)
+            return macros
+
+
+@dataclass(frozen=True, slots=True)
 class UnaryOp(Operator):
     sub: Expression
 
@@ -178,6 +217,20 @@ class UnaryOp(Operator):
         if not isinstance(self.sub, Expression):
             raise ParseError(f"Missing operand for operator '{self}'")
 
+    def operands(self) -> tuple[Expression, ...]:
+        return (self.sub,)
+
+    def partial_evaluate(
+        self,
+        context: Mapping[str, object],
+        nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+    ) -> Expression:
+        sub = self.sub.partial_evaluate(context, nest)
+        expr = self if sub is self.sub else dataclasses.replace(self, sub=sub)
+        if isinstance(sub, Constant):
+            return fold_constant(expr, isinstance(sub, HexNumber))
+        return expr
+
     @abstractmethod
     def evaluate(
         self, context: dict[str, object], nest: NestMethod | str = _DEFAULT_NEST_METHOD
@@ -185,7 +238,7 @@ class UnaryOp(Operator):
         """Evaluate the operator with the given context."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LogicalNot(UnaryOp):
     def __str__(self) -> str:
         return f"!{self.sub}"
@@ -195,8 +248,18 @@ class LogicalNot(UnaryOp):
     ) -> bool:
         return not self.sub.evaluate(context, nest)
 
+    def compile(
+        self, nest: NestMethod | str = _DEFAULT_NEST_METHOD
+    ) -> Callable[[dict[str, object]], object]:
+        sub = self.sub.compile(nest)
 
-@dataclass(frozen=True)
+        def evaluate_logical_not(context: dict[str, object]) -> bool:
+            return not sub(context)
+
+        return evaluate_logical_not
+
+
+@dataclass(frozen=True, slots=True)
 class BitwiseNot(UnaryOp):
     def __str__(self) -> str:
         return f"~{self.sub}"
@@ -206,8 +269,18 @@ class BitwiseNot(UnaryOp):
     ) -> int:
         return ~self.sub.evaluate(context, nest)
 
+    def compile(
+        self, nest: NestMethod | str = _DEFAULT_NEST_METHOD
+    ) -> Callable[[dict[str, object]], object]:
+        sub = self.sub.compile(nest)
 
-@dataclass(frozen=True)
+        def evaluate_bitwise_not(context: dict[str, object]) -> int:
+            return ~sub(context)
+
+        return evaluate_bitwise_not
+
+
+@dataclass(frozen=True, slots=True)
 class BinaryOpBase(Operator):
     left: Expression
     right: Expression
@@ -218,12 +291,37 @@ class BinaryOpBase(Operator):
         if not isinstance(self.right, Expression):
             raise ParseError(f"Missing right operand for operator '{self}'")
 
+    def operands(self) -> tuple[Expression, ...]:
+        return (self.left, self.right)
 
-@dataclass(frozen=True)
+    def partial_evaluate(
+        self,
+        context: Mapping[str, object],
+        nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+    ) -> Expression:
+        left = self.left.partial_evaluate(context, nest)
+        right = self.right.partial_evaluate(context, nest)
+        expr = self.replace_operands(left, right)
+        if isinstance(left, Constant) and isinstance(right, Constant):
+            return fold_constant(
+                expr, isinstance(left, HexNumber) or isinstance(right, HexNumber)
+            )
+        return expr
+
+    def replace_operands(self, left: Expression, right: Expression) -> Expression:
+        """Return a copy with the operands replaced, or this expression itself
+        if the operands are unchanged."""
+        if left is self.left and right is self.right:
+            return self
+        return dataclasses.replace(self, left=left, right=right)
+
+
+@dataclass(frozen=True, slots=True)
 class BinaryOp(BinaryOpBase):
     def evaluate(
         self, context: dict[str, object], nest: NestMethod | str = _DEFAULT_NEST_METHOD
     ) -> object:
+        context = share_session(context, nest)
         left_value = self.left.evaluate(context, nest)
         right_value = self.right.evaluate(context, nest)
         if isinstance(left_value, Expression) or isinstance(right_value, Expression):
@@ -234,13 +332,40 @@ class BinaryOp(BinaryOpBase):
                 raise RuntimeError("Unknown error for nested expression")
         return self.compare(left_value, right_value)
 
+    def compile(
+        self, nest: NestMethod | str = _DEFAULT_NEST_METHOD
+    ) -> Callable[[dict[str, object]], object]:
+        nest = NestMethod(nest)
+        left = self.left.compile(nest)
+        right = self.right.compile(nest)
+        compare = self.compare
+
+        # operands could be unresolved expressions only when they are ignored
+        if nest != NestMethod.Ignore:
+
+            def evaluate_binary(context: dict[str, object]) -> object:
+                return compare(left(context), right(context))
+
+            return in_session(evaluate_binary, nest)
+
+        def evaluate_binary_ignore(context: dict[str, object]) -> object:
+            left_value = left(context)
+            right_value = right(context)
+            if isinstance(left_value, Expression) or isinstance(
+                right_value, Expression
+            ):
+                return self
+            return compare(left_value, right_value)
+
+        return evaluate_binary_ignore
+
     @classmethod
     @abstractmethod
     def compare(self, a: object, b: object) -> bool:
         """Compare two objects and return the result."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Multiplication(BinaryOp):
     def __str__(self) -> str:
         return f"({self.left} * {self.right})"
@@ -250,7 +375,7 @@ class Multiplication(BinaryOp):
         return a * b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Division(BinaryOp):
     def __str__(self) -> str:
         return f"({self.left} / {self.right})"
@@ -260,7 +385,7 @@ class Division(BinaryOp):
         return a / b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Modulo(BinaryOp):
     def __str__(self) -> str:
         return f"({self.left} % {self.right})"
@@ -270,7 +395,7 @@ class Modulo(BinaryOp):
         return a % b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Addition(BinaryOp):
     def __str__(self) -> str:
         return f"({self.left} + {self.right})"
@@ -280,7 +405,7 @@ class Addition(BinaryOp):
         return a + b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Subtraction(BinaryOp):
     def __str__(self) -> str:
         return f"({self.left} - {self.right})"
@@ -290,7 +415,7 @@ class Subtraction(BinaryOp):
         return a - b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BitwiseLeftShift(BinaryOp):
     def __str__(self) -> str:
         return f"({self.left} << {self.right})"
@@ -300,7 +425,7 @@ class BitwiseLeftShift(BinaryOp):
         return a << b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BitwiseRightShift(BinaryOp):
     def __str__(self) -> str:
         return f"({self.left} >> {self.right})"
@@ -310,7 +435,7 @@ class BitwiseRightShift(BinaryOp):
         return a >> b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LessThan(BinaryOp):
     def __str__(self) -> str:
         return f"{self.left} < {self.right}"
@@ -320,7 +445,7 @@ class LessThan(BinaryOp):
         return a < b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LessEqual(BinaryOp):
     def __str__(self) -> str:
         return f"{self.left} <= {self.right}"
@@ -330,7 +455,7 @@ class LessEqual(BinaryOp):
         return a <= b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class GreaterThan(BinaryOp):
     def __str__(self) -> str:
         return f"{self.left} > {self.right}"
@@ -340,7 +465,7 @@ class GreaterThan(BinaryOp):
         return a > b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class GreaterEqual(BinaryOp):
     def __str__(self) -> str:
         return f"{self.left} >= {self.right}"
@@ -350,7 +475,7 @@ class GreaterEqual(BinaryOp):
         return a >= b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Equal(BinaryOp):
     def __str__(self) -> str:
         return f"{self.left} == {self.right}"
@@ -360,7 +485,7 @@ class Equal(BinaryOp):
         return a == b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class NotEqual(BinaryOp):
     def __str__(self) -> str:
         return f"{self.left} != {self.right}"
@@ -370,7 +495,7 @@ class NotEqual(BinaryOp):
         return a != b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BitwiseAnd(BinaryOp):
     def __str__(self) -> str:
         return f"{self.left} & {self.right}"
@@ -380,7 +505,7 @@ class BitwiseAnd(BinaryOp):
         return a & b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BitwiseXor(BinaryOp):
     def __str__(self) -> str:
         return f"{self.left} ^ {self.right}"
@@ -390,7 +515,7 @@ class BitwiseXor(BinaryOp):
         return a ^ b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BitwiseOr(BinaryOp):
     def __str__(self) -> str:
         return f"({self.left} | {self.right})"
@@ -400,7 +525,7 @@ class BitwiseOr(BinaryOp):
         return a | b
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LogicalXor(BinaryOp):
     def __str__(self) -> str:
         return f"{self.left} xor {self.right}"
@@ -434,7 +559,7 @@ class LazyEvaluated:
         return bool(value)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LogicalAnd(BinaryOpBase):
     def __str__(self) -> str:
         return f"{self.left} && {self.right}"
@@ -442,6 +567,7 @@ class LogicalAnd(BinaryOpBase):
     def evaluate(
         self, context: dict[str, object], nest: NestMethod | str = _DEFAULT_NEST_METHOD
     ) -> object:
+        context = share_session(context, nest)
         left = LazyEvaluated(self.left, context, nest)
         right = LazyEvaluated(self.right, context, nest)
         try:
@@ -449,8 +575,51 @@ class LogicalAnd(BinaryOpBase):
         except LazyEvaluated.Skip:
             return self
 
+    def partial_evaluate(
+        self,
+        context: Mapping[str, object],
+        nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+    ) -> Expression:
+        left = self.left.partial_evaluate(context, nest)
+        right = self.right.partial_evaluate(context, nest)
+        if isinstance(left, Constant):
+            if not left.evaluate({}):
+                return Boolean(False)
+            if isinstance(right, Constant):
+                return Boolean(bool(right.evaluate({})))
+            if is_boolean(right):
+                return right
+        return self.replace_operands(left, right)
+
+    def compile(
+        self, nest: NestMethod | str = _DEFAULT_NEST_METHOD
+    ) -> Callable[[dict[str, object]], object]:
+        nest = NestMethod(nest)
+        left = self.left.compile(nest)
+        right = self.right.compile(nest)
+
+        if nest != NestMethod.Ignore:
+
+            def evaluate_logical_and(context: dict[str, object]) -> bool:
+                return bool(left(context)) and bool(right(context))
+
+            return in_session(evaluate_logical_and, nest)
+
+        def evaluate_logical_and_ignore(context: dict[str, object]) -> object:
+            left_value = left(context)
+            if isinstance(left_value, Expression):
+                return self
+            if not left_value:
+                return False
+            right_value = right(context)
+            if isinstance(right_value, Expression):
+                return self
+            return bool(right_value)
 
-@dataclass(frozen=True)
+        return evaluate_logical_and_ignore
+
+
+@dataclass(frozen=True, slots=True)
 class LogicalOr(BinaryOpBase):
     def __str__(self) -> str:
         return f"({self.left} || {self.right})"
@@ -458,6 +627,7 @@ class LogicalOr(BinaryOpBase):
     def evaluate(
         self, context: dict[str, object], nest: NestMethod | str = _DEFAULT_NEST_METHOD
     ) -> object:
+        context = share_session(context, nest)
         left = LazyEvaluated(self.left, context, nest)
         right = LazyEvaluated(self.right, context, nest)
         try:
@@ -465,10 +635,53 @@ class LogicalOr(BinaryOpBase):
         except LazyEvaluated.Skip:
             return self
 
+    def partial_evaluate(
+        self,
+        context: Mapping[str, object],
+        nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+    ) -> Expression:
+        left = self.left.partial_evaluate(context, nest)
+        right = self.right.partial_evaluate(context, nest)
+        if isinstance(left, Constant):
+            if left.evaluate({}):
+                return Boolean(True)
+            if isinstance(right, Constant):
+                return Boolean(bool(right.evaluate({})))
+            if is_boolean(right):
+                return right
+        return self.replace_operands(left, right)
+
+    def compile(
+        self, nest: NestMethod | str = _DEFAULT_NEST_METHOD
+    ) -> Callable[[dict[str, object]], object]:
+        nest = NestMethod(nest)
+        left = self.left.compile(nest)
+        right = self.right.compile(nest)
+
+        if nest != NestMethod.Ignore:
+
+            def evaluate_logical_or(context: dict[str, object]) -> bool:
+                return bool(left(context)) or bool(right(context))
+
+            return in_session(evaluate_logical_or, nest)
+
+        def evaluate_logical_or_ignore(context: dict[str, object]) -> object:
+            left_value = left(context)
+            if isinstance(left_value, Expression):
+                return self
+            if left_value:
+                return True
+            right_value = right(context)
+            if isinstance(right_value, Expression):
+                return self
+            return bool(right_value)
+
+        return evaluate_logical_or_ignore
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class TernaryOp(Operator):
-    @dataclass(frozen=True)
+    @dataclass(frozen=True, slots=True)
     class Decision:
         """Value holder for ternary operator."""
 
@@ -497,6 +710,9 @@ class TernaryOp(Operator):
     def __str__(self) -> str:
         return f"{self.condition} ? {self.decision}"
 
+    def operands(self) -> tuple[Expression, ...]:
+        return (self.condition, self.decision.true, self.decision.false)
+
     def evaluate(
         self, context: dict[str, object], nest: NestMethod | str = _DEFAULT_NEST_METHOD
     ) -> object:
@@ -504,3 +720,114 @@ class TernaryOp(Operator):
             return self.decision.true.evaluate(context, nest)
         else:
             return self.decision.false.evaluate(context, nest)
+
+    def partial_evaluate(
+        self,
+        context: Mapping[str, object],
+        nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+    ) -> Expression:
+        # the condition is always evaluated with the default nest method
+        condition = self.condition.partial_evaluate(context)
+        true = self.decision.true.partial_evaluate(context, nest)
+        false = self.decision.false.partial_evaluate(context, nest)
+        if isinstance(condition, Constant):
+            return true if condition.evaluate({}) else false
+        if (
+            condition is self.condition
+            and true is self.decision.true
+            and false is self.decision.false
+        ):
+            return self
+        return TernaryOp(condition, TernaryOp.Decision(true, false))
+
+    def compile(
+        self, nest: NestMethod | str = _DEFAULT_NEST_METHOD
+    ) -> Callable[[dict[str, object]], object]:
+        condition = self.condition.compile()
+        true = self.decision.true.compile(nest)
+        false = self.decision.false.compile(nest)
+
+        def evaluate_ternary(context: dict[str, object]) -> object:
+            if condition(context):
+                return true(context)
+            else:
+                return false(context)
+
+        return evaluate_ternary
+
+
+OPERATOR_CLASS: dict[str, tuple[int | None, type | None]] = {
+    # operator: (number of operands, class)
+    "(": (None, None),
+    "!": (1, LogicalNot),
+    "~": (1, BitwiseNot),
+    "*": (2, Multiplication),
+    "/": (2, Division),
+    "%": (2, Modulo),
+    "+": (2, Addition),
+    "-": (2, Subtraction),
+    "<<": (2, BitwiseLeftShift),
+    ">>": (2, BitwiseRightShift),
+    "<": (2, LessThan),
+    "<=": (2, LessEqual),
+    ">": (2, GreaterThan),
+    ">=": (2, GreaterEqual),
+    "==": (2, Equal),
+    "!=": (2, NotEqual),
+    "&": (2, BitwiseAnd),
+    "^": (2, BitwiseXor),
+    "|": (2, BitwiseOr),
+    "&&": (2, LogicalAnd),
+    "||": (2, LogicalOr),
+    "xor": (2, LogicalXor),
+    ":": (2, TernaryOp.Decision),
+    "?": (2, TernaryOp),  # values should be wrapped by ':' first
+}
+
+
+def fold_constant(expr: Expression, hex_: bool = False) -> Expression:
+    """Evaluate an operator whose operands are all constants into a constant.
+
+    :param expr: The operator to fold.
+    :type expr: Expression
+    :param hex_: Keep integer results in hexadecimal form.
+    :type hex_: bool
+    :return: The constant, or ``expr`` itself if it raises an error on
+        evaluation or the result cannot be written as a constant.
+    :rtype: Expression
+    """
+    try:
+        value = expr.evaluate({})
+    except Exception:
+        return expr
+    # negative numbers have no literal form, keep them so str() can be parsed
+    if isinstance(value, int) and value < 0:
+        return expr
+    # hex literals have 2 to 8 digits
+    if hex_ and not (isinstance(value, int) and 0x10 <= value <= 0xFFFFFFFF):
+        hex_ = False
+    if (constant := make_constant(value, hex_)) is None:
+        return expr
+    return constant
+
+
+def is_boolean(expr: Expression) -> bool:
+    """Check if the expression always evaluates to a ``bool``, so ``bool()`` on
+    its result is a no-op."""
+    return isinstance(expr, _BOOLEAN_RESULT_CLASSES)
+
+
+_BOOLEAN_RESULT_CLASSES = (
+    Boolean,
+    MacroDefined,
+    LogicalNot,
+    LessThan,
+    LessEqual,
+    GreaterThan,
+    GreaterEqual,
+    Equal,
+    NotEqual,
+    LogicalXor,
+    LogicalAnd,
+    LogicalOr,
+)
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import typing
+
+from pygments.token import Token
+
+from edk2_expression.ast.core import Expression
+from edk2_expression.ast.operand import parse_operand
+from edk2_expression.ast.operator import (
+    OPERATOR_CLASS,
+    OPERATOR_PRECEDENCE,
+    OPERATOR_REMAP,
+)
+from edk2_expression.error import ParseError
+
+if typing.TYPE_CHECKING:
+    from edk2_expression.ast.core import TokenStream
+
+OPERATORS: dict[str, str] = {
+    # token text -> operator
+    **{operator: operator for operator in OPERATOR_PRECEDENCE if operator != "("},
+    **OPERATOR_REMAP,
+}
+
+PREFIX_OPERATORS: dict[str, tuple[int, type]] = {
+    # operator -> (precedence, class)
+    operator: (OPERATOR_PRECEDENCE[operator], class_)
+    for operator, (num_operands, class_) in OPERATOR_CLASS.items()
+    if num_operands == 1
+}
+
+BINARY_OPERATORS: dict[str, tuple[int, type]] = {
+    # operator -> (precedence, class)
+    operator: (OPERATOR_PRECEDENCE[operator], class_)
+    for operator, (num_operands, class_) in OPERATOR_CLASS.items()
+    if num_operands == 2
+}
+
+_BRACKET_PRECEDENCE = OPERATOR_PRECEDENCE["("]
+
+
+def parse_precedence_climbing(tokens: TokenStream) -> Expression:
+    """Parse tokens into an expression AST with iterative precedence climbing.
+
+    All binary operators are left-associative. Pending operators are kept in
+    an explicit stack of ``(precedence, operator, class, left operand)`` frames,
+    so neither long operator chains nor deep brackets consume Python stack
+    frames.
+
+    The shunting yard implementation in :func:`edk2_expression.ast.parse`
+    accepts some malformed input, e.g. ``1 2 +``, and reports errors in its own
+    words. To keep the same behavior, the tokens rejected here are parsed again
+    with it, which gives the same AST or error. The only difference is that
+    consecutive prefix operators like ``!!TRUE`` are parsed here, while the
+    shunting yard rejects or misplaces them.
+
+    :param tokens: The tokens to parse.
+    :type tokens: TokenStream
+    :return: The parsed expression AST.
+    :rtype: Expression
+    :raises ParseError: If the tokens cannot be parsed into an expression AST.
+    """
+    start = tokens.position
+    try:
+        return _parse_precedence_climbing(tokens)
+    except ParseError:
+        # only malformed input takes this path, so it costs nothing otherwise
+        from edk2_expression.ast import parse_shunting_yard
+
+        tokens.position = start
+        return parse_shunting_yard(tokens)
+
+
+def _parse_precedence_climbing(tokens: TokenStream) -> Expression:
+    raw_expression = "".join(token[2] for token in tokens)
+
+    # Errors raised while reducing for an incoming operator are not suffixed
+    # with the expression text, the same as push_operator() in shunting yard.
+    def build(frame: tuple, operand: object, suffix: bool = True) -> object:
+        _, _, class_, left = frame
+        try:
+            if left is None:
+                return class_(operand)
+            return class_(left, operand)
+        except ParseError as e:
+            if not suffix:
+                raise
+            raise ParseError(f"{e} in expression '{raw_expression}'")
+
+    def missing_operand(
+        operator: str | None, precedence: int | None = None
+    ) -> ParseError:
+        # report the innermost pending operator, as the shunting yard does
+        suffix = True
+        for pending_precedence, pending, _, _ in reversed(frames):
+            if pending == "(":
+                if precedence is not None:
+                    break
+            else:
+                operator = pending
+                suffix = precedence is None or pending_precedence > precedence
+                break
+
+        if operator is None:
+            return ParseError(
+                f"Unbalanced operators or operands in expression '{raw_expression}'"
+            )
+        if not suffix:
+            return ParseError(f"Missing operand(s) for operator '{operator}'")
+        return ParseError(
+            f"Missing operand(s) for operator '{operator}' "
+            f"in expression '{raw_expression}'"
+        )
+
+    frames = []
+    operand = None
+    while tokens:
+        head_token_pos, head_token_type, head_token_text = tokens[0]
+
+        # ignore whitespace
+        if head_token_type in Token.Text.Whitespace or head_token_type in Token.Comment:
+            tokens.pop(0)
+            continue
+
+        # expecting an operand: operands, prefix operators and opening brackets
+        if operand is None:
+            if (operand := parse_operand(tokens)) is not None:
+                pass
+
+            elif head_token_type in Token.Punctuation and head_token_text == "(":
+                tokens.pop(0)
+                frames.append((_BRACKET_PRECEDENCE, "(", None, None))
+
+            elif head_token_type in Token.Operator:
+                tokens.pop(0)
+                operator = OPERATORS.get(head_token_text)
+                if operator is None:
+                    raise ParseError(f"Unknown operator '{head_token_text}'")
+                if operator not in PREFIX_OPERATORS:
+                    raise missing_operand(operator, OPERATOR_PRECEDENCE[operator])
+                precedence, class_ = PREFIX_OPERATORS[operator]
+                frames.append((precedence, operator, class_, None))
+
+            elif head_token_type in Token.Punctuation and head_token_text == ")":
+                raise missing_operand(None)
+
+            else:
+                raise ParseError(
+                    f"Unexpected component '{head_token_text}' from '{raw_expression}' position {head_token_pos}"
+                )
+
+        # expecting an operator: binary operators and closing brackets
+        elif head_token_type in Token.Operator:
+            tokens.pop(0)
+            operator = OPERATORS.get(head_token_text)
+            if operator is None:
+                raise ParseError(f"Unknown operator '{head_token_text}'")
+            if operator not in BINARY_OPERATORS:
+                raise ParseError(
+                    f"Unbalanced operators or operands in expression '{raw_expression}'"
+                )
+
+            # reduce pending operators with higher or equal precedence
+            precedence, class_ = BINARY_OPERATORS[operator]
+            while frames and frames[-1][0] <= precedence:
+                operand = build(frames.pop(), operand, suffix=False)
+
+            frames.append((precedence, operator, class_, operand))
+            operand = None
+
+        elif head_token_type in Token.Punctuation and head_token_text == ")":
+            while frames and frames[-1][1] != "(":
+                operand = build(frames.pop(), operand)
+            if not frames:
+                raise ParseError(
+                    f"Unbalanced brackets in expression '{raw_expression}'"
+                )
+            frames.pop()
+            tokens.pop(0)
+
+        elif (
+            head_token_type in Token.Punctuation and head_token_text == "("
+        ) or parse_operand(tokens) is not None:
+            raise ParseError(
+                f"Unbalanced operators or operands in expression '{raw_expression}'"
+            )
+
+        else:
+            raise ParseError(
+                f"Unexpected component '{head_token_text}' from '{raw_expression}' position {head_token_pos}"
+            )
+
+    if operand is None:
+        raise missing_operand(None)
+
+    # unclosed brackets are tolerated, as the shunting yard does
+    while frames:
+        if (frame := frames.pop())[1] != "(":
+            operand = build(frame, operand)
+
+    if not isinstance(operand, Expression):
+        raise ParseError(f"Invalid expression '{raw_expression}'")
+
+    return operand
@@ -0,0 +1,243 @@
+"""Preprocess many DSC/FDF files in parallel.
+
+:func:`preprocess_files` distributes the files among worker processes with
+:class:`concurrent.futures.ProcessPoolExecutor`. The files are sent in chunks
+to amortize the cost of the inter-process calls, and the base context, e.g.
+the macros given on the command line, is sent once to each worker instead of
+once per file. Each worker has its own :data:`edk2_expression.parse_cache`,
+so the conditions shared by the files of a workspace are parsed once per
+worker.
+
+A file that fails, e.g. with unbalanced directives or a missing file, does
+not stop the batch: its :class:`FileResult` holds the exception instead.
+
+The module is also a command line tool::
+
+    python -m edk2_expression.batch -D TARGET=DEBUG -j 8 Platform/*/*.dsc
+"""
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import os
+import sys
+import typing
+from dataclasses import dataclass
+
+from edk2_expression.ast.core import NestMethod
+from edk2_expression.dsc import Line, LineKind, Preprocessor
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping, Sequence
+
+_CHUNKS_PER_WORKER = 4
+"""Number of chunks per worker with the default chunk size, so the workers
+still balance the load when the files have different sizes."""
+
+_base: tuple[dict[str, object], NestMethod, str] | None = None
+"""The base context, nest method and encoding of this worker process."""
+
+
+@dataclass(frozen=True)
+class FileResult:
+    """The result of preprocessing one file."""
+
+    path: str
+
+    lines: tuple[Line, ...] = ()
+    """The lines in effect, other than the directives and ``DEFINE``
+    statements."""
+
+    defines: dict[str, object] | None = None
+    """The macros defined or changed by the file, with the same values as
+    :attr:`Preprocessor.context`."""
+
+    error: Exception | None = None
+    """The exception raised when processing the file, or None on success."""
+
+    @property
+    def ok(self) -> bool:
+        """Whether the file is processed without error."""
+        return self.error is None
+
+
+def preprocess_file(
+    path: str | os.PathLike,
+    context: Mapping[str, object] | None = None,
+    nest: NestMethod | str = NestMethod.Evaluate,
+    encoding: str = "utf-8",
+) -> FileResult:
+    """Preprocess one file in this process.
+
+    :param path: The path of the file.
+    :type path: str | os.PathLike
+    :param context: The initial macro definitions.
+    :type context: Mapping[str, object] | None
+    :param nest: How to handle macros defined as expressions.
+    :type nest: NestMethod | str
+    :param encoding: The encoding of the file.
+    :type encoding: str
+    :return: The result. Errors are captured in :attr:`FileResult.error`.
+    :rtype: FileResult
+    """
+    path = os.fspath(path)
+    base = context or {}
+    preprocessor = Preprocessor(base, nest)
+    try:
+        with open(path, encoding=encoding) as file:
+            lines = tuple(
+                line
+                for line in preprocessor.process(file)
+                if line.active and line.kind is LineKind.Text
+            )
+    except Exception as e:
+        return FileResult(path, error=e)
+
+    defines = {
+        name: value
+        for name, value in preprocessor.context.items()
+        if name not in base or base[name] is not value
+    }
+    return FileResult(path, lines, defines)
+
+
+def preprocess_files(
+    paths: Iterable[str | os.PathLike],
+    context: Mapping[str, object] | None = None,
+    *,
+    nest: NestMethod | str = NestMethod.Evaluate,
+    encoding: str = "utf-8",
+    workers: int | None = None,
+    chunksize: int | None = None,
+    ordered: bool = True,
+) -> Iterator[FileResult]:
+    """Preprocess files in worker processes. Each file starts from the same
+    base context; the macros defined by one file are not visible to the
+    others.
+
+    :param paths: The paths of the files.
+    :type paths: Iterable[str | os.PathLike]
+    :param context: The initial macro definitions, shared by all the files.
+        The values must be picklable.
+    :type context: Mapping[str, object] | None
+    :param nest: How to handle macros defined as expressions.
+    :type nest: NestMethod | str
+    :param encoding: The encoding of the files.
+    :type encoding: str
+    :param workers: Number of worker processes. Default to the number of
+        CPUs. ``0`` processes the files in this process, e.g. for debugging.
+    :type workers: int | None
+    :param chunksize: Number of files sent to a worker at once. Default to
+        splitting the files in a few chunks per worker.
+    :type chunksize: int | None
+    :param ordered: Yield the results in the order of ``paths``. Otherwise,
+        yield each chunk of results as soon as it is completed.
+    :type ordered: bool
+    :return: An iterator of the results, one for each file.
+    :rtype: Iterator[FileResult]
+    """
+    paths = [os.fspath(path) for path in paths]
+    context = dict(context or {})
+    nest = NestMethod(nest)
+
+    if workers == 0:
+        for path in paths:
+            yield preprocess_file(path, context, nest, encoding)
+        return
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 0:
+        raise ValueError(f"workers must be non-negative, got {workers}")
+    if chunksize is None:
+        chunksize = max(1, -(-len(paths) // (workers * _CHUNKS_PER_WORKER)))
+    elif chunksize < 1:
+        raise ValueError(f"chunksize must be positive, got {chunksize}")
+
+    with concurrent.futures.ProcessPoolExecutor(
+        workers, initializer=_initialize, initargs=(context, nest, encoding)
+    ) as executor:
+        futures = [
+            executor.submit(_process_chunk, paths[start : start + chunksize])
+            for start in range(0, len(paths), chunksize)
+        ]
+        if not ordered:
+            futures = concurrent.futures.as_completed(futures)
+        for future in futures:
+            yield from future.result()
+
+
+def _initialize(context: dict[str, object], nest: NestMethod, encoding: str) -> None:
+    global _base
+    _base = (context, nest, encoding)
+
+
+def _process_chunk(paths: Sequence[str]) -> list[FileResult]:
+    context, nest, encoding = _base
+    return [preprocess_file(path, context, nest, encoding) for path in paths]
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run the command line tool.
+
+    :param argv: The arguments, default to ``sys.argv[1:]``.
+    :type argv: Sequence[str] | None
+    :return: The exit status; 1 if any file failed.
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m edk2_expression.batch",
+        description="Print the lines of DSC/FDF files in effect under their "
+        "conditional directives, as PATH:LINE:TEXT.",
+    )
+    parser.add_argument("files", nargs="+", help="input files")
+    parser.add_argument(
+        "-D",
+        "--define",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="define a macro for all the files",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, help="number of worker processes, 0 for none"
+    )
+    parser.add_argument("--chunksize", type=int, help="files sent to a worker at once")
+    parser.add_argument(
+        "--unordered", action="store_true", help="print files as they complete"
+    )
+    parser.add_argument(
+        "--summary",
+        action="store_true",
+        help="print the number of lines in effect per file instead of the lines",
+    )
+    parser.add_argument("--encoding", default="utf-8", help="encoding of the files")
+    args = parser.parse_args(argv)
+
+    base = Preprocessor()
+    for define in args.define:
+        name, _, value = define.partition("=")
+        base.define(name, value)
+
+    failed = 0
+    for result in preprocess_files(
+        args.files,
+        base.context,
+        encoding=args.encoding,
+        workers=args.jobs,
+        chunksize=args.chunksize,
+        ordered=not args.unordered,
+    ):
+        if not result.ok:
+            failed += 1
+            print(f"{result.path}: error: {result.error}", file=sys.stderr)
+        elif args.summary:
+            print(f"{result.path}: {len(result.lines)} lines")
+        else:
+            for line in result.lines:
+                print(f"{result.path}:{line.number}:{line.text}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""Bit-parallel evaluation of conditions for many configurations.
+
+Most conditions of a DSC file are boolean combinations of tests like
+``$(TARGET) == "DEBUG"`` or ``$(TPM_ENABLE)``. :class:`BitEvaluator` evaluates
+such a condition for a batch of configurations at once: bit ``i`` of a mask is
+the result for the ``i``-th configuration, and the logical operators ``&&``,
+``||``, ``xor``, ``!`` and ``?:`` are bitwise operations on the masks. Python
+integers have no size limit, so a batch may hold any number of configurations;
+up to 64 of them fit in a machine word.
+
+The masks of the tests are taken from an index built once per macro, which
+maps each value of the macro to the mask of the configurations where it has
+that value. A test on a macro is then a dictionary lookup, whatever the number
+of configurations, and the index is shared by all the conditions evaluated
+with the same :class:`BitEvaluator`.
+
+Any other sub-expression, e.g. ``$(SIZE) + 1 > 4`` or a macro defined as an
+expression, is evaluated with :meth:`Expression.evaluate` for each
+configuration. Like the short-circuits of ``&&``, ``||`` and ``?:``, every
+sub-expression is only evaluated for the configurations where it would be
+evaluated one configuration at a time, so the results are those of
+``bool(expr.evaluate(context, nest))``, and an error is raised if any of the
+configurations would raise one.
+"""
+from __future__ import annotations
+
+import typing
+
+import edk2_expression.ast.operand as operand
+import edk2_expression.ast.operator as op
+from edk2_expression.ast.core import (
+    _DEFAULT_NEST_METHOD,
+    EvaluationSession,
+    Expression,
+    NestMethod,
+)
+from edk2_expression.error import NotSupported
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+
+
+class _Column:
+    """The values of a macro across the configurations, as masks."""
+
+    __slots__ = ("values", "plain", "truthy", "undefined", "nested", "defined")
+
+    def __init__(self, name: str, contexts: Sequence[Mapping[str, object]]) -> None:
+        self.values: dict[object, int] = {}
+        """Masks by plain value; ``True`` and ``1`` share a key, as they are
+        equal."""
+        self.plain = 0
+        """Configurations where the value is in :attr:`values`."""
+        self.truthy = 0
+        self.undefined = 0
+        self.nested = 0
+        """Configurations where the value is an expression or is not hashable,
+        which are evaluated one at a time."""
+        self.defined = 0
+
+        for index, context in enumerate(contexts):
+            bit = 1 << index
+            if name in context:
+                self.defined |= bit
+            # same as MacroVal.evaluate()
+            value = context.get(name)
+            if value is None:
+                self.undefined |= bit
+                continue
+            if isinstance(value, operand.Constant):
+                value = value.evaluate({})
+            elif isinstance(value, Expression):
+                self.nested |= bit
+                continue
+            try:
+                self.values[value] = self.values.get(value, 0) | bit
+            except TypeError:
+                self.nested |= bit
+                continue
+            self.plain |= bit
+            if value:
+                self.truthy |= bit
+
+
+class BitEvaluator:
+    """Evaluate conditions for a batch of configurations as bitmasks.
+
+    The configurations must not be modified while the evaluator is in use,
+    since the values of the macros are indexed on first use.
+
+    :param contexts: The configurations, each a dictionary of macro
+        definitions.
+    :type contexts: Sequence[Mapping[str, object]]
+    :param nest: How to handle nested expressions, see
+        :meth:`Expression.evaluate`. ``NestMethod.Ignore`` is not supported
+        since it has no boolean result.
+    :type nest: NestMethod | str
+    :raises NotSupported: If ``nest`` is ``NestMethod.Ignore``.
+    """
+
+    def __init__(
+        self,
+        contexts: Sequence[Mapping[str, object]],
+        nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+    ) -> None:
+        self._nest = NestMethod(nest)
+        if self._nest == NestMethod.Ignore:
+            raise NotSupported(
+                "Bit-parallel evaluation not supported for nest method 'ignore'"
+            )
+        self._contexts = list(contexts)
+        self._sessions: list[EvaluationSession] | None = None
+        self._columns: dict[str, _Column] = {}
+        self.full = (1 << len(self._contexts)) - 1
+        """The mask with a bit set for every configuration."""
+
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+    def evaluate(self, expr: Expression) -> int:
+        """Evaluate the condition for all the configurations.
+
+        :param expr: The condition.
+        :type expr: Expression
+        :return: A mask with bit ``i`` set if the condition is true for the
+            ``i``-th configuration.
+        :rtype: int
+        :raises EvaluationError: If a macro is not defined, or a nested
+            expression is found with ``NestMethod.Error``, in any of the
+            configurations where it is evaluated.
+        :raises NotSupported: If the expression contains a node that cannot be
+            evaluated.
+        """
+        return self._mask(expr, self._nest, self.full)
+
+    def truths(self, expr: Expression) -> list[bool]:
+        """Evaluate the condition for all the configurations.
+
+        :param expr: The condition.
+        :type expr: Expression
+        :return: The result for each configuration.
+        :rtype: list[bool]
+        """
+        mask = self.evaluate(expr)
+        return [bool(mask >> index & 1) for index in range(len(self._contexts))]
+
+    def _mask(self, expr: Expression, nest: NestMethod, active: int) -> int:
+        # the bits not in the active mask are left clear
+        if not active:
+            return 0
+        type_ = type(expr)
+
+        if type_ is op.LogicalAnd:
+            left = self._mask(expr.left, nest, active)
+            return self._mask(expr.right, nest, left)
+
+        if type_ is op.LogicalOr:
+            left = self._mask(expr.left, nest, active)
+            return left | self._mask(expr.right, nest, active & ~left)
+
+        if type_ is op.LogicalXor:
+            left = self._mask(expr.left, nest, active)
+            return left ^ self._mask(expr.right, nest, active)
+
+        if type_ is op.LogicalNot:
+            return active & ~self._mask(expr.sub, nest, active)
+
+        if type_ is op.TernaryOp:
+            # the condition is always evaluated with the default nest method
+            condition = self._mask(
+                expr.condition, NestMethod(_DEFAULT_NEST_METHOD), active
+            )
+            true = self._mask(expr.decision.true, nest, condition)
+            return true | self._mask(expr.decision.false, nest, active & ~condition)
+
+        if isinstance(expr, operand.Constant):
+            return active if expr.evaluate({}) else 0
+
+        if type_ is operand.MacroDefined:
+            return active & self._column(expr.macro).defined
+
+        if type_ is operand.MacroVal:
+            column = self._column(expr.macro)
+            result = self._fallback(expr, nest, active & ~column.plain)
+            return result | (active & column.truthy)
+
+        if type_ is op.Equal or type_ is op.NotEqual:
+            if type(expr.left) is operand.MacroVal and isinstance(
+                expr.right, operand.Constant
+            ):
+                return self._compare(expr, expr.left, expr.right, nest, active)
+            if type(expr.right) is operand.MacroVal and isinstance(
+                expr.left, operand.Constant
+            ):
+                return self._compare(expr, expr.right, expr.left, nest, active)
+
+        return self._fallback(expr, nest, active)
+
+    def _compare(
+        self,
+        expr: op.Equal | op.NotEqual,
+        macro: operand.MacroVal,
+        constant: operand.Constant,
+        nest: NestMethod,
+        active: int,
+    ) -> int:
+        column = self._column(macro.macro)
+        plain = column.plain
+        try:
+            equal = column.values.get(constant.evaluate({}), 0)
+        except TypeError:
+            return self._fallback(expr, nest, active)
+
+        # undefined macros raise, nested expressions are evaluated
+        result = self._fallback(expr, nest, active & ~plain)
+        if type(expr) is op.NotEqual:
+            equal = plain & ~equal
+        return result | (active & equal)
+
+    def _fallback(self, expr: Expression, nest: NestMethod, active: int) -> int:
+        # evaluate one configuration at a time
+        if not active:
+            return 0
+        if nest == NestMethod.Evaluate:
+            if self._sessions is None:
+                self._sessions = [EvaluationSession(c) for c in self._contexts]
+            contexts = self._sessions
+        else:
+            contexts = self._contexts
+
+        result = 0
+        while active:
+            bit = active & -active
+            if expr.evaluate(contexts[bit.bit_length() - 1], nest):
+                result |= bit
+            active ^= bit
+        return result
+
+    def _column(self, name: str) -> _Column:
+        if (column := self._columns.get(name)) is None:
+            column = self._columns[name] = _Column(name, self._contexts)
+        return column
+
+
+def evaluate_bits(
+    expr: Expression,
+    contexts: Sequence[Mapping[str, object]],
+    nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+) -> int:
+    """Evaluate a condition for a batch of configurations. To evaluate several
+    conditions for the same configurations, use a :class:`BitEvaluator` to
+    index the macros once.
+
+    :param expr: The condition.
+    :type expr: Expression
+    :param contexts: The configurations, each a dictionary of macro
+        definitions.
+    :type contexts: Sequence[Mapping[str, object]]
+    :param nest: How to handle nested expressions, see
+        :meth:`Expression.evaluate`.
+    :type nest: NestMethod | str
+    :return: A mask with bit ``i`` set if the condition is true for
+        ``contexts[i]``.
+    :rtype: int
+    :raises EvaluationError: If the condition cannot be evaluated for one of
+        the configurations.
+    :raises NotSupported: If the expression contains a node that cannot be
+        evaluated, or ``nest`` is ``NestMethod.Ignore``.
+    """
+    return BitEvaluator(contexts, nest).evaluate(expr)
@@ -0,0 +1,193 @@
+"""Bounded in-memory cache for parsed expressions."""
+from __future__ import annotations
+
+import dataclasses
+import sys
+import threading
+import typing
+from collections import OrderedDict
+from dataclasses import dataclass
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Hashable
+
+    from edk2_expression.ast import Expression
+
+_UNSET = object()
+
+
+@dataclass(frozen=True)
+class CacheInfo:
+    """Statistics of a :class:`ParseCache`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    currsize: int
+    maxsize: int | None
+    currbytes: int
+    maxbytes: int | None
+
+
+class ParseCache:
+    """A least-recently-used cache that maps expression text to the parsed
+    expression AST.
+
+    All AST nodes are immutable, so the cached expressions are shared among all
+    callers. The cache is bounded by both the number of entries and an
+    approximate memory budget; the least recently used entries are evicted
+    when any of the limits is exceeded.
+
+    :param maxsize: Maximum number of entries. ``None`` for unbounded; ``0``
+        disables the cache.
+    :type maxsize: int | None
+    :param maxbytes: Approximate memory budget in bytes. ``None`` for unbounded.
+    :type maxbytes: int | None
+    """
+
+    def __init__(
+        self, maxsize: int | None = 4096, maxbytes: int | None = 16 * 1024 * 1024
+    ) -> None:
+        _check_limit("maxsize", maxsize)
+        _check_limit("maxbytes", maxbytes)
+        self._maxsize = maxsize
+        self._maxbytes = maxbytes
+        self._entries: OrderedDict[str, tuple[Expression, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._currbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Expression | None:
+        """Look up the cached expression and mark it as recently used.
+
+        :param key: The expression text, or a tuple of it and the parse options.
+        :type key: Hashable
+        :return: The cached expression, or None if not cached.
+        :rtype: Expression | None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, expr: Expression) -> None:
+        """Store an expression into the cache and evict the least recently used
+        entries if any limit is exceeded.
+
+        :param key: The expression text, or a tuple of it and the parse options.
+        :type key: Hashable
+        :param expr: The parsed expression.
+        :type expr: Expression
+        """
+        if self._maxsize == 0:
+            return
+
+        size = sys.getsizeof(key) + estimate_size(expr)
+        if self._maxbytes is not None and size > self._maxbytes:
+            return
+
+        with self._lock:
+            if (entry := self._entries.pop(key, None)) is not None:
+                self._currbytes -= entry[1]
+            self._entries[key] = (expr, size)
+            self._currbytes += size
+            self._evict()
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._currbytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def resize(
+        self,
+        maxsize: int | None = _UNSET,
+        maxbytes: int | None = _UNSET,
+    ) -> None:
+        """Change the limits of the cache. Entries are evicted immediately if
+        the new limits are exceeded.
+
+        :param maxsize: New maximum number of entries. Unchanged if omitted.
+        :type maxsize: int | None
+        :param maxbytes: New memory budget in bytes. Unchanged if omitted.
+        :type maxbytes: int | None
+        """
+        if maxsize is not _UNSET:
+            _check_limit("maxsize", maxsize)
+        if maxbytes is not _UNSET:
+            _check_limit("maxbytes", maxbytes)
+
+        with self._lock:
+            if maxsize is not _UNSET:
+                self._maxsize = maxsize
+            if maxbytes is not _UNSET:
+                self._maxbytes = maxbytes
+            self._evict()
+
+    def info(self) -> CacheInfo:
+        """Return the statistics of the cache.
+
+        :rtype: CacheInfo
+        """
+        with self._lock:
+            return CacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                currsize=len(self._entries),
+                maxsize=self._maxsize,
+                currbytes=self._currbytes,
+                maxbytes=self._maxbytes,
+            )
+
+    def _evict(self) -> None:
+        # caller must hold the lock
+        while self._entries and (
+            (self._maxsize is not None and len(self._entries) > self._maxsize)
+            or (self._maxbytes is not None and self._currbytes > self._maxbytes)
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._currbytes -= size
+            self._evictions += 1
+
+
+def estimate_size(expr: Expression) -> int:
+    """Estimate the memory footprint of an expression AST in bytes.
+
+    :param expr: The expression.
+    :type expr: Expression
+    :return: Approximated size in bytes.
+    :rtype: int
+    """
+    size = 0
+    pending = [expr]
+    while pending:
+        obj = pending.pop()
+        size += sys.getsizeof(obj)
+        if not dataclasses.is_dataclass(obj):
+            continue
+        if (attrs := getattr(obj, "__dict__", None)) is not None:
+            size += sys.getsizeof(attrs)
+        for field in dataclasses.fields(obj):
+            pending.append(getattr(obj, field.name))
+    return size
+
+
+def _check_limit(name: str, value: int | None) -> None:
+    if value is not None and value < 0:
+        raise ValueError(f"{name} must be non-negative or None, got {value}")
@@ -0,0 +1,345 @@
+"""Translate expression ASTs into Python code.
+
+:func:`compile_expression` generates a Python ``lambda context: ...`` from the
+expression AST, compiles it with the builtin :func:`compile` and returns the
+function. The whole expression then runs as one bytecode sequence, without a
+Python call per node as in :meth:`Expression.evaluate` or
+:meth:`Expression.compile`.
+
+The code objects are cached by their source text, so an expression that is
+parsed again, e.g. for every DSC file that includes the same condition, is
+compiled by Python only once.
+"""
+from __future__ import annotations
+
+import ast
+import functools
+import typing
+
+import edk2_expression.ast.operand as operand
+import edk2_expression.ast.operator as operator
+from edk2_expression.ast.core import (
+    _DEFAULT_NEST_METHOD,
+    EvaluationSession,
+    Expression,
+    NestMethod,
+)
+from edk2_expression.error import EvaluationError, NotSupported
+from edk2_expression.iterative import compile_iterative
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable
+    from types import CodeType
+
+_PLAIN_TYPES = frozenset({int, bool, str})
+"""Types of macro values that are returned as-is without calling the helper."""
+
+_BINARY_OPERATORS: dict[type, ast.operator | ast.cmpop] = {
+    operator.Multiplication: ast.Mult(),
+    operator.Division: ast.Div(),
+    operator.Modulo: ast.Mod(),
+    operator.Addition: ast.Add(),
+    operator.Subtraction: ast.Sub(),
+    operator.BitwiseLeftShift: ast.LShift(),
+    operator.BitwiseRightShift: ast.RShift(),
+    operator.BitwiseAnd: ast.BitAnd(),
+    operator.BitwiseXor: ast.BitXor(),
+    operator.BitwiseOr: ast.BitOr(),
+    operator.LessThan: ast.Lt(),
+    operator.LessEqual: ast.LtE(),
+    operator.GreaterThan: ast.Gt(),
+    operator.GreaterEqual: ast.GtE(),
+    operator.Equal: ast.Eq(),
+    operator.NotEqual: ast.NotEq(),
+}
+
+_BOOLEAN_OPERATORS: dict[type, ast.boolop] = {
+    operator.LogicalAnd: ast.And(),
+    operator.LogicalOr: ast.Or(),
+}
+
+_LITERAL_TYPES = (operand.Integer, operand.HexNumber, operand.Boolean, operand.String)
+
+
+def compile_expression(
+    expr: Expression,
+    nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+    *,
+    strict: bool = False,
+) -> Callable[[dict[str, object]], object]:
+    """Compile the expression into a Python function.
+
+    The function takes the context and returns the same result as
+    :meth:`Expression.evaluate` does with the same nest method.
+
+    ``NestMethod.Ignore`` returns the unresolved expression itself, which does
+    not map to plain Python operators; it is delegated to
+    :meth:`Expression.compile`.
+
+    Expressions nested too deeply to be translated, or compiled by Python,
+    are delegated to :func:`edk2_expression.iterative.compile_iterative`.
+
+    :param expr: The expression to compile.
+    :type expr: Expression
+    :param nest: How to handle nested expressions. See
+        :meth:`Expression.evaluate`.
+    :type nest: NestMethod | str
+    :param strict: Raise :class:`NotSupported` for nodes that cannot be
+        translated, e.g. :class:`CName`, :class:`PcdName` and :class:`Array`.
+        Otherwise, these nodes are called as :meth:`Expression.compile`
+        closures from the generated code.
+    :type strict: bool
+    :return: A function ``f(context) -> value``.
+    :rtype: Callable[[dict[str, object]], object]
+    :raises NotSupported: If ``strict`` is set and the expression contains a
+        node that cannot be translated.
+    """
+    nest = NestMethod(nest)
+    if nest == NestMethod.Ignore:
+        return expr.compile(nest)
+
+    try:
+        tree, namespace = generate(expr, nest, strict=strict)
+        code = _compile_source(ast.unparse(tree))
+    except (RecursionError, SyntaxError):
+        # too deep for the generator or for the Python compiler, e.g. a long
+        # chain of arithmetic operators or deeply nested brackets;
+        # Expression.compile() recurses too
+        return compile_iterative(expr, nest)
+    return eval(code, namespace)
+
+
+def generate(
+    expr: Expression,
+    nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+    *,
+    strict: bool = False,
+) -> tuple[ast.Expression, dict[str, object]]:
+    """Translate the expression into a Python ``lambda context: ...`` AST.
+
+    :param expr: The expression to translate.
+    :type expr: Expression
+    :param nest: How to handle nested expressions, either
+        ``NestMethod.Error`` or ``NestMethod.Evaluate``.
+    :type nest: NestMethod | str
+    :param strict: Raise :class:`NotSupported` for nodes that cannot be
+        translated instead of falling back to :meth:`Expression.compile`.
+    :type strict: bool
+    :return: The Python AST and the namespace the code must be evaluated in.
+    :rtype: tuple[ast.Expression, dict[str, object]]
+    :raises NotSupported: If ``strict`` is set and the expression contains a
+        node that cannot be translated, or if ``nest`` is ``NestMethod.Ignore``.
+    """
+    generator = _Generator(NestMethod(nest), strict)
+    body = generator.visit(expr)
+    if generator.session:
+        # (_s := [None]) and <body>, the list is always true
+        body = ast.BoolOp(
+            ast.And(),
+            [
+                ast.NamedExpr(
+                    ast.Name("_s", ast.Store()),
+                    ast.List([ast.Constant(None)], ast.Load()),
+                ),
+                body,
+            ],
+        )
+    tree = ast.Expression(
+        ast.Lambda(
+            args=ast.arguments(
+                posonlyargs=[],
+                args=[ast.arg("context")],
+                kwonlyargs=[],
+                kw_defaults=[],
+                defaults=[],
+            ),
+            body=body,
+        )
+    )
+    return ast.fix_missing_locations(tree), generator.namespace
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_source(source: str) -> CodeType:
+    return compile(source, "<edk2-expression>", "eval")
+
+
+cache_info = _compile_source.cache_info
+"""Return the hit/miss statistics of the code object cache."""
+
+cache_clear = _compile_source.cache_clear
+"""Drop all cached code objects."""
+
+
+def _lookup_error(context: dict[str, object], macro: str, val: object) -> object:
+    # same as MacroVal.evaluate() with NestMethod.Error
+    if val is None:
+        raise EvaluationError(f"Macro '{macro}' is not defined")
+    if isinstance(val, operand.Constant):
+        return val.evaluate(context)
+    if isinstance(val, Expression):
+        raise EvaluationError(f"Nested expression found in '$({macro})': {val}")
+    return val
+
+
+def _lookup_evaluate(
+    context: dict[str, object], macro: str, val: object, session: list
+) -> object:
+    # same as MacroVal.evaluate() with NestMethod.Evaluate; the session is
+    # created on the first nested expression and shared by all the references
+    # of the call through the one-item list ``session``
+    if val is None:
+        raise EvaluationError(f"Macro '{macro}' is not defined")
+    if isinstance(val, operand.Constant):
+        return val.evaluate(context)
+    if isinstance(val, Expression):
+        if isinstance(context, EvaluationSession):
+            return context.resolve(macro, val)
+        if session[0] is None:
+            session[0] = EvaluationSession(context)
+        return session[0].resolve(macro, val)
+    return val
+
+
+class _Generator:
+    """Build the Python AST for one expression. Objects that can not be
+    written as literals are bound to generated names in :attr:`namespace`."""
+
+    def __init__(self, nest: NestMethod, strict: bool) -> None:
+        if nest == NestMethod.Ignore:
+            raise NotSupported("Code generation not supported for nest method 'ignore'")
+        self.nest = nest
+        self.strict = strict
+        self.namespace = {
+            "_PLAIN_TYPES": _PLAIN_TYPES,
+            "_lookup": _lookup_error if nest == NestMethod.Error else _lookup_evaluate,
+            "_lookup_error": _lookup_error,
+        }
+        self.counter = 0
+        self.session = False
+        """Whether the code refers to the per-call session holder ``_s``."""
+
+    def bind(self, prefix: str, value: object) -> ast.Name:
+        name = f"_{prefix}{self.counter}"
+        self.counter += 1
+        self.namespace[name] = value
+        return ast.Name(name, ast.Load())
+
+    def visit(self, expr: Expression, nest: NestMethod | None = None) -> ast.expr:
+        nest = nest or self.nest
+        type_ = type(expr)
+
+        if type_ in _LITERAL_TYPES:
+            return ast.Constant(expr.value)
+
+        if type_ is operand.Guid:
+            return self.bind("c", expr.evaluate({}))
+
+        if type_ is operand.MacroVal:
+            return self.visit_macro(expr, nest)
+
+        if type_ is operand.MacroDefined:
+            return ast.Compare(
+                ast.Constant(expr.macro),
+                [ast.In()],
+                [ast.Name("context", ast.Load())],
+            )
+
+        if type_ is operator.LogicalNot:
+            return ast.UnaryOp(ast.Not(), self.visit(expr.sub, nest))
+
+        if type_ is operator.BitwiseNot:
+            return ast.UnaryOp(ast.Invert(), self.visit(expr.sub, nest))
+
+        if type_ in _BINARY_OPERATORS:
+            op = _BINARY_OPERATORS[type_]
+            left = self.visit(expr.left, nest)
+            right = self.visit(expr.right, nest)
+            if isinstance(op, ast.cmpop):
+                return ast.Compare(left, [op], [right])
+            return ast.BinOp(left, op, right)
+
+        if type_ is operator.LogicalXor:
+            # bool(a) != bool(b)
+            return ast.Compare(
+                ast.UnaryOp(ast.Not(), self.visit(expr.left, nest)),
+                [ast.NotEq()],
+                [ast.UnaryOp(ast.Not(), self.visit(expr.right, nest))],
+            )
+
+        if type_ in _BOOLEAN_OPERATORS:
+            return self.visit_boolean(expr, nest)
+
+        if type_ is operator.TernaryOp:
+            # the condition is always evaluated with the default nest method
+            return ast.IfExp(
+                self.visit(expr.condition, NestMethod(_DEFAULT_NEST_METHOD)),
+                self.visit(expr.decision.true, nest),
+                self.visit(expr.decision.false, nest),
+            )
+
+        if self.strict:
+            raise NotSupported(
+                f"Code generation not supported for {type_.__name__}: {expr}"
+            )
+        return ast.Call(
+            self.bind("f", expr.compile(nest)),
+            [ast.Name("context", ast.Load())],
+            [],
+        )
+
+    def visit_macro(self, expr: operand.MacroVal, nest: NestMethod) -> ast.expr:
+        # (_v if (_v := context.get("FOO")).__class__ in _PLAIN_TYPES
+        #  else _lookup(context, "FOO", _v))
+        name = f"_v{self.counter}"
+        self.counter += 1
+        args = [
+            ast.Name("context", ast.Load()),
+            ast.Constant(expr.macro),
+            ast.Name(name, ast.Load()),
+        ]
+        if nest == self.nest and nest == NestMethod.Evaluate:
+            self.session = True
+            args.append(ast.Name("_s", ast.Load()))
+        lookup = "_lookup" if nest == self.nest else "_lookup_error"
+        return ast.IfExp(
+            ast.Compare(
+                ast.Attribute(
+                    ast.NamedExpr(
+                        ast.Name(name, ast.Store()),
+                        ast.Call(
+                            ast.Attribute(
+                                ast.Name("context", ast.Load()), "get", ast.Load()
+                            ),
+                            [ast.Constant(expr.macro)],
+                            [],
+                        ),
+                    ),
+                    "__class__",
+                    ast.Load(),
+                ),
+                [ast.In()],
+                [ast.Name("_PLAIN_TYPES", ast.Load())],
+            ),
+            ast.Name(name, ast.Load()),
+            ast.Call(ast.Name(lookup, ast.Load()), args, []),
+        )
+
+    def visit_boolean(self, expr: Expression, nest: NestMethod) -> ast.expr:
+        # bool(a) and bool(b); chains of the same operator are flattened so
+        # long conditions do not produce deeply nested code
+        type_ = type(expr)
+        operands = []
+        pending = [expr]
+        while pending:
+            node = pending.pop()
+            if type(node) is type_:
+                pending.append(node.right)
+                pending.append(node.left)
+            else:
+                operands.append(
+                    ast.UnaryOp(
+                        ast.Not(), ast.UnaryOp(ast.Not(), self.visit(node, nest))
+                    )
+                )
+        return ast.BoolOp(_BOOLEAN_OPERATORS[type_], operands)
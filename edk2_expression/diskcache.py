@@ -0,0 +1,273 @@
+"""Persistent on-disk cache for parsed expressions.
+
+A :class:`DiskCache` stores parsed expressions in a directory, so a build that
+parses the same DSC/FDF files as the previous one skips tokenizing and parsing.
+Pass it to :func:`edk2_expression.parse` as ``disk_cache``, or store the
+expressions of a whole file at once with :meth:`DiskCache.put`.
+
+Entries are encoded with :mod:`edk2_expression.serialize` and keyed by a hash
+of the source text, the parse options, the library version and the tokenizer
+rules, so a different dialect (e.g. with ``DEFINED()`` enabled) or an upgrade
+never reads stale entries. Files are written to a temporary name and renamed
+into place, so parallel build processes can share one directory: a reader sees
+either a complete entry or none, and unreadable entries count as misses.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import secrets
+import tempfile
+import threading
+import time
+import typing
+from dataclasses import dataclass
+from pathlib import Path
+
+from edk2_expression import serialize, tokenizer
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from edk2_expression.ast import Expression
+
+_TEMP_PREFIX = ".tmp-"
+
+_STALE_TEMP_SECONDS = 3600
+"""Age after which a temporary file is considered abandoned by a crashed
+writer and removed on eviction."""
+
+
+@dataclass(frozen=True)
+class DiskCacheInfo:
+    """Statistics of a :class:`DiskCache` in this process."""
+
+    hits: int
+    misses: int
+    evictions: int
+    """Number of entries removed by this process to stay within the limit."""
+
+    currbytes: int
+    """Total size of the entries in the directory."""
+
+    maxbytes: int | None
+
+
+class DiskCache:
+    """A directory of parsed expressions, shared among processes.
+
+    The least recently used entries are removed when the total size exceeds
+    ``maxbytes``. The size is tracked per process and checked against the
+    directory when the limit is reached, so the directory may briefly exceed
+    the limit while several processes write to it.
+
+    :param directory: The cache directory. It is created if missing.
+    :type directory: str | os.PathLike
+    :param maxbytes: Maximum total size of the entries in bytes. ``None`` for
+        unbounded.
+    :type maxbytes: int | None
+    :param dialect: A name for the syntax variant. Default to a hash of the
+        rules in :mod:`edk2_expression.tokenizer`.
+    :type dialect: str | None
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        maxbytes: int | None = 256 * 1024 * 1024,
+        dialect: str | None = None,
+    ) -> None:
+        from edk2_expression import __version__
+
+        if maxbytes is not None and maxbytes < 0:
+            raise ValueError(f"maxbytes must be non-negative or None, got {maxbytes}")
+        if dialect is None:
+            dialect = hashlib.sha256(repr(tokenizer.RULES).encode()).hexdigest()[:16]
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._maxbytes = maxbytes
+        self._salt = f"{__version__}\0{serialize.VERSION}\0{dialect}\0".encode()
+        self._mode = _file_mode(self.directory)
+        self._lock = threading.Lock()
+        self._currbytes: int | None = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, text: str, options: str = "") -> list[Expression] | None:
+        """Look up the expressions stored for the text.
+
+        :param text: The source text, e.g. an expression or a whole file.
+        :type text: str
+        :param options: Distinguish results stored for the same text, e.g.
+            different parse options.
+        :type options: str
+        :return: The stored expressions, or None if not cached.
+        :rtype: list[Expression] | None
+        """
+        path = self._path(text, options)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            exprs = None
+        else:
+            try:
+                exprs = serialize.loads(data)
+            except ValueError:
+                # left by another version of the format, or corrupted
+                exprs = None
+                _remove(path)
+
+        with self._lock:
+            if exprs is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+
+        # mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return exprs
+
+    def put(self, text: str, exprs: Iterable[Expression], options: str = "") -> None:
+        """Store the expressions parsed from the text.
+
+        :param text: The source text, e.g. an expression or a whole file.
+        :type text: str
+        :param exprs: The parsed expressions.
+        :type exprs: Iterable[Expression]
+        :param options: Distinguish results stored for the same text, e.g.
+            different parse options.
+        :type options: str
+        :raises NotSupported: If an expression contains a node type that cannot
+            be serialized.
+        """
+        data = serialize.dumps(exprs)
+        if self._maxbytes is not None and len(data) > self._maxbytes:
+            return
+
+        path = self._path(text, options)
+        path.parent.mkdir(exist_ok=True)
+        fd, temp = tempfile.mkstemp(prefix=_TEMP_PREFIX, dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            # mkstemp() creates the file readable by the owner only; use the
+            # permissions of a file created by open() instead
+            os.chmod(temp, self._mode)
+            replaced = 0
+            if self._maxbytes is not None:
+                try:
+                    replaced = path.stat().st_size
+                except OSError:
+                    pass
+            os.replace(temp, path)
+        except BaseException:
+            _remove(Path(temp))
+            raise
+
+        if self._maxbytes is not None:
+            with self._lock:
+                if self._currbytes is None:
+                    self._currbytes = self._scan()[1]
+                else:
+                    self._currbytes += len(data) - replaced
+                if self._currbytes > self._maxbytes:
+                    self._evict()
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            for path, _, _ in self._entries():
+                _remove(path)
+            self._currbytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def info(self) -> DiskCacheInfo:
+        """Return the statistics of the cache. The size is read from the
+        directory.
+
+        :rtype: DiskCacheInfo
+        """
+        with self._lock:
+            self._currbytes = self._scan()[1]
+            return DiskCacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                currbytes=self._currbytes,
+                maxbytes=self._maxbytes,
+            )
+
+    def _path(self, text: str, options: str) -> Path:
+        digest = hashlib.sha256(self._salt)
+        digest.update(options.encode())
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8", "surrogatepass"))
+        name = digest.hexdigest()
+        return self.directory / name[:2] / name[2:]
+
+    def _entries(self) -> list[tuple[Path, float, int]]:
+        # (path, mtime, size) of every entry; abandoned temporary files are
+        # removed on the way
+        entries = []
+        now = time.time()
+        for subdirectory in os.scandir(self.directory):
+            if not subdirectory.is_dir() or len(subdirectory.name) != 2:
+                continue
+            for entry in os.scandir(subdirectory.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if entry.name.startswith(_TEMP_PREFIX):
+                    if now - stat.st_mtime > _STALE_TEMP_SECONDS:
+                        _remove(Path(entry.path))
+                    continue
+                entries.append((Path(entry.path), stat.st_mtime, stat.st_size))
+        return entries
+
+    def _scan(self) -> tuple[list[tuple[Path, float, int]], int]:
+        entries = self._entries()
+        return entries, sum(size for _, _, size in entries)
+
+    def _evict(self) -> None:
+        # caller must hold the lock; evict down to 90% of the limit so the
+        # directory is not scanned on every put
+        entries, total = self._scan()
+        target = self._maxbytes * 9 // 10
+        entries.sort(key=lambda entry: entry[1])
+        for path, _, size in entries:
+            if total <= target:
+                break
+            if _remove(path):
+                self._evictions += 1
+            total -= size
+        self._currbytes = total
+
+
+def _file_mode(directory: Path) -> int:
+    # the permissions open() gives to new files, i.e. 0o666 without the umask;
+    # read from a probe file since os.umask() can only be read by changing it
+    # for the whole process, which would affect the files of other threads
+    probe = directory / f"{_TEMP_PREFIX}{secrets.token_hex(8)}"
+    fd = os.open(probe, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        return os.fstat(fd).st_mode & 0o777
+    finally:
+        os.close(fd)
+        _remove(probe)
+
+
+def _remove(path: Path) -> bool:
+    # another process may have removed it already
+    try:
+        path.unlink()
+    except OSError:
+        return False
+    return True
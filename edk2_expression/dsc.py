@@ -0,0 +1,291 @@
+"""Streaming preprocessor for the conditional directives of DSC files.
+
+:class:`Preprocessor` consumes the lines of a DSC (or FDF) file one at a time,
+e.g. from an open file, and yields a :class:`Line` for each of them, telling
+whether the line is in effect under the ``!if``, ``!ifdef``, ``!ifndef``,
+``!elseif``, ``!else`` and ``!endif`` directives, which may be nested. The
+macros of ``DEFINE`` statements in effect are added to the context as they
+are read, so later conditions can use them.
+
+Nothing is kept but the macros and the stack of open directives, so files of
+any size are processed in constant memory, and the generators compose with
+other iterators::
+
+    with open("Platform.dsc") as file:
+        for line in active_lines(file, {"TARGET": "DEBUG"}):
+            ...
+
+Conditions in branches that are not taken are neither parsed nor evaluated,
+and ``DEFINE`` statements in them are ignored.
+"""
+from __future__ import annotations
+
+import enum
+import re
+import typing
+from dataclasses import dataclass
+
+import edk2_expression
+from edk2_expression.ast.core import Expression, NestMethod
+from edk2_expression.ast.operand import CName, PcdName
+from edk2_expression.error import DirectiveError, Error, ParseError
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping
+
+_COMMENT = re.compile(r'((?:[^#"]|"[^"]*")*)')
+"""Match the text before a ``#`` comment, skipping the ones in strings."""
+
+_DIRECTIVE = re.compile(r"!(\w+)\b\s*(.*)")
+
+_DEFINE = re.compile(r"DEFINE\s+(\w+)\s*=\s*(.*)")
+
+_MACRO_NAME = re.compile(r"(?:\$\((\w+)\)|(\w+))")
+
+_NAME_TYPES = (CName, PcdName)
+"""Nodes that cannot be evaluated, found in values of ``DEFINE`` that are
+text rather than expressions."""
+
+
+class LineKind(str, enum.Enum):
+    Text = "text"
+    """Any other line, including blank lines and comments."""
+
+    Define = "define"
+    If = "if"
+    IfDef = "ifdef"
+    IfNDef = "ifndef"
+    ElseIf = "elseif"
+    Else = "else"
+    EndIf = "endif"
+
+
+_CONDITIONS = frozenset({LineKind.If, LineKind.IfDef, LineKind.IfNDef})
+
+
+@dataclass(frozen=True)
+class Line:
+    """A line of the input with its state under the conditional directives."""
+
+    number: int
+    """The line number, starting from 1."""
+
+    text: str
+    """The line without the line ending."""
+
+    kind: LineKind
+
+    active: bool
+    """For ``!if``, ``!ifdef``, ``!ifndef``, ``!elseif`` and ``!else``, if the
+    branch they open is taken. For other lines, if they are in effect."""
+
+    depth: int
+    """Number of directives enclosing the line. A directive that opens or
+    closes a branch is counted at the depth of the enclosing block."""
+
+    expression: Expression | None = None
+    """The parsed condition of ``!if`` and ``!elseif``, or the parsed value of
+    ``DEFINE``. None if the line was skipped, or if the value of ``DEFINE`` is
+    kept as text, see :meth:`Preprocessor.define`."""
+
+
+class Preprocessor:
+    """Evaluate the conditional directives of DSC files.
+
+    The macros defined by ``DEFINE`` statements are kept in :attr:`context`,
+    so the same instance can process several files sharing their macros,
+    e.g. a DSC file and the files it includes.
+
+    :param context: The initial macro definitions, e.g. from the command
+        line. It is copied.
+    :type context: Mapping[str, object] | None
+    :param nest: How to handle macros defined as expressions in conditions,
+        see :meth:`Expression.evaluate`. Default to ``NestMethod.Evaluate``,
+        since ``DEFINE`` stores the parsed expression.
+    :type nest: NestMethod | str
+    """
+
+    def __init__(
+        self,
+        context: Mapping[str, object] | None = None,
+        nest: NestMethod | str = NestMethod.Evaluate,
+    ) -> None:
+        self.context: dict[str, object] = dict(context or {})
+        """The macros defined so far."""
+        self._nest = NestMethod(nest)
+
+    def process(self, lines: Iterable[str]) -> Iterator[Line]:
+        """Process the lines of a file, lazily.
+
+        :param lines: The lines, e.g. an open file. Line endings are removed.
+        :type lines: Iterable[str]
+        :return: An iterator of the processed lines, one for each input line.
+        :rtype: Iterator[Line]
+        :raises DirectiveError: If the directives are not balanced, or if a
+            condition cannot be parsed or evaluated. It is raised when the
+            offending line is reached, or at the end for a missing ``!endif``.
+        """
+        # one frame per open directive: [enclosing block active, any branch
+        # taken, "!else" seen, line number of the directive]
+        stack: list[list] = []
+        active = True
+
+        for number, text in enumerate(lines, 1):
+            text = text.rstrip("\r\n")
+            code = text.strip()
+            if "#" in code:
+                code = _COMMENT.match(code).group(1).rstrip()
+            depth = len(stack)
+
+            if not code or code[0] != "!" and code[0] != "D":
+                # most lines are neither directives nor DEFINE statements
+                pass
+            elif m := _DIRECTIVE.fullmatch(code):
+                name, argument = m.groups()
+                try:
+                    kind = LineKind(name.lower())
+                except ValueError:
+                    kind = LineKind.Text
+
+                if kind in _CONDITIONS:
+                    expr = None
+                    if not active:
+                        result = False
+                    elif kind is LineKind.If:
+                        expr = self._parse(argument, number)
+                        result = self._evaluate(expr, number)
+                    else:
+                        result = self._defined(argument, number)
+                        if kind is LineKind.IfNDef:
+                            result = not result
+                    stack.append([active, result, False, number])
+                    active = result
+                    yield Line(number, text, kind, result, depth, expr)
+                    continue
+
+                if kind is LineKind.ElseIf or kind is LineKind.Else:
+                    if not stack:
+                        raise DirectiveError(f"!{kind.value} without !if", number)
+                    frame = stack[-1]
+                    parent, taken, seen_else, _ = frame
+                    if seen_else:
+                        raise DirectiveError(f"!{kind.value} after !else", number)
+
+                    expr = None
+                    if kind is LineKind.Else:
+                        frame[2] = True
+                        result = parent and not taken
+                    elif parent and not taken:
+                        expr = self._parse(argument, number)
+                        result = self._evaluate(expr, number)
+                    else:
+                        result = False
+                    frame[1] = taken or result
+                    active = result
+                    yield Line(number, text, kind, result, depth - 1, expr)
+                    continue
+
+                if kind is LineKind.EndIf:
+                    if not stack:
+                        raise DirectiveError("!endif without !if", number)
+                    active = stack.pop()[0]
+                    yield Line(number, text, kind, active, depth - 1)
+                    continue
+
+            elif m := _DEFINE.fullmatch(code):
+                expr = self.define(*m.groups()) if active else None
+                yield Line(number, text, LineKind.Define, active, depth, expr)
+                continue
+
+            yield Line(number, text, LineKind.Text, active, depth)
+
+        if stack:
+            raise DirectiveError("Missing !endif", stack[-1][3])
+
+    def define(self, name: str, value: str) -> Expression | None:
+        """Define a macro as ``DEFINE`` does, e.g. for ``-D`` options.
+
+        :param name: The macro name.
+        :type name: str
+        :param value: The text of the value. It is parsed as an expression,
+            or kept as text if it is not one, or if it contains names that
+            cannot be evaluated, e.g. a path like ``Build/Ovmf`` or a word
+            like ``X64``.
+        :type value: str
+        :return: The parsed value, or None if kept as text.
+        :rtype: Expression | None
+        """
+        try:
+            expr = edk2_expression.parse(value)
+        except ParseError:
+            expr = None
+        else:
+            if any(isinstance(node, _NAME_TYPES) for node in expr.walk()):
+                expr = None
+
+        self.context[name] = value if expr is None else expr
+        return expr
+
+    def _parse(self, text: str, number: int) -> Expression:
+        try:
+            return edk2_expression.parse(text)
+        except ParseError as e:
+            raise DirectiveError(f"Invalid condition '{text}': {e}", number) from e
+
+    def _evaluate(self, expr: Expression, number: int) -> bool:
+        try:
+            return bool(expr.evaluate(self.context, self._nest))
+        except Error as e:
+            raise DirectiveError(
+                f"Failed to evaluate condition '{expr}': {e}", number
+            ) from e
+
+    def _defined(self, text: str, number: int) -> bool:
+        if not (m := _MACRO_NAME.fullmatch(text)):
+            raise DirectiveError(f"Invalid macro name '{text}'", number)
+        return (m.group(1) or m.group(2)) in self.context
+
+
+def preprocess(
+    lines: Iterable[str],
+    context: Mapping[str, object] | None = None,
+    nest: NestMethod | str = NestMethod.Evaluate,
+) -> Iterator[Line]:
+    """Process the lines of a DSC file, lazily. See :class:`Preprocessor`.
+
+    :param lines: The lines, e.g. an open file.
+    :type lines: Iterable[str]
+    :param context: The initial macro definitions.
+    :type context: Mapping[str, object] | None
+    :param nest: How to handle macros defined as expressions.
+    :type nest: NestMethod | str
+    :return: An iterator of the processed lines, one for each input line.
+    :rtype: Iterator[Line]
+    :raises DirectiveError: If the directives are not balanced, or if a
+        condition cannot be parsed or evaluated.
+    """
+    return Preprocessor(context, nest).process(lines)
+
+
+def active_lines(
+    lines: Iterable[str],
+    context: Mapping[str, object] | None = None,
+    nest: NestMethod | str = NestMethod.Evaluate,
+) -> Iterator[Line]:
+    """Yield the lines of a DSC file in effect, other than the directives and
+    ``DEFINE`` statements.
+
+    :param lines: The lines, e.g. an open file.
+    :type lines: Iterable[str]
+    :param context: The initial macro definitions.
+    :type context: Mapping[str, object] | None
+    :param nest: How to handle macros defined as expressions.
+    :type nest: NestMethod | str
+    :return: An iterator of the active text lines.
+    :rtype: Iterator[Line]
+    :raises DirectiveError: If the directives are not balanced, or if a
+        condition cannot be parsed or evaluated.
+    """
+    for line in preprocess(lines, context, nest):
+        if line.active and line.kind is LineKind.Text:
+            yield line
@@ -1,3 +1,11 @@
+from __future__ import annotations
+
+import typing
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Sequence
+
+
 class Error(Exception):
     """Base class for exceptions in this module."""
 
@@ -12,3 +20,39 @@ class NotSupported(Error):
 
 class EvaluationError(Error):
     """Exception raised when expression evaluation failed."""
+
+
+class CircularReference(EvaluationError):
+    """Exception raised when macros are defined in terms of each other.
+
+    :param cycle: The macro names along the cycle, starting and ending with
+        the same name, e.g. ``("FOO", "BAR", "FOO")``.
+    :type cycle: Sequence[str]
+    """
+
+    def __init__(self, cycle: Sequence[str]) -> None:
+        self.cycle = tuple(cycle)
+        super().__init__(f"Circular macro reference: {' -> '.join(self.cycle)}")
+
+    def __reduce__(self):
+        # keep the arguments of __init__, e.g. for errors from worker processes
+        return type(self), (self.cycle,)
+
+
+class DirectiveError(Error):
+    """Exception raised when a conditional directive of a DSC file is invalid
+    or its expression cannot be evaluated.
+
+    :param message: The error message.
+    :type message: str
+    :param line: The line number of the directive, starting from 1.
+    :type line: int
+    """
+
+    def __init__(self, message: str, line: int) -> None:
+        self.message = message
+        self.line = line
+        super().__init__(f"Line {line}: {message}")
+
+    def __reduce__(self):
+        return type(self), (self.message, self.line)
@@ -0,0 +1,227 @@
+"""Incremental re-evaluation of expressions for changing macros.
+
+:class:`IncrementalEvaluator` holds a set of macro definitions and a set of
+registered expressions, e.g. all the ``!if`` conditions of a platform. When a
+macro is changed, only the expressions that depend on it are evaluated again.
+
+A macro whose value is an :class:`Expression`, like a ``DEFINE`` of another
+expression, is followed: changing ``$(BAR)`` re-evaluates the expressions that
+use ``$(FOO)`` when ``FOO`` is defined as ``$(BAR) + 1``.
+"""
+from __future__ import annotations
+
+import types
+import typing
+
+from edk2_expression.ast.core import Expression, NestMethod
+from edk2_expression.codegen import compile_expression
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable, Hashable, Iterable, Mapping
+
+
+class IncrementalEvaluator:
+    """Keep the results of many expressions up to date with the macros.
+
+    An expression that fails to evaluate, e.g. because a macro is not
+    defined, has the raised exception as its result.
+
+    :param context: The initial macro definitions.
+    :type context: Mapping[str, object] | None
+    :param nest: How to handle nested expressions, see
+        :meth:`Expression.evaluate`. Default to ``NestMethod.Evaluate`` so the
+        macros defined as expressions are resolved.
+    :type nest: NestMethod | str
+    """
+
+    def __init__(
+        self,
+        context: Mapping[str, object] | None = None,
+        nest: NestMethod | str = NestMethod.Evaluate,
+    ) -> None:
+        self._nest = NestMethod(nest)
+        self._context: dict[str, object] = {}
+        self._dependents: dict[str, set[str]] = {}
+        self._watchers: dict[str, set[Hashable]] = {}
+        self._expressions: dict[Hashable, Expression] = {}
+        self._functions: dict[Hashable, Callable[[dict[str, object]], object]] = {}
+        self._results: dict[Hashable, object] = {}
+        for name, value in (context or {}).items():
+            self._define(name, value)
+
+    def __len__(self) -> int:
+        return len(self._expressions)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._expressions
+
+    @property
+    def context(self) -> Mapping[str, object]:
+        """A read-only view of the current macro definitions."""
+        return types.MappingProxyType(self._context)
+
+    def register(self, key: Hashable, expr: Expression) -> object:
+        """Register an expression to keep up to date. An expression previously
+        registered with the same key is replaced.
+
+        :param key: The key to identify the expression.
+        :type key: Hashable
+        :param expr: The expression.
+        :type expr: Expression
+        :return: The current result of the expression.
+        :rtype: object
+        """
+        if key in self._expressions:
+            self.unregister(key)
+
+        self._expressions[key] = expr
+        self._functions[key] = compile_expression(expr, self._nest)
+        for name in expr.macros():
+            self._watchers.setdefault(name, set()).add(key)
+
+        result = self._results[key] = self._evaluate(key)
+        return result
+
+    def unregister(self, key: Hashable) -> None:
+        """Remove a registered expression.
+
+        :param key: The key of the expression.
+        :type key: Hashable
+        :raises KeyError: If the key is not registered.
+        """
+        expr = self._expressions.pop(key)
+        del self._functions[key]
+        del self._results[key]
+        for name in expr.macros():
+            watchers = self._watchers[name]
+            watchers.discard(key)
+            if not watchers:
+                del self._watchers[name]
+
+    def result(self, key: Hashable) -> object:
+        """Return the current result of a registered expression.
+
+        :param key: The key of the expression.
+        :type key: Hashable
+        :return: The result, or the exception raised on evaluation.
+        :rtype: object
+        :raises KeyError: If the key is not registered.
+        """
+        return self._results[key]
+
+    def results(self) -> dict[Hashable, object]:
+        """Return the current results of all the registered expressions.
+
+        :rtype: dict[Hashable, object]
+        """
+        return dict(self._results)
+
+    def update(self, name: str, value: object) -> set[Hashable]:
+        """Define or change a macro and re-evaluate the affected expressions.
+
+        :param name: The macro name.
+        :type name: str
+        :param value: The new value. An :class:`Expression` is evaluated
+            according to the nest method when referenced.
+        :type value: object
+        :return: The keys of the expressions whose results changed.
+        :rtype: set[Hashable]
+        """
+        return self.update_many({name: value})
+
+    def update_many(self, values: Mapping[str, object]) -> set[Hashable]:
+        """Define or change several macros at once. Expressions that depend on
+        more than one of them are evaluated only once.
+
+        :param values: The macro names and their new values.
+        :type values: Mapping[str, object]
+        :return: The keys of the expressions whose results changed.
+        :rtype: set[Hashable]
+        """
+        names = []
+        for name, value in values.items():
+            if name in self._context and _same(self._context[name], value):
+                continue
+            self._define(name, value)
+            names.append(name)
+        return self._refresh(names)
+
+    def undefine(self, name: str) -> set[Hashable]:
+        """Remove a macro definition and re-evaluate the affected expressions.
+
+        :param name: The macro name.
+        :type name: str
+        :return: The keys of the expressions whose results changed.
+        :rtype: set[Hashable]
+        """
+        if name not in self._context:
+            return set()
+        self._unlink(name)
+        del self._context[name]
+        return self._refresh([name])
+
+    def affected(self, names: Iterable[str]) -> set[Hashable]:
+        """Return the registered expressions that depend on any of the macros,
+        directly or through other macros defined as expressions.
+
+        :param names: The macro names.
+        :type names: Iterable[str]
+        :return: The keys of the affected expressions.
+        :rtype: set[Hashable]
+        """
+        seen = set(names)
+        pending = list(seen)
+        while pending:
+            for dependent in self._dependents.get(pending.pop(), ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    pending.append(dependent)
+
+        keys = set()
+        for name in seen:
+            keys.update(self._watchers.get(name, ()))
+        return keys
+
+    def _define(self, name: str, value: object) -> None:
+        self._unlink(name)
+        self._context[name] = value
+        if isinstance(value, Expression):
+            for dependency in value.macros():
+                self._dependents.setdefault(dependency, set()).add(name)
+
+    def _unlink(self, name: str) -> None:
+        # remove the edges of the previous value
+        value = self._context.get(name)
+        if isinstance(value, Expression):
+            for dependency in value.macros():
+                dependents = self._dependents[dependency]
+                dependents.discard(name)
+                if not dependents:
+                    del self._dependents[dependency]
+
+    def _refresh(self, names: Iterable[str]) -> set[Hashable]:
+        changed = set()
+        for key in self.affected(names):
+            result = self._evaluate(key)
+            if not _same(self._results[key], result):
+                changed.add(key)
+            self._results[key] = result
+        return changed
+
+    def _evaluate(self, key: Hashable) -> object:
+        try:
+            return self._functions[key](self._context)
+        except Exception as e:
+            return e
+
+
+def _same(a: object, b: object) -> bool:
+    """Check if two results or macro values are the same, without comparing
+    expressions with ``==``, which raises on mismatched constant types."""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, BaseException):
+        return str(a) == str(b)
+    if isinstance(a, Expression):
+        return a is b or repr(a) == repr(b)
+    return a == b
@@ -0,0 +1,169 @@
+"""Hash-consing of expression ASTs.
+
+An :class:`InternTable` maps every structurally identical sub-tree to a single
+shared instance. Parsing a whole workspace produces a lot of identical nodes
+like ``$(TARGET)`` or ``TRUE``; interning them saves memory, and interned nodes
+can be compared by identity instead of walking the trees.
+"""
+from __future__ import annotations
+
+import dataclasses
+import threading
+from dataclasses import dataclass
+
+from edk2_expression.ast.core import Expression
+
+_NODE = object()
+"""Marker for a sub-tree in an intern key, followed by the id of the
+interned sub-tree."""
+
+
+@dataclass(frozen=True)
+class InternInfo:
+    """Statistics of an :class:`InternTable`."""
+
+    hits: int
+    """Number of nodes (or whole sub-trees already in the table) that were
+    resolved to an existing instance."""
+
+    misses: int
+    """Number of nodes added to the table."""
+
+    currsize: int
+    """Number of unique nodes in the table."""
+
+
+class InternTable:
+    """A table of unique expression nodes.
+
+    Two nodes are identical if they are of the same type, have equal values
+    and identical (interned) sub-trees. The key of a node is built from the
+    ids of its interned children, so computing it does not walk the whole
+    sub-tree; :meth:`structural_hash` exposes it as a cheap hash of the tree.
+
+    The table holds a reference to every interned node until :meth:`clear` is
+    called.
+    """
+
+    def __init__(self) -> None:
+        self._nodes: dict[tuple, Expression] = {}
+        self._keys: dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, expr: object) -> bool:
+        """Check if this exact instance is an interned node."""
+        return id(expr) in self._keys
+
+    def intern(self, expr: Expression) -> Expression:
+        """Return the shared instance of the expression.
+
+        Sub-trees are interned first; nodes are only rebuilt when one of
+        their children is replaced by an existing instance.
+
+        :param expr: The expression to intern.
+        :type expr: Expression
+        :return: The interned expression, which is structurally identical to
+            ``expr``.
+        :rtype: Expression
+        """
+        with self._lock:
+            return self._intern(expr)
+
+    def structural_hash(self, expr: Expression) -> int:
+        """Return the hash of an interned expression in constant time.
+
+        :param expr: The interned expression.
+        :type expr: Expression
+        :return: A hash that is equal for structurally identical expressions
+            interned in this table.
+        :rtype: int
+        :raises ValueError: If the expression is not interned in this table.
+        """
+        if (key := self._keys.get(id(expr))) is None:
+            raise ValueError(f"Expression is not interned: {expr}")
+        return hash(key)
+
+    def clear(self) -> None:
+        """Remove all nodes and reset the statistics."""
+        with self._lock:
+            self._nodes.clear()
+            self._keys.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def info(self) -> InternInfo:
+        """Return the statistics of the table.
+
+        :rtype: InternInfo
+        """
+        with self._lock:
+            return InternInfo(
+                hits=self._hits,
+                misses=self._misses,
+                currsize=len(self._nodes),
+            )
+
+    def _intern(self, root: Expression) -> Expression:
+        # caller must hold the lock; walks post-order with an explicit stack
+        interned: dict[int, object] = {}
+        pending = [(root, False)]
+        while pending:
+            node, expanded = pending.pop()
+            if id(node) in interned:
+                continue
+            if id(node) in self._keys:
+                # already interned, including the whole sub-tree
+                interned[id(node)] = node
+                self._hits += 1
+                continue
+
+            if not expanded:
+                pending.append((node, True))
+                pending.extend((child, False) for child in _children(node))
+                continue
+
+            changes = {}
+            key = [type(node)]
+            for field in dataclasses.fields(node):
+                if not field.compare:
+                    continue
+                value = getattr(node, field.name)
+                if _is_node(value):
+                    child = interned[id(value)]
+                    if child is not value:
+                        changes[field.name] = child
+                    key += (_NODE, id(child))
+                else:
+                    key += (type(value), value)
+            key = tuple(key)
+
+            if (canonical := self._nodes.get(key)) is not None:
+                self._hits += 1
+            else:
+                canonical = dataclasses.replace(node, **changes) if changes else node
+                self._nodes[key] = canonical
+                self._keys[id(canonical)] = key
+                self._misses += 1
+            interned[id(node)] = canonical
+
+        return interned[id(root)]
+
+
+def _is_node(value: object) -> bool:
+    # expressions, and value holders like TernaryOp.Decision
+    return isinstance(value, Expression) or (
+        dataclasses.is_dataclass(value) and not isinstance(value, type)
+    )
+
+
+def _children(node: object) -> list[object]:
+    return [
+        value
+        for field in dataclasses.fields(node)
+        if field.compare and _is_node(value := getattr(node, field.name))
+    ]
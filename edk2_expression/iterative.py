@@ -0,0 +1,279 @@
+"""Evaluate expressions without recursion.
+
+:meth:`Expression.evaluate` calls itself for every operand, so an expression
+nested deeper than the Python recursion limit, e.g. a machine-generated chain
+of thousands of ``||``, raises :class:`RecursionError`.
+
+:func:`compile_iterative` flattens the tree once into a postfix program, a
+list of instructions with jumps for the short-circuit of ``&&``, ``||`` and
+``?:``, and returns a function that runs it on a value stack. Neither step
+recurses, so the depth of the expression is only bounded by memory, and the
+program does not pay for a Python frame per node.
+
+The results are the same as :meth:`Expression.evaluate` in all
+:class:`NestMethod` modes. With ``NestMethod.Evaluate``, nested expressions
+are run on the same stack and memoized per call, as :class:`EvaluationSession`
+does, so long chains of ``DEFINE`` do not recurse either.
+"""
+from __future__ import annotations
+
+import typing
+
+import edk2_expression.ast.operand as operand
+import edk2_expression.ast.operator as operator
+from edk2_expression.ast.core import _DEFAULT_NEST_METHOD, Expression, NestMethod
+from edk2_expression.error import CircularReference, EvaluationError
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+
+# opcodes; an instruction is a tuple of (opcode, argument, extra)
+_PUSH = 0  # push the argument
+_MACRO = 1  # push the value of MacroVal node, extra is the nest method
+_BINARY = 2  # pop two values, push node.compare(); extra is set for Ignore
+_AND = 3  # short-circuit: jump to extra if the top value is false
+_OR = 4  # short-circuit: jump to extra if the top value is true
+_BOOLEAN = 5  # end of && or ||: convert the top value to bool
+# the argument of _AND, _OR and _BOOLEAN is the node with NestMethod.Ignore
+_JUMP_IF_FALSE = 6  # pop the condition of ?: and jump to extra if false
+_JUMP = 7  # jump to extra
+_NOT = 8
+_INVERT = 9
+_DEFINED = 10  # push whether the macro in the argument is defined
+_CALL = 11  # push node.evaluate(context, extra)
+
+# actions on the work stack of the assembler
+_VISIT = 0
+_EMIT = 1
+_RESERVE = 2
+_PATCH = 3
+
+_PLAIN_TYPES = frozenset({int, bool, str})
+"""Types of values that are never expressions and can be used as-is."""
+
+_LITERAL_TYPES = frozenset(
+    {operand.Integer, operand.HexNumber, operand.Boolean, operand.String}
+)
+
+_RESOLVING = object()
+"""Marker for a macro whose nested expression is being evaluated."""
+
+
+def compile_iterative(
+    expr: Expression, nest: NestMethod | str = _DEFAULT_NEST_METHOD
+) -> Callable[[Mapping[str, object]], object]:
+    """Flatten the expression into a postfix program and return a function
+    that runs it without recursion.
+
+    :param expr: The expression to compile.
+    :type expr: Expression
+    :param nest: How to handle nested expressions. See
+        :meth:`Expression.evaluate`.
+    :type nest: NestMethod | str
+    :return: A function ``f(context) -> value`` with the same results as
+        :meth:`Expression.evaluate`.
+    :rtype: Callable[[Mapping[str, object]], object]
+    """
+    code = _assemble(expr, NestMethod(nest))
+
+    def evaluate_program(context: Mapping[str, object]) -> object:
+        return _run(code, context)
+
+    return evaluate_program
+
+
+def evaluate_iterative(
+    expr: Expression,
+    context: Mapping[str, object],
+    nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+) -> object:
+    """Evaluate the expression without recursion. To evaluate the same
+    expression repeatedly, use :func:`compile_iterative` to flatten it once.
+
+    :param expr: The expression to evaluate.
+    :type expr: Expression
+    :param context: A dictionary of macro definitions.
+    :type context: Mapping[str, object]
+    :param nest: How to handle nested expressions. See
+        :meth:`Expression.evaluate`.
+    :type nest: NestMethod | str
+    :return: The result of the evaluation, same as :meth:`Expression.evaluate`.
+    :rtype: object
+    :raises EvaluationError: If a macro is not defined, or a nested expression
+        is found with ``NestMethod.Error``.
+    :raises CircularReference: If nested expressions reference each other.
+    :raises NotSupported: If the expression contains a node that cannot be
+        evaluated.
+    """
+    return _run(_assemble(expr, NestMethod(nest)), context)
+
+
+def _assemble(expr: Expression, nest: NestMethod) -> list[tuple]:
+    code = []
+    # the work stack runs in reverse order; a jump reserves its slot and is
+    # patched once the target is known
+    work: list[tuple] = [(_VISIT, expr, nest)]
+    while work:
+        action, node, arg = work.pop()
+
+        if action == _EMIT:
+            code.append(node)
+            continue
+        if action == _RESERVE:
+            node.append(len(code))
+            code.append(None)
+            continue
+        if action == _PATCH:
+            opcode, target = arg
+            code[node[0]] = (opcode, target, len(code))
+            continue
+
+        type_ = type(node)
+        if type_ in _LITERAL_TYPES:
+            code.append((_PUSH, node.value, None))
+        elif type_ is operand.MacroVal:
+            code.append((_MACRO, node, arg))
+        elif isinstance(node, operator.BinaryOp):
+            work.append((_EMIT, (_BINARY, node, arg == NestMethod.Ignore), None))
+            work.append((_VISIT, node.right, arg))
+            work.append((_VISIT, node.left, arg))
+        elif type_ is operator.LogicalAnd or type_ is operator.LogicalOr:
+            # the node is only needed to be returned with NestMethod.Ignore
+            jump = []
+            opcode = _AND if type_ is operator.LogicalAnd else _OR
+            target = node if arg == NestMethod.Ignore else None
+            work.append((_PATCH, jump, (opcode, target)))
+            work.append((_EMIT, (_BOOLEAN, target, None), None))
+            work.append((_VISIT, node.right, arg))
+            work.append((_RESERVE, jump, None))
+            work.append((_VISIT, node.left, arg))
+        elif type_ is operator.TernaryOp:
+            # the condition is always evaluated with the default nest method
+            to_false = []
+            to_end = []
+            work.append((_PATCH, to_end, (_JUMP, None)))
+            work.append((_VISIT, node.decision.false, arg))
+            work.append((_PATCH, to_false, (_JUMP_IF_FALSE, None)))
+            work.append((_RESERVE, to_end, None))
+            work.append((_VISIT, node.decision.true, arg))
+            work.append((_RESERVE, to_false, None))
+            work.append((_VISIT, node.condition, NestMethod(_DEFAULT_NEST_METHOD)))
+        elif type_ is operand.MacroDefined:
+            code.append((_DEFINED, node.macro, None))
+        elif type_ is operator.LogicalNot:
+            work.append((_EMIT, (_NOT, None, None), None))
+            work.append((_VISIT, node.sub, arg))
+        elif type_ is operator.BitwiseNot:
+            work.append((_EMIT, (_INVERT, None, None), None))
+            work.append((_VISIT, node.sub, arg))
+        else:
+            # e.g. Guid, CName or types unknown to this module
+            code.append((_CALL, node, arg))
+    return code
+
+
+def _run(code: list[tuple], context: Mapping[str, object]) -> object:
+    stack: list[object] = []
+    push = stack.append
+    pop = stack.pop
+    plain = _PLAIN_TYPES
+
+    # nested expressions of macros run as separate programs
+    frames: list[tuple[list[tuple], int]] = []
+    memo: dict[str, object] = {}
+    resolving: list[str] = []
+
+    pc = 0
+    end = len(code)
+    while True:
+        if pc == end:
+            if not frames:
+                return stack[-1]
+            memo[resolving.pop()] = stack[-1]
+            code, pc = frames.pop()
+            end = len(code)
+            continue
+
+        opcode, arg, extra = code[pc]
+        pc += 1
+
+        if opcode == _PUSH:
+            push(arg)
+
+        elif opcode == _MACRO:
+            val = context.get(arg.macro)
+            if val.__class__ in plain:
+                push(val)
+            elif val is None:
+                raise EvaluationError(f"Macro '{arg.macro}' is not defined")
+            elif isinstance(val, operand.Constant):
+                push(val.evaluate(context))
+            elif not isinstance(val, Expression):
+                push(val)
+            elif extra == NestMethod.Error:
+                raise EvaluationError(f"Nested expression found in '{arg}': {val}")
+            elif extra == NestMethod.Ignore:
+                push(arg)
+            elif (result := memo.get(arg.macro, memo)) is _RESOLVING:
+                start = resolving.index(arg.macro)
+                raise CircularReference([*resolving[start:], arg.macro])
+            elif result is not memo:
+                push(result)
+            else:
+                memo[arg.macro] = _RESOLVING
+                resolving.append(arg.macro)
+                frames.append((code, pc))
+                code = _assemble(val, NestMethod.Evaluate)
+                pc = 0
+                end = len(code)
+
+        elif opcode == _BINARY:
+            right = pop()
+            left = stack[-1]
+            if isinstance(left, Expression) or isinstance(right, Expression):
+                if not extra:
+                    raise RuntimeError("Unknown error for nested expression")
+                stack[-1] = arg
+            else:
+                stack[-1] = arg.compare(left, right)
+
+        elif opcode == _AND or opcode == _OR:
+            value = stack[-1]
+            if isinstance(value, Expression):
+                if arg is None:
+                    raise RuntimeError("Unknown error for nested expression")
+                stack[-1] = arg
+                pc = extra
+            elif bool(value) == (opcode == _OR):
+                stack[-1] = bool(value)
+                pc = extra
+            else:
+                pop()
+
+        elif opcode == _BOOLEAN:
+            value = stack[-1]
+            if isinstance(value, Expression):
+                if arg is None:
+                    raise RuntimeError("Unknown error for nested expression")
+                stack[-1] = arg
+            else:
+                stack[-1] = bool(value)
+
+        elif opcode == _JUMP_IF_FALSE:
+            if not pop():
+                pc = extra
+
+        elif opcode == _JUMP:
+            pc = extra
+
+        elif opcode == _NOT:
+            stack[-1] = not stack[-1]
+
+        elif opcode == _INVERT:
+            stack[-1] = ~stack[-1]
+
+        elif opcode == _DEFINED:
+            push(arg in context)
+
+        else:
+            push(arg.evaluate(context, extra))
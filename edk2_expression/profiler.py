@@ -0,0 +1,249 @@
+"""Profiling of expression evaluation.
+
+:class:`Profiler` finds which expressions, operators and macros take the time
+when the conditions of a platform are slow to evaluate. While it is enabled,
+the :meth:`Expression.evaluate` method of every node class is replaced by a
+wrapper that records, per node type and per top-level expression, the number of
+calls and the time spent, the number of lookups of each macro by
+:class:`MacroVal`, and the number of times ``&&`` and ``||`` skip their right
+operand. The original methods are restored when it is disabled, so there is no
+cost at all when profiling is off.
+
+Only :meth:`Expression.evaluate` is instrumented: the functions returned by
+:meth:`Expression.compile` and :func:`edk2_expression.codegen.compile_expression`
+are not profiled. Each evaluated node also adds a frame to the Python stack,
+so the deepest expressions that can be evaluated are about half as deep.
+"""
+from __future__ import annotations
+
+import functools
+import time
+import typing
+from collections import Counter
+from dataclasses import dataclass
+
+from edk2_expression.ast.core import _DEFAULT_NEST_METHOD, Expression, NestMethod
+from edk2_expression.ast.operand import MacroVal
+from edk2_expression.ast.operator import LogicalAnd, LogicalOr
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable
+
+_active: Profiler | None = None
+"""The enabled profiler; the wrappers of only one profiler can be installed."""
+
+
+@dataclass
+class NodeStats:
+    """The statistics of a node type or of a top-level expression."""
+
+    calls: int = 0
+    tottime: float = 0.0
+    """Time spent in the node itself, excluding its sub-expressions."""
+    cumtime: float = 0.0
+    """Time spent in the node and its sub-expressions. A node nested in a node
+    of the same type is not counted twice."""
+
+
+class Profiler:
+    """Record the statistics of :meth:`Expression.evaluate` calls.
+
+    The profiler is used as a context manager, or with :meth:`enable` and
+    :meth:`disable`. The statistics accumulate over all the periods it is
+    enabled, until :meth:`clear`. Evaluations must be made from a single
+    thread while the profiler is enabled.
+
+    ::
+
+        with Profiler() as profiler:
+            for expr in conditions:
+                expr.evaluate(context)
+        print(profiler.report())
+    """
+
+    def __init__(self) -> None:
+        self.node_types: dict[str, NodeStats] = {}
+        """The statistics by node type name."""
+        self.macros: Counter[str] = Counter()
+        """The number of lookups by macro name."""
+        self.short_circuits: Counter[str] = Counter()
+        """The number of evaluations of ``LogicalAnd`` and ``LogicalOr`` where
+        the right operand was not evaluated."""
+        self._expressions: dict[int, tuple[Expression, NodeStats]] = {}
+        # [node, number of direct sub-expressions evaluated, time spent in them]
+        self._stack: list[list] = []
+        self._depth: Counter[type] = Counter()
+        self._originals: list[tuple[type, Callable]] = []
+
+    def __enter__(self) -> Profiler:
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.disable()
+
+    @property
+    def enabled(self) -> bool:
+        return _active is self
+
+    def enable(self) -> None:
+        """Install the wrappers of :meth:`Expression.evaluate`.
+
+        :raises RuntimeError: If another profiler is enabled.
+        """
+        global _active
+        if _active is self:
+            return
+        if _active is not None:
+            raise RuntimeError("Another profiler is already enabled")
+
+        pending = [Expression]
+        while pending:
+            cls = pending.pop()
+            pending.extend(cls.__subclasses__())
+            if (evaluate := cls.__dict__.get("evaluate")) is not None:
+                self._originals.append((cls, evaluate))
+                setattr(cls, "evaluate", self._wrap(evaluate))
+        _active = self
+
+    def disable(self) -> None:
+        """Restore the original :meth:`Expression.evaluate` methods."""
+        global _active
+        if _active is not self:
+            return
+        for cls, evaluate in reversed(self._originals):
+            setattr(cls, "evaluate", evaluate)
+        self._originals.clear()
+        self._stack.clear()
+        self._depth.clear()
+        _active = None
+
+    def clear(self) -> None:
+        """Drop all the statistics."""
+        self.node_types.clear()
+        self.macros.clear()
+        self.short_circuits.clear()
+        self._expressions.clear()
+
+    def _wrap(self, evaluate: Callable) -> Callable:
+        stack = self._stack
+        depth = self._depth
+        perf_counter = time.perf_counter
+
+        @functools.wraps(evaluate)
+        def profiled_evaluate(
+            node: Expression,
+            context: dict[str, object],
+            nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+        ) -> object:
+            type_ = type(node)
+            if type_ is MacroVal:
+                self.macros[node.macro] += 1
+            if stack:
+                stack[-1][1] += 1
+            frame = [node, 0, 0.0]
+            stack.append(frame)
+            depth[type_] += 1
+            start = perf_counter()
+            try:
+                result = evaluate(node, context, nest)
+            finally:
+                self._exit(type_, frame, perf_counter() - start)
+            if (type_ is LogicalAnd or type_ is LogicalOr) and frame[1] < 2:
+                # with NestMethod.Ignore, the node itself is returned when the
+                # left operand is a nested expression
+                if result is not node:
+                    self.short_circuits[type_.__name__] += 1
+            return result
+
+        return profiled_evaluate
+
+    def _exit(self, type_: type, frame: list, elapsed: float) -> None:
+        stack = self._stack
+        stack.pop()
+        self._depth[type_] -= 1
+
+        name = type_.__name__
+        if (stats := self.node_types.get(name)) is None:
+            stats = self.node_types[name] = NodeStats()
+        stats.calls += 1
+        stats.tottime += elapsed - frame[2]
+        if not self._depth[type_]:
+            stats.cumtime += elapsed
+
+        if stack:
+            stack[-1][2] += elapsed
+            return
+        node = frame[0]
+        if (entry := self._expressions.get(id(node))) is None:
+            # the expression is kept so its id is not reused
+            entry = self._expressions[id(node)] = (node, NodeStats())
+        entry[1].calls += 1
+        entry[1].tottime += elapsed - frame[2]
+        entry[1].cumtime += elapsed
+
+    def expressions(self) -> list[tuple[Expression, NodeStats]]:
+        """Return the statistics of the top-level expressions, i.e. the ones
+        :meth:`Expression.evaluate` was called on by the caller rather than by
+        another expression.
+
+        :return: The expressions and their statistics, slowest first.
+        :rtype: list[tuple[Expression, NodeStats]]
+        """
+        return sorted(
+            self._expressions.values(), key=lambda item: item[1].cumtime, reverse=True
+        )
+
+    def top_expressions(self, n: int = 10) -> list[tuple[Expression, NodeStats]]:
+        """Return the top-level expressions that took the most time.
+
+        :param n: The maximum number of expressions.
+        :type n: int
+        :return: The expressions and their statistics, slowest first.
+        :rtype: list[tuple[Expression, NodeStats]]
+        """
+        return self.expressions()[:n]
+
+    def node_totals(self) -> list[tuple[str, NodeStats]]:
+        """Return the statistics of the node types, i.e. the totals of each
+        operator and operand.
+
+        :return: The node type names and their statistics, ordered by the time
+            spent in the nodes themselves, highest first.
+        :rtype: list[tuple[str, NodeStats]]
+        """
+        return sorted(
+            self.node_types.items(), key=lambda item: item[1].tottime, reverse=True
+        )
+
+    def report(self, n: int = 10) -> str:
+        """Format the statistics as text.
+
+        :param n: The maximum number of expressions and macros listed.
+        :type n: int
+        :return: The report.
+        :rtype: str
+        """
+        lines = [f"{'calls':>10} {'cumtime':>10}  expression"]
+        for expr, stats in self.top_expressions(n):
+            text = str(expr)
+            if len(text) > 60:
+                text = text[:57] + "..."
+            lines.append(f"{stats.calls:>10} {stats.cumtime:>10.6f}  {text}")
+
+        lines.append("")
+        lines.append(f"{'calls':>10} {'tottime':>10} {'cumtime':>10}  node")
+        for name, stats in self.node_totals():
+            lines.append(
+                f"{stats.calls:>10} {stats.tottime:>10.6f} {stats.cumtime:>10.6f}"
+                f"  {name}"
+            )
+            if name in self.short_circuits:
+                lines[-1] += f" ({self.short_circuits[name]} short-circuited)"
+
+        if self.macros:
+            lines.append("")
+            lines.append(f"{'lookups':>10}  macro")
+            for name, count in self.macros.most_common(n):
+                lines.append(f"{count:>10}  {name}")
+        return "\n".join(lines)
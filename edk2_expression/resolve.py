@@ -0,0 +1,122 @@
+"""Resolve a context of macro definitions into plain values.
+
+:func:`resolve` evaluates every macro whose value is an expression exactly
+once, in dependency order, and returns a context where all values are plain.
+Evaluating against the resolved context needs no ``nest`` handling and every
+macro reference is a dictionary lookup.
+
+Unlike evaluating with ``NestMethod.Evaluate``, which follows the references
+recursively, the order is computed up front without recursion: long chains of
+``DEFINE`` do not hit the Python recursion limit, and circular definitions are
+reported as :class:`CircularReference` before anything is evaluated.
+"""
+from __future__ import annotations
+
+import typing
+
+from edk2_expression.ast.core import Expression
+from edk2_expression.ast.operand import Constant, MacroVal
+from edk2_expression.error import CircularReference, EvaluationError
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Mapping
+
+
+def dependency_graph(context: Mapping[str, object]) -> dict[str, list[str]]:
+    """Build the dependency graph between the macros defined as expressions.
+
+    A macro depends on the macros it references by ``$(NAME)`` which are also
+    defined as expressions. ``DEFINED(NAME)`` does not depend on the value, and
+    plain values and constants need no resolution, so they are not included.
+
+    References are taken from the whole expression, including branches that
+    may be skipped on evaluation, e.g. the false branch of ``TRUE ? 1 : $(X)``.
+
+    :param context: A dictionary of macro definitions.
+    :type context: Mapping[str, object]
+    :return: The macro names defined as expressions, mapped to the names of
+        the macros they depend on, in order of appearance.
+    :rtype: dict[str, list[str]]
+    """
+    graph = {}
+    for name, value in context.items():
+        if isinstance(value, Expression) and not isinstance(value, Constant):
+            graph[name] = None
+
+    for name in graph:
+        references = dict.fromkeys(
+            node.macro for node in context[name].walk() if type(node) is MacroVal
+        )
+        graph[name] = [reference for reference in references if reference in graph]
+    return graph
+
+
+def resolution_order(context: Mapping[str, object]) -> list[str]:
+    """Return the macros defined as expressions in an order where every macro
+    comes after the macros it depends on.
+
+    :param context: A dictionary of macro definitions.
+    :type context: Mapping[str, object]
+    :return: The macro names.
+    :rtype: list[str]
+    :raises CircularReference: If macros depend on each other.
+    """
+    graph = dependency_graph(context)
+
+    # depth-first search with an explicit stack; a dependency that is still
+    # on the path closes a cycle
+    order = []
+    done = set()
+    for root in graph:
+        if root in done:
+            continue
+        path = [root]
+        on_path = {root}
+        pending = [iter(graph[root])]
+        while pending:
+            for dependency in pending[-1]:
+                if dependency in on_path:
+                    start = path.index(dependency)
+                    raise CircularReference([*path[start:], dependency])
+                if dependency not in done:
+                    path.append(dependency)
+                    on_path.add(dependency)
+                    pending.append(iter(graph[dependency]))
+                    break
+            else:
+                pending.pop()
+                name = path.pop()
+                on_path.discard(name)
+                done.add(name)
+                order.append(name)
+    return order
+
+
+def resolve(context: Mapping[str, object]) -> dict[str, object]:
+    """Evaluate all the macros defined as expressions.
+
+    Each expression is evaluated once, after the macros it depends on, so the
+    result is the same as evaluating each macro with ``NestMethod.Evaluate``.
+
+    :param context: A dictionary of macro definitions.
+    :type context: Mapping[str, object]
+    :return: A new dictionary with the same keys, where expressions are
+        replaced by their results and constants by their values.
+    :rtype: dict[str, object]
+    :raises CircularReference: If macros depend on each other.
+    :raises EvaluationError: If the expression of a macro fails to evaluate.
+    """
+    order = resolution_order(context)
+
+    values = {}
+    for name, value in context.items():
+        if isinstance(value, Constant):
+            value = value.evaluate({})
+        values[name] = value
+
+    for name in order:
+        try:
+            values[name] = context[name].evaluate(values)
+        except Exception as e:
+            raise EvaluationError(f"Failed to resolve macro '{name}': {e}") from e
+    return values
@@ -0,0 +1,272 @@
+"""Compact binary encoding of expression ASTs.
+
+:func:`dumps` encodes a forest of expressions into bytes and :func:`loads`
+decodes them, e.g. to ship the parsed expressions of a workspace to worker
+processes or to keep them for the next build. The same is available for a
+single expression as :meth:`Expression.to_bytes` and
+:meth:`Expression.from_bytes`.
+
+The layout is::
+
+    magic      b"E2X"
+    version    1 byte
+    strings    varint count, then each as varint length + UTF-8 bytes
+    roots      varint count
+    nodes      varint length in bytes, then the nodes of all roots in postfix
+               order
+
+Each node is a one-byte opcode followed by its payload: a zigzag varint for
+integers, 16 bytes for GUIDs, or a varint index into the string table for
+macro names, strings and other names. Operators have no payload and take
+their operands from the previously decoded nodes. Strings are shared by all
+the expressions in the forest, and neither encoding nor decoding recurses, so
+the depth of the expressions is not limited.
+"""
+from __future__ import annotations
+
+import typing
+
+import edk2_expression.ast.operand as operand
+import edk2_expression.ast.operator as operator
+from edk2_expression.error import NotSupported
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from edk2_expression.ast.core import Expression
+
+MAGIC = b"E2X"
+VERSION = 1
+
+# opcodes of version 1; append new types only, or bump the version
+_INTEGER = 0
+_HEX_NUMBER = 1
+_FALSE = 2
+_TRUE = 3
+_STRING = 4
+_GUID = 5
+_MACRO_VAL = 6
+_MACRO_DEFINED = 7
+_CNAME = 8
+_PCD_NAME = 9
+_ARRAY = 10
+_LOGICAL_NOT = 11
+_BITWISE_NOT = 12
+_TERNARY = 13
+_BINARY_BASE = 14
+
+_BINARY_TYPES: tuple[type, ...] = (
+    operator.Multiplication,
+    operator.Division,
+    operator.Modulo,
+    operator.Addition,
+    operator.Subtraction,
+    operator.BitwiseLeftShift,
+    operator.BitwiseRightShift,
+    operator.LessThan,
+    operator.LessEqual,
+    operator.GreaterThan,
+    operator.GreaterEqual,
+    operator.Equal,
+    operator.NotEqual,
+    operator.BitwiseAnd,
+    operator.BitwiseXor,
+    operator.BitwiseOr,
+    operator.LogicalXor,
+    operator.LogicalAnd,
+    operator.LogicalOr,
+)
+
+_NAME_OPCODES: dict[type, tuple[int, str]] = {
+    # type: (opcode, attribute in the string table)
+    operand.String: (_STRING, "value"),
+    operand.MacroVal: (_MACRO_VAL, "macro"),
+    operand.MacroDefined: (_MACRO_DEFINED, "macro"),
+    operand.CName: (_CNAME, "name"),
+    operand.PcdName: (_PCD_NAME, "name"),
+    operand.Array: (_ARRAY, "raw"),
+}
+
+_NAME_TYPES: dict[int, type] = {
+    opcode: type_ for type_, (opcode, _) in _NAME_OPCODES.items()
+}
+
+_BINARY_OPCODES: dict[type, int] = {
+    type_: _BINARY_BASE + index for index, type_ in enumerate(_BINARY_TYPES)
+}
+
+
+def dumps(exprs: Iterable[Expression]) -> bytes:
+    """Encode expressions into bytes.
+
+    :param exprs: The expressions.
+    :type exprs: Iterable[Expression]
+    :return: The encoded expressions, sharing one string table.
+    :rtype: bytes
+    :raises NotSupported: If an expression contains a node type that has no
+        encoding.
+    """
+    roots = list(exprs)
+    strings: dict[str, int] = {}
+    chunks: list[bytes] = []
+
+    # the nodes are visited parent first with the operands in reverse, which
+    # is the postfix order reversed
+    for root in reversed(roots):
+        pending = [root]
+        while pending:
+            node = pending.pop()
+            type_ = type(node)
+
+            if (opcode := _BINARY_OPCODES.get(type_)) is not None:
+                chunks.append(bytes((opcode,)))
+                pending.append(node.left)
+                pending.append(node.right)
+            elif (entry := _NAME_OPCODES.get(type_)) is not None:
+                opcode, attribute = entry
+                text = getattr(node, attribute)
+                if (index := strings.get(text)) is None:
+                    index = strings[text] = len(strings)
+                chunks.append(bytes((opcode,)) + _varint(index))
+            elif type_ is operand.Integer or type_ is operand.HexNumber:
+                opcode = _INTEGER if type_ is operand.Integer else _HEX_NUMBER
+                chunks.append(bytes((opcode,)) + _varint(_zigzag(node.value)))
+            elif type_ is operand.Boolean:
+                chunks.append(bytes((_TRUE if node.value else _FALSE,)))
+            elif type_ is operator.TernaryOp:
+                chunks.append(bytes((_TERNARY,)))
+                pending.append(node.condition)
+                pending.append(node.decision.true)
+                pending.append(node.decision.false)
+            elif type_ is operator.LogicalNot or type_ is operator.BitwiseNot:
+                opcode = _LOGICAL_NOT if type_ is operator.LogicalNot else _BITWISE_NOT
+                chunks.append(bytes((opcode,)))
+                pending.append(node.sub)
+            elif type_ is operand.Guid:
+                chunks.append(bytes((_GUID,)) + node.value)
+            else:
+                raise NotSupported(
+                    f"Serialization not supported for {type_.__name__}: {node}"
+                )
+
+    header = [MAGIC, bytes((VERSION,)), _varint(len(strings))]
+    for text in strings:
+        data = text.encode()
+        header.append(_varint(len(data)))
+        header.append(data)
+    header.append(_varint(len(roots)))
+
+    chunks.reverse()
+    nodes = b"".join(chunks)
+    header.append(_varint(len(nodes)))
+    return b"".join(header) + nodes
+
+
+def loads(data: bytes) -> list[Expression]:
+    """Decode expressions encoded by :func:`dumps`.
+
+    :param data: The encoded expressions.
+    :type data: bytes
+    :return: The expressions, in the same order as they were encoded.
+    :rtype: list[Expression]
+    :raises ValueError: If the data is not in this format, or is of another
+        format version, truncated or corrupted.
+    """
+    data = memoryview(data)
+    if len(data) < 4 or bytes(data[:3]) != MAGIC:
+        raise ValueError("Not an encoded expression")
+    if data[3] != VERSION:
+        raise ValueError(f"Unsupported format version {data[3]}, expected {VERSION}")
+
+    try:
+        position = 4
+        count, position = _read_varint(data, position)
+        strings = []
+        for _ in range(count):
+            length, position = _read_varint(data, position)
+            end = position + length
+            if end > len(data):
+                raise IndexError
+            strings.append(str(data[position:end], "utf-8"))
+            position = end
+        roots, position = _read_varint(data, position)
+        length, position = _read_varint(data, position)
+        end = position + length
+        if end != len(data):
+            raise IndexError
+
+        stack: list[Expression] = []
+        push = stack.append
+        pop = stack.pop
+        while position < end:
+            opcode = data[position]
+            position += 1
+
+            if opcode >= _BINARY_BASE:
+                right = pop()
+                left = pop()
+                push(_BINARY_TYPES[opcode - _BINARY_BASE](left, right))
+            elif (type_ := _NAME_TYPES.get(opcode)) is not None:
+                index, position = _read_varint(data, position)
+                push(type_(strings[index]))
+            elif opcode == _INTEGER or opcode == _HEX_NUMBER:
+                value, position = _read_varint(data, position)
+                value = (value >> 1) ^ -(value & 1)
+                type_ = operand.Integer if opcode == _INTEGER else operand.HexNumber
+                push(type_(value))
+            elif opcode == _TRUE or opcode == _FALSE:
+                push(operand.Boolean(opcode == _TRUE))
+            elif opcode == _TERNARY:
+                false = pop()
+                true = pop()
+                condition = pop()
+                decision = operator.TernaryOp.Decision(true, false)
+                push(operator.TernaryOp(condition, decision))
+            elif opcode == _LOGICAL_NOT:
+                push(operator.LogicalNot(pop()))
+            elif opcode == _BITWISE_NOT:
+                push(operator.BitwiseNot(pop()))
+            elif opcode == _GUID:
+                if position + 16 > end:
+                    raise IndexError
+                push(operand.Guid(bytes(data[position : position + 16])))
+                position += 16
+            else:
+                raise ValueError(f"Unknown opcode {opcode} at offset {position - 1}")
+    except IndexError:
+        raise ValueError("Truncated or corrupted data") from None
+
+    if len(stack) != roots:
+        raise ValueError(f"Expected {roots} expressions, decoded {len(stack)}")
+    return stack
+
+
+def _zigzag(value: int) -> int:
+    # map signed to unsigned: 0, -1, 1, -2, ... to 0, 1, 2, 3, ...
+    return value << 1 if value >= 0 else (~value << 1) | 1
+
+
+def _varint(value: int) -> bytes:
+    if value < 0x80:
+        return bytes((value,))
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _read_varint(data: memoryview, position: int) -> tuple[int, int]:
+    byte = data[position]
+    if byte < 0x80:
+        return byte, position + 1
+    value = byte & 0x7F
+    shift = 7
+    while True:
+        position += 1
+        byte = data[position]
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position + 1
+        shift += 7
@@ -0,0 +1,239 @@
+"""Fast tokenizer for the parse path.
+
+:class:`Edk2ExpressionTokenizer` produces exactly the same token stream as
+:class:`edk2_expression.lex.Edk2ExpressionLexer`, but it does not go through
+the Pygments ``RegexLexer`` machinery: the rules of each state are combined into
+one master regex, so a token costs a single regex match instead of one attempt
+per rule.
+
+The rules here MUST be kept in sync with :mod:`edk2_expression.lex`.
+"""
+from __future__ import annotations
+
+import re
+import typing
+
+from pygments.token import (
+    Comment,
+    Error,
+    Keyword,
+    Name,
+    Number,
+    Operator,
+    Punctuation,
+    String,
+    Whitespace,
+    _TokenType,
+)
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+CCHAR = r'(?:[\x21\x23-\x26\x28-\x5b\x5d-\x7e\x20\x09]|\\[ntfrb0\\"\'])'
+CName = r"[a-zA-Z_][a-zA-Z0-9_]*"
+
+WHITESPACE = [
+    (r"[\x20\x09]+", Whitespace, None),
+]
+
+CONSTANTS = [
+    (  # QuotedString
+        rf'(L?")({CCHAR}*)(")',
+        (Punctuation, String, Punctuation),
+        None,
+    ),
+    (  # <SglQuotedString>
+        rf"(L?')({CCHAR}*)(')",
+        (Punctuation, String, Punctuation),
+        None,
+    ),
+    (  # <TrueFalse>
+        r"\b(?:TRUE|True|true|FALSE|False|false)\b",
+        Keyword.Constant,
+        None,
+    ),
+    (r"\b0[xX][a-fA-F0-9]{2,8}\b", Number.Hex, None),  # <HexNumber>
+    (r"\b\d+\b", Number.Integer, None),  # <Integer>
+]
+
+RULES = {
+    "root": [
+        *WHITESPACE,
+        (r"\n", Whitespace, ("#pop",)),
+        (r"#.*", Comment.Single, None),
+        (r"\{", Punctuation, ("array",)),
+        (r"\(", Punctuation, ("#push",)),
+        (r"\)", Punctuation, ("#pop",)),
+        (
+            # NOTE "XORxor" is a single word in the Pygments lexer due to a
+            # missing comma; it is kept here for an identical token stream
+            r"\b(?:EQ|NE|LT|GT|LE|GE|AND|and|XORxor|OR|or|NOT|not)\b",
+            Operator,
+            None,
+        ),
+        (r"!=|&&|<<|<=|==|>>|>=|\|\||[-+*/%<>|^&!~?:]", Operator, None),
+        (rf"\b{CName}\.{CName}\b", Name.Entity, None),  # <PcdName>
+        (  # <RformatGuid>
+            r"\b[a-fA-F0-9]{8}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12}\b",
+            Name.Entity,
+            None,
+        ),
+        *CONSTANTS,
+        (  # <MACROVAL>
+            r"(\$\()([A-Z][A-Z0-9_]*)(\))",
+            (Keyword.Declaration, Name.Variable, Keyword.Declaration),
+            None,
+        ),
+        (rf"\b{CName}\b", Name.Variable, None),  # <CName>
+    ],
+    "array": [
+        (r"\{", Punctuation, ("#push",)),
+        (r"[})]", Punctuation, ("#pop",)),
+        *WHITESPACE,
+        (r",", Punctuation, None),
+        (  # <UintMac>
+            r"\b(UINT(?:8|16|32|64))(\()(\d+)(\))",
+            (Keyword.Type, Punctuation, Number.Integer, Punctuation),
+            None,
+        ),
+        (  # <Label> & <Offset>
+            rf"\b(LABEL|OFFSET_OF)(\()({CName})(\))",
+            (Keyword.Type, Punctuation, Name.Variable, Punctuation),
+            None,
+        ),
+        (  # <DevicePath>
+            r'\b(DEVICE_PATH)(\(")([.]+?)("\))',
+            (Keyword.Type, Punctuation, String, Punctuation),
+            None,
+        ),
+        (  # <GuidStr> that uses <RformatGuid>
+            r'\b(GUID)(\(")([a-fA-F0-9-]{36})("\))',
+            (Keyword.Type, Punctuation, Name.Entity, Punctuation),
+            None,
+        ),
+        (  # <GuidStr> that uses <CformatGuid>
+            r"\b(GUID)(\()(\{)",
+            (Keyword.Type, Punctuation, Punctuation),
+            ("#push", "#push"),
+        ),
+        (  # <GuidStr> that uses <CName>
+            rf"\b(GUID)(\()({CName})(\))",
+            (Keyword.Type, Punctuation, Name.Variable, Punctuation),
+            None,
+        ),
+        *CONSTANTS,
+    ],
+    "constants": CONSTANTS,
+    "whitespace": WHITESPACE,
+}
+
+
+class _State(typing.NamedTuple):
+    match: typing.Callable[[str, int], re.Match | None]
+    actions: dict[int, tuple[_TokenType | None, tuple, tuple[str, ...] | None]]
+
+
+def _compile_state(
+    rules: list[tuple[str, _TokenType | tuple[_TokenType, ...], tuple | None]]
+) -> _State:
+    """Combine the rules into one master regex. The alternatives are tried
+    in order, which matches the first-rule-wins behavior of ``RegexLexer``."""
+    # each alternative is a named group, so the group numbers of all the rules
+    # are known from a single compilation of the master regex
+    pattern = "|".join(f"(?P<_{index}>{rule[0]})" for index, rule in enumerate(rules))
+    regex = re.compile(pattern, re.MULTILINE)
+    starts = [regex.groupindex[f"_{index}"] for index in range(len(rules))]
+    starts.append(regex.groups + 1)
+
+    actions = {}
+    for index, (_, action, new_state) in enumerate(rules):
+        group = starts[index]
+        if isinstance(action, _TokenType):
+            actions[group] = (action, (), new_state)
+        else:
+            actions[group] = (
+                None,
+                tuple(zip(range(group + 1, starts[index + 1]), action)),
+                new_state,
+            )
+    return _State(regex.match, actions)
+
+
+_STATES: dict[str, _State] = {}
+"""The compiled states, filled on the first call of the tokenizer so the
+regexes are not compiled on import."""
+
+
+def _compile_states() -> dict[str, _State]:
+    if not _STATES:
+        _STATES.update((name, _compile_state(rules)) for name, rules in RULES.items())
+    return _STATES
+
+
+class Edk2ExpressionTokenizer:
+    """Tokenizer that emits the same ``(position, token_type, token_text)``
+    stream as ``Edk2ExpressionLexer.get_tokens_unprocessed``."""
+
+    def get_tokens_unprocessed(
+        self, text: str, stack: Sequence[str] = ("root",)
+    ) -> Iterator[tuple[int, _TokenType, str]]:
+        """Split ``text`` into tokens.
+
+        :param text: The text to tokenize.
+        :type text: str
+        :param stack: The initial state stack.
+        :type stack: Sequence[str]
+        :return: An iterator of ``(position, token_type, token_text)``.
+        :rtype: Iterator[tuple[int, Token, str]]
+        """
+        states = _STATES or _compile_states()
+        statestack = list(stack)
+        match, actions = states[statestack[-1]]
+
+        pos = 0
+        end = len(text)
+        while pos < end:
+            m = match(text, pos)
+
+            # no rule matched
+            if m is None:
+                if text[pos] == "\n":
+                    # at EOL, reset state to "root"
+                    statestack = ["root"]
+                    match, actions = states["root"]
+                    yield pos, Whitespace, "\n"
+                else:
+                    yield pos, Error, text[pos]
+                pos += 1
+                continue
+
+            action, groups, new_state = actions[m.lastindex]
+            if action is not None:
+                yield pos, action, m.group()
+            else:
+                for index, token_type in groups:
+                    if data := m.group(index):
+                        yield m.start(index), token_type, data
+            pos = m.end()
+
+            if new_state is not None:
+                for state in new_state:
+                    if state == "#pop":
+                        if len(statestack) > 1:
+                            statestack.pop()
+                    elif state == "#push":
+                        statestack.append(statestack[-1])
+                    else:
+                        statestack.append(state)
+                match, actions = states[statestack[-1]]
+
+
+def tokenize(text: str) -> list[tuple[int, _TokenType, str]]:
+    """Tokenize the expression text with :class:`Edk2ExpressionTokenizer`.
+
+    :param text: The expression text.
+    :type text: str
+    :return: A list of ``(position, token_type, token_text)``.
+    :rtype: list[tuple[int, Token, str]]
+    """
+    return list(Edk2ExpressionTokenizer().get_tokens_unprocessed(text))
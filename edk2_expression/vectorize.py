@@ -0,0 +1,268 @@
+"""Columnar evaluation with NumPy.
+
+:func:`evaluate_columns` evaluates one expression for many configurations at
+once. Each macro is given as a column, an array with one value per
+configuration, and every operator is applied to whole arrays, so the cost is a
+handful of vectorized operations instead of a Python loop over contexts.
+
+NumPy is an optional dependency; it is imported on the first call and
+:class:`ImportError` is raised when it is not installed.
+
+The results follow :meth:`Expression.evaluate` with a few differences inherent
+to arrays:
+
+* Integers are stored as NumPy integers, so values beyond 64 bits overflow.
+* Division or modulo by zero yields NumPy's ``inf``/``nan``/``0`` instead of
+  raising :class:`ZeroDivisionError`, since rows not selected by a ternary
+  operator are computed too.
+* ``&&``, ``||`` and ``?:`` are only short-circuited when their condition is
+  the same for all configurations.
+"""
+from __future__ import annotations
+
+import operator
+import typing
+
+import edk2_expression.ast.operand as operand
+import edk2_expression.ast.operator as op
+from edk2_expression.ast.core import (
+    _DEFAULT_NEST_METHOD,
+    _RESOLVING,
+    Expression,
+    NestMethod,
+)
+from edk2_expression.error import CircularReference, EvaluationError, NotSupported
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+
+    import numpy
+
+_ARITHMETIC_OPERATORS: frozenset[type] = frozenset(
+    {
+        op.Multiplication,
+        op.Division,
+        op.Modulo,
+        op.Addition,
+        op.Subtraction,
+        op.BitwiseLeftShift,
+        op.BitwiseRightShift,
+    }
+)
+"""Operators that treat booleans as integers, as ``True + True == 2`` does."""
+
+_BINARY_OPERATORS: dict[type, Callable[[object, object], object]] = {
+    op.Multiplication: operator.mul,
+    op.Division: operator.truediv,
+    op.Modulo: operator.mod,
+    op.Addition: operator.add,
+    op.Subtraction: operator.sub,
+    op.BitwiseLeftShift: operator.lshift,
+    op.BitwiseRightShift: operator.rshift,
+    op.BitwiseAnd: operator.and_,
+    op.BitwiseXor: operator.xor,
+    op.BitwiseOr: operator.or_,
+    op.LessThan: operator.lt,
+    op.LessEqual: operator.le,
+    op.GreaterThan: operator.gt,
+    op.GreaterEqual: operator.ge,
+    op.Equal: operator.eq,
+    op.NotEqual: operator.ne,
+}
+
+
+def evaluate_columns(
+    expr: Expression,
+    columns: Mapping[str, object],
+    nest: NestMethod | str = _DEFAULT_NEST_METHOD,
+) -> numpy.ndarray:
+    """Evaluate the expression for all configurations given as columns.
+
+    :param expr: The expression to evaluate.
+    :type expr: Expression
+    :param columns: A mapping of macro names to their values. A value is
+        either a sequence/array with one item per configuration, or a scalar
+        shared by all configurations. All the sequences must have the same
+        length.
+    :type columns: Mapping[str, object]
+    :param nest: How to handle a macro whose value is an expression, see
+        :meth:`Expression.evaluate`. With ``NestMethod.Evaluate``, the nested
+        expression is evaluated on the same columns. ``NestMethod.Ignore`` is
+        not supported since it has no per-configuration result.
+    :type nest: NestMethod | str
+    :return: An array with one result per configuration, or a zero-dimensional
+        array if none of the columns is a sequence.
+    :rtype: numpy.ndarray
+    :raises ImportError: If NumPy is not installed.
+    :raises EvaluationError: If a macro is not defined, or a nested expression
+        is found with ``NestMethod.Error``.
+    :raises CircularReference: If nested expressions reference each other.
+    :raises NotSupported: If the expression contains a node that cannot be
+        evaluated, or ``nest`` is ``NestMethod.Ignore``.
+    """
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError(
+            "NumPy is required for columnar evaluation; install it with "
+            "`pip install numpy`"
+        ) from e
+
+    nest = NestMethod(nest)
+    if nest == NestMethod.Ignore:
+        raise NotSupported("Columnar evaluation not supported for nest method 'ignore'")
+
+    arrays = {}
+    shape = ()
+    for name, value in columns.items():
+        if isinstance(value, (list, tuple, numpy.ndarray)):
+            value = numpy.asarray(value)
+            if shape and value.shape != shape:
+                raise ValueError(
+                    f"Column '{name}' has shape {value.shape}, expected {shape}"
+                )
+            shape = value.shape
+        arrays[name] = value
+
+    result = _Evaluator(numpy, arrays, nest).visit(expr)
+    return numpy.broadcast_to(numpy.asarray(result), shape)
+
+
+class _Evaluator:
+    def __init__(
+        self, numpy: typing.Any, columns: dict[str, object], nest: NestMethod
+    ) -> None:
+        self.np = numpy
+        self.columns = columns
+        self.nest = nest
+        self.nested: dict[str, object] = {}
+        self.resolving: list[str] = []
+
+    def visit(self, expr: Expression, nest: NestMethod | None = None) -> object:
+        nest = nest or self.nest
+        type_ = type(expr)
+
+        if isinstance(expr, operand.Constant):
+            return expr.evaluate({})
+
+        if type_ is operand.MacroVal:
+            return self.visit_macro(expr, nest)
+
+        if type_ is operand.MacroDefined:
+            return expr.macro in self.columns
+
+        if type_ is op.LogicalNot:
+            return ~self.truth(self.visit(expr.sub, nest))
+
+        if type_ is op.BitwiseNot:
+            # same as ~True == -2 in Python
+            value = self.integer(self.visit(expr.sub, nest))
+            return self.apply(operator.invert, value)
+
+        if type_ in _BINARY_OPERATORS:
+            left = self.visit(expr.left, nest)
+            right = self.visit(expr.right, nest)
+            if type_ in _ARITHMETIC_OPERATORS:
+                left = self.integer(left)
+                right = self.integer(right)
+            with self.np.errstate(divide="ignore", invalid="ignore"):
+                return self.apply(_BINARY_OPERATORS[type_], left, right)
+
+        if type_ is op.LogicalXor:
+            left = self.truth(self.visit(expr.left, nest))
+            right = self.truth(self.visit(expr.right, nest))
+            return left != right
+
+        if type_ is op.LogicalAnd or type_ is op.LogicalOr:
+            left = self.truth(self.visit(expr.left, nest))
+            # short-circuit when the left hand side decides all configurations
+            if type_ is op.LogicalAnd and not left.any():
+                return left
+            if type_ is op.LogicalOr and left.all():
+                return left
+            right = self.truth(self.visit(expr.right, nest))
+            return left & right if type_ is op.LogicalAnd else left | right
+
+        if type_ is op.TernaryOp:
+            # the condition is always evaluated with the default nest method
+            condition = self.truth(
+                self.visit(expr.condition, NestMethod(_DEFAULT_NEST_METHOD))
+            )
+            if condition.all():
+                return self.visit(expr.decision.true, nest)
+            if not condition.any():
+                return self.visit(expr.decision.false, nest)
+            true = self.np.asarray(self.visit(expr.decision.true, nest))
+            false = self.np.asarray(self.visit(expr.decision.false, nest))
+            if _kind(true) != _kind(false):
+                # keep strings, numbers and booleans apart instead of promoting
+                # them to a common type
+                true = true.astype(object)
+                false = false.astype(object)
+            return self.apply(self.np.where, condition, true, false)
+
+        raise NotSupported(
+            f"Columnar evaluation not supported for {type_.__name__}: {expr}"
+        )
+
+    def visit_macro(self, expr: operand.MacroVal, nest: NestMethod) -> object:
+        # same as MacroVal.evaluate(), on the whole column
+        val = self.columns.get(expr.macro)
+        if val is None:
+            raise EvaluationError(f"Macro '{expr.macro}' is not defined")
+        if isinstance(val, operand.Constant):
+            return val.evaluate({})
+        if isinstance(val, Expression):
+            if nest == NestMethod.Error:
+                raise EvaluationError(f"Nested expression found in '{expr}': {val}")
+            # evaluate each nested expression once, and detect cycles, as
+            # EvaluationSession does
+            result = self.nested.get(expr.macro)
+            if result is _RESOLVING:
+                start = self.resolving.index(expr.macro)
+                raise CircularReference([*self.resolving[start:], expr.macro])
+            if result is None:
+                self.nested[expr.macro] = _RESOLVING
+                self.resolving.append(expr.macro)
+                try:
+                    result = self.visit(val, nest)
+                except BaseException:
+                    del self.nested[expr.macro]
+                    raise
+                finally:
+                    self.resolving.pop()
+                self.nested[expr.macro] = result
+            return result
+        return val
+
+    def truth(self, value: object) -> numpy.ndarray:
+        """Return ``bool(value)`` of each item as a boolean array."""
+        value = self.np.asarray(value)
+        if value.dtype.kind in "US":
+            return self.np.char.str_len(value) > 0
+        return value.astype(bool)
+
+    def integer(self, value: object) -> object:
+        """Convert boolean arrays and NumPy booleans to integers."""
+        if (
+            isinstance(value, (self.np.ndarray, self.np.bool_))
+            and value.dtype.kind == "b"
+        ):
+            return value.astype(int)
+        return value
+
+    def apply(self, func: Callable, *args: object) -> object:
+        """Call the NumPy operation; when NumPy has no implementation for the
+        dtypes, e.g. multiplying a string array, retry on object arrays so the
+        Python operator is applied to each item."""
+        try:
+            return func(*args)
+        except TypeError:
+            return func(*(self.np.asarray(arg, dtype=object) for arg in args))
+
+
+def _kind(array: numpy.ndarray) -> str:
+    # the Python type of the items: "str", "bool" or "int"
+    if array.dtype.kind in "US":
+        return "str"
+    return "bool" if array.dtype.kind == "b" else "int"
@@ -3,10 +3,10 @@
 import argparse
 import enum
 import logging
-import re
 
-import edk2_expression
+import edk2_expression.dsc
 import edk2_expression.error
+from edk2_expression.dsc import LineKind
 
 logger = logging.getLogger("dsc-parser")
 
@@ -32,60 +32,24 @@ def main():
         format="[%(levelname)s] %(message)s",
     )
 
-    with open(args.file) as fd:
-        file_content = fd.read()
-
-    context = {}
-    criteria = []
-    for line in file_content.splitlines():
-        # exclude comment and whitespaces
-        clean_line = line.rsplit("#", 1)[0]
-        clean_line = clean_line.strip()
-
-        if not clean_line:
-            continue
-
-        # parse
-        if m := re.fullmatch(r"DEFINE +(\w+) *= *(.+)", clean_line):
-            name, raw_expr = m.groups()
-            expr = edk2_expression.parse(raw_expr)
-            logger.debug(f"Parse {name} = {expr!r}")
-
-            if not criteria or criteria[-1]:
-                context[name] = expr
-                prefix = Format.Valid
-            else:
-                prefix = Format.Invalid
-            print(f"{prefix}{line}{Format.Reset}")
-
-        elif m := re.fullmatch(r"!(?:else)?if (.+)", clean_line):
-            raw_expr = m.group(1)
-            expr = edk2_expression.parse(raw_expr)
+    preprocessor = edk2_expression.dsc.Preprocessor()
 
-            if any(criteria):
-                logger.debug(f"Stop evaluate !if {expr!r}")
-                result = False
-            else:
-                result = bool(expr.evaluate(context, "evaluate"))
-                logger.debug(f"Evaluate !if {expr!r} = {result}")
-
-            criteria.append(result)
-            prefix = Format.Valid if result else Format.Invalid
-            print(f"{prefix}{line}{Format.Reset}")
-
-        elif re.fullmatch(r"!else", clean_line):
-            result = not any(criteria)
-            criteria.append(result)
-
-            prefix = Format.Valid if result else Format.Invalid
-            print(f"{prefix}{line}{Format.Reset}")
-
-        elif re.fullmatch(r"!endif", clean_line):
-            print(f"{Format.Valid}{line}{Format.Reset}")
-            criteria = []
-
-        else:
-            print(f"{Format.NotRelated}{line}{Format.Reset}")
+    with open(args.file) as fd:
+        try:
+            for line in preprocessor.process(fd):
+                if line.expression is not None:
+                    logger.debug(f"{line.kind.value} {line.expression!r}")
+
+                if line.kind is LineKind.Text:
+                    prefix = Format.NotRelated
+                elif line.active:
+                    prefix = Format.Valid
+                else:
+                    prefix = Format.Invalid
+                print(f"{prefix}{line.text}{Format.Reset}")
+        except edk2_expression.error.DirectiveError as e:
+            logger.error(e)
+            return 1
 
 
 if __name__ == "__main__":
@@ -1,10 +1,18 @@
+import dataclasses
 from unittest import TestCase
 
 from pygments.token import Token
 
-from edk2_expression.ast import parse
-from edk2_expression.error import ParseError
+from edk2_expression.ast import NestMethod, TokenStream, optimize, parse
+from edk2_expression.ast.operand import MacroDefined
+from edk2_expression.ast.operator import LogicalOr
+from edk2_expression.error import CircularReference, EvaluationError, ParseError
 from edk2_expression.lex import Edk2ExpressionLexer
+from tests.util import result
+
+
+def parse_text(text: str):
+    return parse(list(Edk2ExpressionLexer().get_tokens_unprocessed(text)))
 
 
 class TestParseExpression(TestCase):
@@ -19,6 +27,29 @@ class TestParseExpression(TestCase):
         self.assertEqual(str(tree), "$(FOO)")
         self.assertEqual(tree.evaluate({"FOO": 16}), 16)
 
+    def test_token_stream(self):
+        tokens = self.lex("$(FOO) + 1")
+        stream = TokenStream(tokens)
+        tree = parse(stream)
+        self.assertEqual(str(tree), "($(FOO) + 1)")
+        self.assertFalse(stream)
+        self.assertEqual(len(tokens), 7)
+
+    def test_slots(self):
+        tree = parse(self.lex('$(FOO) ? !1 + 0x10 : "str" == $(BAR) && TRUE'))
+        nodes = [*tree.walk(), tree.decision]
+        for node in nodes:
+            with self.subTest(node=node):
+                self.assertFalse(hasattr(node, "__dict__"))
+                field = dataclasses.fields(node)[0]
+                with self.assertRaises(dataclasses.FrozenInstanceError):
+                    setattr(node, field.name, None)
+
+    def test_list_consumed(self):
+        tokens = self.lex("$(FOO) + 1")
+        parse(tokens)
+        self.assertEqual(tokens, [])
+
     def test_unary(self):
         tree = parse(self.lex("not TRUE"))
         self.assertEqual(str(tree), "!True")
@@ -86,3 +117,171 @@ class TestParseExpression(TestCase):
         with self.assertRaises(ParseError) as cm:
             parse(self.lex("3 :6"))
         self.assertEqual(str(cm.exception), "Invalid expression '3 :6'")
+
+
+class TestCompile(TestCase):
+    EXPRESSIONS = [
+        "$(FOO)",
+        "$(FOO) + 1 * $(BAR)",
+        "!$(FOO) || $(BAR) == 2",
+        "$(FOO) && $(BAR) != 0",
+        "$(FOO) ^ $(BAR)",
+        "~$(FOO) & 0xff",
+        "$(FOO) ? $(BAR) : 3",
+        '$(BAZ) == "str"',
+        "(($(FOO) << 2) >> 1) % 7",
+        "$(FOO) AND NOT $(BAR) > 0",
+    ]
+
+    CONTEXTS = [
+        {"FOO": 1, "BAR": 2, "BAZ": "str"},
+        {"FOO": 0, "BAR": 0, "BAZ": "abc"},
+        {"FOO": 5, "BAR": parse_text("$(FOO) - 3"), "BAZ": "str"},
+        {"FOO": parse_text("$(BAR) * 2"), "BAR": 4, "BAZ": "str"},
+        {"FOO": 2},
+    ]
+
+    def test_same_as_evaluate(self):
+        for text in self.EXPRESSIONS:
+            expr = parse_text(text)
+            for nest in NestMethod:
+                func = expr.compile(nest)
+                for context in self.CONTEXTS:
+                    with self.subTest(text=text, nest=nest, context=context):
+                        self.assertEqual(
+                            result(func, context),
+                            result(expr.evaluate, context, nest),
+                        )
+
+    def test_evaluate_many(self):
+        expr = parse_text("$(FOO) + 1 * $(BAR)")
+        results = list(expr.evaluate_many(self.CONTEXTS, "evaluate"))
+        self.assertEqual(results[:4], [3, 0, 7, 12])
+        self.assertIsInstance(results[4], EvaluationError)
+        self.assertEqual(str(results[4]), "Macro 'BAR' is not defined")
+
+    def test_evaluate_many_ignore(self):
+        expr = parse_text("$(FOO) + 1")
+        context = {"FOO": parse_text("$(BAR)")}
+        self.assertEqual(
+            list(expr.evaluate_many([context, {"FOO": 1}], "ignore")), [expr, 2]
+        )
+
+
+class TestFold(TestCase):
+    EXPRESSIONS = [
+        *TestCompile.EXPRESSIONS,
+        "0x10 << 4",
+        "(1 + 2) * 3 == $(FOO)",
+        "TRUE && $(FOO)",
+        "FALSE && $(FOO)",
+        "TRUE || $(FOO) == 1",
+        "1 + 1 == 2 ? $(FOO) : $(BAR)",
+        "$(FOO) ? 0x01 | 0x12 : 1 / 0",
+        '"str" == $(BAZ) || "a" != "a"',
+        "!(3 > 4) && $(BAR) + (2 << 1)",
+    ]
+
+    def test_walk(self):
+        expr = parse_text("$(FOO) ? 1 + $(BAR) : !2")
+        self.assertEqual(
+            [str(node) for node in expr.walk()],
+            ["$(FOO) ? (1 + $(BAR)) : !2", "$(FOO)", "(1 + $(BAR))", "1"]
+            + ["$(BAR)", "!2", "2"],
+        )
+
+    def test_optimize(self):
+        expr, eliminated = optimize(parse_text("$(FOO) + (1 + 2) * 3"))
+        self.assertEqual(str(expr), "($(FOO) + 9)")
+        self.assertEqual(eliminated, 4)
+
+        expr = parse_text("$(FOO) + 1")
+        self.assertEqual(optimize(expr), (expr, 0))
+
+    def test_same_as_evaluate(self):
+        for text in self.EXPRESSIONS:
+            expr = parse_text(text)
+            folded = expr.fold()
+            # the folded expression can be written back as text
+            self.assertEqual(str(parse_text(str(folded))), str(folded))
+            for nest in ("error", "evaluate"):
+                for context in TestCompile.CONTEXTS:
+                    with self.subTest(text=text, nest=nest, context=context):
+                        self.assertEqual(
+                            result(folded.evaluate, context, nest),
+                            result(expr.evaluate, context, nest),
+                        )
+
+
+class TestPartialEvaluate(TestCase):
+    def partial(self, text, context, nest="error"):
+        return str(parse_text(text).partial_evaluate(context, nest))
+
+    def test_residual(self):
+        context = {"TARGET": "DEBUG", "SMM": False, "SIZE": 0x10}
+        self.assertEqual(
+            self.partial('$(TARGET) == "DEBUG" && $(ARCH) == "X64"', context),
+            '$(ARCH) == "X64"',
+        )
+        self.assertEqual(self.partial("$(SMM) && $(UNKNOWN)", context), "False")
+        self.assertEqual(self.partial("!$(SMM) || $(UNKNOWN)", context), "True")
+        self.assertEqual(
+            self.partial("$(UNKNOWN) && $(SMM)", context), "$(UNKNOWN) && False"
+        )
+        self.assertEqual(self.partial("$(SIZE) * 2 + $(X)", context), "(32 + $(X))")
+        self.assertEqual(
+            self.partial('$(TARGET) != "DEBUG" ? $(X) : $(Y)', context), "$(Y)"
+        )
+
+    def test_unchanged(self):
+        expr = parse_text("$(FOO) + 1 == $(BAR)")
+        self.assertIs(expr.partial_evaluate({"BAZ": 1}), expr)
+        # no constant form
+        for value in (-1, [1], None):
+            with self.subTest(value=value):
+                self.assertIs(expr.partial_evaluate({"FOO": value}), expr)
+
+    def test_nested(self):
+        context = {"FOO": parse_text("$(BAR) + 1"), "BAR": 2}
+        self.assertEqual(self.partial("$(FOO) * $(X)", context), "($(FOO) * $(X))")
+        self.assertEqual(
+            self.partial("$(FOO) * $(X)", context, "evaluate"), "(3 * $(X))"
+        )
+        self.assertEqual(
+            self.partial("$(FOO) * $(X)", context, "ignore"), "($(FOO) * $(X))"
+        )
+        # the condition of ?: is evaluated with the default nest method
+        self.assertEqual(
+            self.partial("$(FOO) ? 1 : 2", context, "evaluate"), "$(FOO) ? 1 : 2"
+        )
+
+        circular = {"FOO": parse_text("$(BAR)"), "BAR": parse_text("$(FOO) + 1")}
+        expr = parse_text("$(FOO)")
+        residual = expr.partial_evaluate(circular, "evaluate")
+        self.assertEqual(str(residual), "($(FOO) + 1)")
+        with self.assertRaises(CircularReference):
+            residual.evaluate(circular, "evaluate")
+
+    def test_defined(self):
+        expr = LogicalOr(MacroDefined("FOO"), parse_text("$(BAR)"))
+        self.assertEqual(str(expr.partial_evaluate({"FOO": None})), "True")
+        self.assertIs(expr.partial_evaluate({}), expr)
+
+    def test_same_as_evaluate(self):
+        for text in TestFold.EXPRESSIONS:
+            expr = parse_text(text)
+            for nest in ("error", "evaluate"):
+                for context in TestCompile.CONTEXTS:
+                    for known in [*context, None]:
+                        # one macro known, or all of them
+                        known_context = (
+                            context if known is None else {known: context[known]}
+                        )
+                        residual = expr.partial_evaluate(known_context, nest)
+                        with self.subTest(
+                            text=text, nest=nest, context=context, known=known
+                        ):
+                            self.assertEqual(
+                                result(residual.evaluate, context, nest),
+                                result(expr.evaluate, context, nest),
+                            )
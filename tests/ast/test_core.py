@@ -1,8 +1,14 @@
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
-from edk2_expression.ast.core import Expression, NestMethod
-from edk2_expression.error import NotSupported
+from edk2_expression.ast.core import (
+    EvaluationSession,
+    Expression,
+    NestMethod,
+    TokenStream,
+)
+from edk2_expression.ast.operand import Integer
+from edk2_expression.error import EvaluationError, NotSupported
 
 
 class TestNestMethod(TestCase):
@@ -26,3 +32,117 @@ class TestExpression(TestCase):
         self.assertEqual(
             str(cm.exception), "Evaluation not supported for Expression: <EVAL>"
         )
+
+    def test_compile(self):
+        with (
+            patch.object(Expression, "__abstractmethods__", set()),
+            patch.object(Expression, "evaluate", return_value=7) as evaluate,
+        ):
+            func = Expression().compile("ignore")
+            self.assertEqual(func({"FOO": 1}), 7)
+        evaluate.assert_called_once_with({"FOO": 1}, NestMethod.Ignore)
+
+    def test_macros(self):
+        with patch.object(Expression, "__abstractmethods__", set()):
+            self.assertEqual(Expression().macros(), frozenset())
+
+    def test_evaluate_many(self):
+        with (
+            patch.object(Expression, "__abstractmethods__", set()),
+            patch.object(Expression, "__str__", lambda self: "<EVAL>"),
+        ):
+            results = list(Expression().evaluate_many([{}, {"FOO": 1}]))
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertIsInstance(result, NotSupported)
+
+    def test_evaluate_many_compile_error(self):
+        with (
+            patch.object(Expression, "__abstractmethods__", set()),
+            patch(
+                "edk2_expression.codegen.compile_expression",
+                side_effect=NotSupported("boom"),
+            ),
+        ):
+            results = list(Expression().evaluate_many([{}, {"FOO": 1}]))
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertIsInstance(result, NotSupported)
+
+        results = list(Integer(1).evaluate_many([{}], "bogus"))
+        self.assertEqual(len(results), 1)
+        self.assertIsInstance(results[0], ValueError)
+
+
+class TestEvaluationSession(TestCase):
+    def test_mapping(self):
+        session = EvaluationSession({"FOO": 1})
+        self.assertEqual(session["FOO"], 1)
+        self.assertEqual(session.get("FOO"), 1)
+        self.assertIsNone(session.get("BAR"))
+        self.assertIn("FOO", session)
+        self.assertNotIn("BAR", session)
+        self.assertEqual(list(session), ["FOO"])
+        self.assertEqual(len(session), 1)
+
+    def test_resolve(self):
+        inner = Mock(spec=Expression)
+        inner.evaluate.return_value = 3
+        session = EvaluationSession({"FOO": inner})
+        self.assertEqual(session.resolve("FOO", inner), 3)
+        self.assertEqual(session.resolve("FOO", inner), 3)
+        inner.evaluate.assert_called_once_with(session, NestMethod.Evaluate)
+
+        session.clear()
+        self.assertEqual(session.resolve("FOO", inner), 3)
+        self.assertEqual(inner.evaluate.call_count, 2)
+
+    def test_resolve_error(self):
+        inner = Mock(spec=Expression)
+        inner.evaluate.side_effect = EvaluationError("boom")
+        session = EvaluationSession({"FOO": inner})
+        for _ in range(2):
+            with self.assertRaises(EvaluationError):
+                session.resolve("FOO", inner)
+        self.assertEqual(inner.evaluate.call_count, 2)
+
+    def test_evaluate(self):
+        expr = Mock(spec=Expression)
+        expr.evaluate.return_value = 5
+        session = EvaluationSession({})
+        self.assertEqual(session.evaluate(expr), 5)
+        expr.evaluate.assert_called_once_with(session, NestMethod.Evaluate)
+
+
+class TestTokenStream(TestCase):
+    def setUp(self):
+        self.tokens = [(0, "A", "a"), (1, "B", "b"), (2, "C", "c")]
+
+    def test_pop(self):
+        stream = TokenStream(self.tokens)
+        self.assertEqual(stream.pop(0), (0, "A", "a"))
+        self.assertEqual(stream.pop(), (1, "B", "b"))
+        self.assertEqual(stream.position, 2)
+        self.assertEqual(len(self.tokens), 3)
+
+        with self.assertRaises(ValueError):
+            stream.pop(-1)
+
+        stream.pop()
+        with self.assertRaises(IndexError):
+            stream.pop()
+
+    def test_sequence(self):
+        stream = TokenStream(self.tokens, 1)
+        self.assertTrue(stream)
+        self.assertEqual(len(stream), 2)
+        self.assertEqual(stream[0], (1, "B", "b"))
+        self.assertEqual(stream[-1], (2, "C", "c"))
+        self.assertEqual(list(stream), self.tokens[1:])
+
+        with self.assertRaises(IndexError):
+            stream[2]
+        with self.assertRaises(IndexError):
+            stream[-3]
+
+        self.assertFalse(TokenStream(self.tokens, 3))
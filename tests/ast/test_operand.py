@@ -5,8 +5,14 @@ from unittest.mock import MagicMock, Mock, patch
 from pygments.token import Token
 
 import edk2_expression.ast.operand as t
-from edk2_expression.ast.core import Expression
-from edk2_expression.error import EvaluationError, ParseError
+from edk2_expression.ast.core import EvaluationSession, Expression
+from edk2_expression.ast.operator import Addition, LogicalAnd, Multiplication
+from edk2_expression.error import (
+    CircularReference,
+    EvaluationError,
+    NotSupported,
+    ParseError,
+)
 
 
 class TestParseOperand(TestCase):
@@ -22,6 +28,20 @@ class TestParseOperand(TestCase):
         )
 
 
+class TestMakeConstant(TestCase):
+    def test(self):
+        self.assertEqual(repr(t.make_constant(True)), "Boolean(value=True)")
+        self.assertEqual(repr(t.make_constant(1)), "Integer(value=1)")
+        self.assertEqual(repr(t.make_constant(1, True)), "HexNumber(value=1)")
+        self.assertEqual(repr(t.make_constant(-1, True)), "Integer(value=-1)")
+        self.assertEqual(repr(t.make_constant("a")), "String(value='a')")
+        self.assertEqual(
+            t.make_constant(uuid.UUID("123e4567-e89b-12d3-a456-426655440000")),
+            t.Guid(bytes.fromhex("123e4567e89b12d3a456426655440000")),
+        )
+        self.assertIsNone(t.make_constant(1.5))
+
+
 class TestConstant(TestCase):
     @patch.object(t.Constant, "__abstractmethods__", set())
     def test_eq(self):
@@ -85,6 +105,12 @@ class TestInteger(TestCase):
     def test_evaluate(self):
         self.assertEqual(t.Integer(0).evaluate({}), 0)
 
+    def test_macros(self):
+        self.assertEqual(t.Integer(3).macros(), frozenset())
+
+    def test_compile(self):
+        self.assertEqual(t.Integer(3).compile()({}), 3)
+
 
 class TestHexNumber(TestCase):
     def test_parse(self):
@@ -189,6 +215,12 @@ class TestGuid(TestCase):
             uuid.UUID("123e4567-e89b-12d3-a456-426655440000"),
         )
 
+    def test_compile(self):
+        self.assertEqual(
+            self.guid.compile()({}),
+            uuid.UUID("123e4567-e89b-12d3-a456-426655440000"),
+        )
+
 
 class TestMacroVal(TestCase):
     def test_parse(self):
@@ -254,6 +286,68 @@ class TestMacroVal(TestCase):
         inner.evaluate.return_value = 3
         self.assertEqual(t.MacroVal("FOO").evaluate({"FOO": inner}, "evaluate"), 3)
 
+    def test_evaluate_nested_memoized(self):
+        inner = Mock(spec=Expression)
+        inner.evaluate.return_value = 3
+        expr = Addition(t.MacroVal("FOO"), t.MacroVal("FOO"))
+        session = EvaluationSession({"FOO": inner})
+        self.assertEqual(expr.evaluate(session, "evaluate"), 6)
+        inner.evaluate.assert_called_once_with(session, "evaluate")
+
+        # each level references the previous one twice; 2**64 evaluations
+        # without memoization
+        context = {"L0": 1}
+        for i in range(1, 65):
+            context[f"L{i}"] = Addition(
+                t.MacroVal(f"L{i - 1}"), t.MacroVal(f"L{i - 1}")
+            )
+        self.assertEqual(t.MacroVal("L64").evaluate(context, "evaluate"), 2**64)
+
+    def test_evaluate_nested_shared_session(self):
+        # sibling references share one session per top-level evaluation
+        a = t.MacroVal("A")
+        for expr, value in (
+            (Addition(a, a), 4),
+            (Multiplication(Addition(a, a), a), 8),
+            (LogicalAnd(a, Addition(a, a)), True),
+        ):
+            for evaluate in (expr.evaluate, lambda c, n: expr.compile(n)(c)):
+                inner = Mock(
+                    spec=Expression, wraps=Addition(t.MacroVal("B"), t.Integer(1))
+                )
+                context = {"A": inner, "B": 1}
+                self.assertEqual(evaluate(context, "evaluate"), value)
+                self.assertEqual(inner.evaluate.call_count, 1, expr)
+                # once again per top-level evaluation
+                evaluate(context, "evaluate")
+                self.assertEqual(inner.evaluate.call_count, 2, expr)
+
+    def test_evaluate_nested_circular(self):
+        context = {
+            "FOO": Addition(t.MacroVal("BAR"), t.Integer(1)),
+            "BAR": t.MacroVal("FOO"),
+        }
+        with self.assertRaises(CircularReference) as cm:
+            t.MacroVal("FOO").evaluate(context, "evaluate")
+        self.assertEqual(cm.exception.cycle, ("FOO", "BAR", "FOO"))
+
+    def test_macros(self):
+        self.assertEqual(t.MacroVal("FOO").macros(), frozenset({"FOO"}))
+
+    def test_compile(self):
+        obj = t.MacroVal("FOO")
+        self.assertEqual(obj.compile()({"FOO": 16}), 16)
+        self.assertEqual(obj.compile()({"FOO": t.Integer(3)}), 3)
+        with self.assertRaises(EvaluationError):
+            obj.compile()({})
+
+        inner = MagicMock(spec=Expression)
+        inner.evaluate.return_value = 3
+        with self.assertRaises(EvaluationError):
+            obj.compile("error")({"FOO": inner})
+        self.assertIs(obj.compile("ignore")({"FOO": inner}), obj)
+        self.assertEqual(obj.compile("evaluate")({"FOO": inner}), 3)
+
 
 class TestMacroDefined(TestCase):
     def test_parse(self):
@@ -293,6 +387,13 @@ class TestMacroDefined(TestCase):
         self.assertTrue(t.MacroDefined("FOO").evaluate({"FOO": None}))
         self.assertFalse(t.MacroDefined("FOO").evaluate({}))
 
+    def test_macros(self):
+        self.assertEqual(t.MacroDefined("FOO").macros(), frozenset({"FOO"}))
+
+    def test_compile(self):
+        self.assertTrue(t.MacroDefined("FOO").compile()({"FOO": None}))
+        self.assertFalse(t.MacroDefined("FOO").compile()({}))
+
 
 class TestCName(TestCase):
     def test_parse(self):
@@ -303,6 +404,11 @@ class TestCName(TestCase):
     def test_str(self):
         self.assertEqual(str(t.CName("foo")), "foo")
 
+    def test_compile(self):
+        func = t.CName("foo").compile()
+        with self.assertRaises(NotSupported):
+            func({})
+
 
 class TestPcdName(TestCase):
     def test_parse(self):
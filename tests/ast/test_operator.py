@@ -1,8 +1,10 @@
+import dataclasses
 from unittest import TestCase
 from unittest.mock import MagicMock, Mock, patch
 
 import edk2_expression.ast.operator as t
 from edk2_expression.ast.core import Expression
+from edk2_expression.ast.operand import Boolean, HexNumber, Integer, MacroVal, String
 from edk2_expression.error import ParseError
 
 
@@ -70,6 +72,43 @@ class TestOperator(TestCase):
             t.Operator.parse([])
 
 
+class TestMacros(TestCase):
+    def test_macros(self):
+        expr = t.TernaryOp(
+            t.LogicalNot(MacroVal("FOO")),
+            t.TernaryOp.Decision(
+                t.Addition(MacroVal("BAR"), Integer(1)), MacroVal("FOO")
+            ),
+        )
+        self.assertEqual(expr.macros(), frozenset({"FOO", "BAR"}))
+
+    def test_cached(self):
+        sub = MagicMock(spec=Expression)
+        sub.macros.return_value = frozenset({"FOO"})
+        expr = t.LogicalNot(sub)
+        self.assertEqual(expr.macros(), frozenset({"FOO"}))
+        self.assertEqual(expr.macros(), frozenset({"FOO"}))
+        sub.macros.assert_called_once_with()
+
+    def test_not_compared(self):
+        expr = t.Addition(MacroVal("FOO"), Integer(1))
+        expr.macros()
+        other = t.Addition(MacroVal("FOO"), Integer(1))
+        self.assertEqual(expr, other)
+        self.assertEqual(hash(expr), hash(other))
+        self.assertEqual(repr(expr), repr(other))
+
+    def test_not_a_field(self):
+        expr = t.Addition(MacroVal("FOO"), Integer(1))
+        expr.macros()
+        self.assertEqual(
+            [field.name for field in dataclasses.fields(expr)], ["left", "right"]
+        )
+        self.assertEqual(dataclasses.astuple(expr), (("FOO",), (1,)))
+        self.assertFalse(hasattr(expr, "__dict__"))
+        self.assertEqual(dataclasses.replace(expr).macros(), frozenset({"FOO"}))
+
+
 class TestUnaryOp(TestCase):
     def setUp(self):
         self.expr = MagicMock(spec=Expression)
@@ -94,6 +133,20 @@ class TestUnaryOp(TestCase):
         self.assertEqual(expr.evaluate({}), -8)  # +0b0111 -> -0b1000
         self.assertEqual(str(expr), "~foo")
 
+    def test_fold(self):
+        self.assertEqual(repr(t.LogicalNot(Integer(7)).fold()), "Boolean(value=False)")
+        self.assertEqual(
+            repr(t.LogicalNot(t.LogicalNot(MacroVal("FOO"))).fold()),
+            "LogicalNot(sub=LogicalNot(sub=MacroVal(macro='FOO')))",
+        )
+        # negative numbers are not folded
+        expr = t.BitwiseNot(Integer(7))
+        self.assertIs(expr.fold(), expr)
+
+    def test_compile(self):
+        self.assertFalse(t.LogicalNot(Integer(7)).compile()({}))
+        self.assertEqual(t.BitwiseNot(MacroVal("FOO")).compile()({"FOO": 7}), -8)
+
 
 class TestBinaryOp(TestCase):
     def setUp(self):
@@ -303,6 +356,46 @@ class TestBinaryOp(TestCase):
 
         self.assertEqual(str(expr), "foo xor bar")
 
+    def test_fold(self):
+        expr = t.Multiplication(t.Addition(Integer(1), Integer(2)), Integer(3))
+        self.assertEqual(repr(expr.fold()), "Integer(value=9)")
+
+        expr = t.BitwiseLeftShift(HexNumber(0x10), Integer(4))
+        self.assertEqual(repr(expr.fold()), "HexNumber(value=256)")
+        # out of the range of hex literals
+        expr = t.BitwiseRightShift(HexNumber(0x10), Integer(4))
+        self.assertEqual(repr(expr.fold()), "Integer(value=1)")
+
+        expr = t.Equal(String("a"), String("a"))
+        self.assertEqual(repr(expr.fold()), "Boolean(value=True)")
+
+        expr = t.Addition(MacroVal("FOO"), t.Addition(Integer(1), Integer(2)))
+        self.assertEqual(str(expr.fold()), "($(FOO) + 3)")
+
+    def test_fold_keep(self):
+        # errors are raised on evaluation
+        expr = t.Division(Integer(1), Integer(0))
+        self.assertIs(expr.fold(), expr)
+        expr = t.Addition(String("a"), Integer(1))
+        self.assertIs(expr.fold(), expr)
+        # no constant type for float
+        expr = t.Division(Integer(3), Integer(2))
+        self.assertIs(expr.fold(), expr)
+        # nothing to fold
+        expr = t.Addition(MacroVal("FOO"), Integer(1))
+        self.assertIs(expr.fold(), expr)
+
+    def test_compile(self):
+        expr = t.Addition(MacroVal("FOO"), Integer(2))
+        self.assertEqual(expr.compile()({"FOO": 1}), 3)
+        self.assertEqual(expr.compile("ignore")({"FOO": 1}), 3)
+
+    def test_compile_nested(self):
+        expr = t.Addition(MacroVal("FOO"), Integer(2))
+        context = {"FOO": MacroVal("BAR"), "BAR": 1}
+        self.assertIs(expr.compile("ignore")(context), expr)
+        self.assertEqual(expr.compile("evaluate")(context), 3)
+
 
 class TestLogicalAnd(TestCase):
     def setUp(self):
@@ -345,6 +438,38 @@ class TestLogicalAnd(TestCase):
         with self.assertRaises(RuntimeError):
             self.expr.evaluate({}, nest="evaluate")
 
+    def test_fold(self):
+        foo = MacroVal("FOO")
+        is_foo = t.Equal(foo, Integer(1))
+        self.assertEqual(
+            repr(t.LogicalAnd(Boolean(False), foo).fold()), "Boolean(value=False)"
+        )
+        self.assertEqual(
+            repr(t.LogicalAnd(Integer(1), String("")).fold()), "Boolean(value=False)"
+        )
+        self.assertIs(t.LogicalAnd(Boolean(True), is_foo).fold(), is_foo)
+
+        # bool() is still needed on the right hand side
+        expr = t.LogicalAnd(Boolean(True), foo)
+        self.assertIs(expr.fold(), expr)
+        # the left hand side may raise errors
+        expr = t.LogicalAnd(foo, Boolean(False))
+        self.assertIs(expr.fold(), expr)
+
+    def test_compile(self):
+        expr = t.LogicalAnd(MacroVal("FOO"), MacroVal("BAR"))
+        self.assertIs(expr.compile()({"FOO": 1, "BAR": 2}), True)
+        self.assertIs(expr.compile()({"FOO": 1, "BAR": 0}), False)
+        # right hand side is not evaluated when left hand side is False
+        self.assertIs(expr.compile()({"FOO": 0}), False)
+
+    def test_compile_nested(self):
+        expr = t.LogicalAnd(MacroVal("FOO"), MacroVal("BAR"))
+        nested = MacroVal("BAZ")
+        self.assertIs(expr.compile("ignore")({"FOO": nested}), expr)
+        self.assertIs(expr.compile("ignore")({"FOO": 1, "BAR": nested}), expr)
+        self.assertIs(expr.compile("ignore")({"FOO": 0, "BAR": nested}), False)
+
 
 class TestLogicalOr(TestCase):
     def setUp(self):
@@ -370,6 +495,34 @@ class TestLogicalOr(TestCase):
         self.left.evaluate.side_effect = t.LazyEvaluated.Skip
         self.assertIs(self.expr.evaluate({}), self.expr)
 
+    def test_fold(self):
+        foo = MacroVal("FOO")
+        is_foo = t.Equal(foo, Integer(1))
+        self.assertEqual(
+            repr(t.LogicalOr(Boolean(True), foo).fold()), "Boolean(value=True)"
+        )
+        self.assertEqual(
+            repr(t.LogicalOr(Integer(0), String("a")).fold()), "Boolean(value=True)"
+        )
+        self.assertIs(t.LogicalOr(Boolean(False), is_foo).fold(), is_foo)
+
+        expr = t.LogicalOr(Boolean(False), foo)
+        self.assertIs(expr.fold(), expr)
+
+    def test_compile(self):
+        expr = t.LogicalOr(MacroVal("FOO"), MacroVal("BAR"))
+        self.assertIs(expr.compile()({"FOO": 0, "BAR": 2}), True)
+        self.assertIs(expr.compile()({"FOO": 0, "BAR": 0}), False)
+        # right hand side is not evaluated when left hand side is True
+        self.assertIs(expr.compile()({"FOO": 1}), True)
+
+    def test_compile_nested(self):
+        expr = t.LogicalOr(MacroVal("FOO"), MacroVal("BAR"))
+        nested = MacroVal("BAZ")
+        self.assertIs(expr.compile("ignore")({"FOO": nested}), expr)
+        self.assertIs(expr.compile("ignore")({"FOO": 0, "BAR": nested}), expr)
+        self.assertIs(expr.compile("ignore")({"FOO": 1, "BAR": nested}), True)
+
 
 class TestTernaryOp(TestCase):
     def test_str(self):
@@ -427,3 +580,29 @@ class TestTernaryOp(TestCase):
 
         expr = t.TernaryOp(cond, t.TernaryOp.Decision(true, false))
         self.assertEqual(expr.evaluate({}), 2)
+
+    def test_compile(self):
+        expr = t.TernaryOp(
+            MacroVal("FOO"), t.TernaryOp.Decision(Integer(1), MacroVal("BAR"))
+        )
+        self.assertEqual(expr.compile()({"FOO": True}), 1)
+        self.assertEqual(expr.compile()({"FOO": False, "BAR": 2}), 2)
+
+    def test_fold(self):
+        decision = t.TernaryOp.Decision(MacroVal("FOO"), MacroVal("BAR"))
+        self.assertEqual(
+            repr(t.TernaryOp(t.Equal(Integer(1), Integer(1)), decision).fold()),
+            "MacroVal(macro='FOO')",
+        )
+        self.assertEqual(
+            repr(t.TernaryOp(String(""), decision).fold()), "MacroVal(macro='BAR')"
+        )
+
+        expr = t.TernaryOp(MacroVal("BAZ"), decision)
+        self.assertIs(expr.fold(), expr)
+
+        expr = t.TernaryOp(
+            MacroVal("BAZ"),
+            t.TernaryOp.Decision(t.Addition(Integer(1), Integer(2)), Integer(4)),
+        )
+        self.assertEqual(str(expr.fold()), "$(BAZ) ? 3 : 4")
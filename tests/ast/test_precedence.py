@@ -0,0 +1,139 @@
+import random
+from unittest import TestCase
+
+from edk2_expression.ast import ParseMethod, TokenStream, parse
+from edk2_expression.ast.precedence import (
+    BINARY_OPERATORS,
+    OPERATORS,
+    PREFIX_OPERATORS,
+    parse_precedence_climbing,
+)
+from edk2_expression.error import ParseError
+from edk2_expression.tokenizer import tokenize
+from tests.util import generate
+
+ATOMS = [
+    "$(FOO)",
+    "$(BAR)",
+    "1",
+    "0x10",
+    "TRUE",
+    "false",
+    '"str"',
+    "L'str'",
+    "gFoo.PcdBar",
+    "cname",
+    "123e4567-e89b-12d3-a456-426655440000",
+    "{0x1, 0x2}",
+]
+
+BINARY = [
+    *"* / % + - < > & ^ | :".split(),
+    *"<< >> <= >= == != && || EQ NE LT GT LE GE AND and OR or".split(),
+]
+
+PREFIX_WORDS = {"!", "~", "NOT", "not"}
+
+
+def consecutive_prefix(words: list[str]) -> bool:
+    # the shunting yard misplaces or rejects consecutive prefix operators
+    return any(
+        a in PREFIX_WORDS and b in PREFIX_WORDS for a, b in zip(words, words[1:])
+    )
+
+
+def parse_both(text: str) -> tuple[str, str]:
+    results = []
+    for method in ParseMethod:
+        try:
+            results.append(repr(parse(tokenize(text), method)))
+        except ParseError as e:
+            results.append(f"ParseError: {e}")
+    return tuple(results)
+
+
+class TestTables(TestCase):
+    def test(self):
+        self.assertEqual(OPERATORS["AND"], "&&")
+        self.assertEqual(OPERATORS["<<"], "<<")
+        self.assertNotIn("(", OPERATORS)
+        self.assertEqual(set(PREFIX_OPERATORS), {"!", "~"})
+        self.assertEqual(BINARY_OPERATORS["*"][0], 3)
+
+
+class TestParsePrecedenceClimbing(TestCase):
+    def test_same_as_shunting_yard(self):
+        rand = random.Random(20231124)
+        for _ in range(3000):
+            text = generate(rand, 4, ATOMS, BINARY, ["!", "~", "NOT ", "not "])
+            words = [value for _, _, value in tokenize(text) if not value.isspace()]
+            if consecutive_prefix(words):
+                continue
+            precedence, shunting_yard = parse_both(text)
+            self.assertEqual(precedence, shunting_yard, f"differs for {text!r}")
+
+    def test_same_errors(self):
+        for text in (
+            "",
+            "()",
+            "3+",
+            "(3+)",
+            "+ 3",
+            "3 + * 4",
+            "! + 3",
+            "3 5",
+            "3 ! 5",
+            "3 (5)",
+            "3 + 5)",
+            "3 +$",
+            "3 :6",
+            ")",
+            "1 2",
+            "1 ? 2",
+            "1 ? 2 : 3 : 4",
+            "(1 : 2) + 3",
+            "1 XORxor 2",
+            "{0x1, 0x2",
+        ):
+            precedence, shunting_yard = parse_both(text)
+            self.assertTrue(precedence.startswith("ParseError"), text)
+            self.assertEqual(precedence, shunting_yard, f"differs for {text!r}")
+
+    def test_random_tokens(self):
+        # malformed input too
+        pieces = [*ATOMS[:6], "(", ")", "?", ":", "!", "~", "not", *BINARY[:12]]
+        rand = random.Random(0)
+        for _ in range(5000):
+            words = [rand.choice(pieces) for _ in range(rand.randint(1, 7))]
+            if consecutive_prefix(words):
+                continue
+            text = " ".join(words)
+            precedence, shunting_yard = parse_both(text)
+            self.assertEqual(precedence, shunting_yard, f"differs for {text!r}")
+
+    def test_accepted_by_shunting_yard(self):
+        for text in ("1 (", "Cn (", '""(', "1 2 +", "$(FOO) not"):
+            precedence, shunting_yard = parse_both(text)
+            self.assertFalse(precedence.startswith("ParseError"), text)
+            self.assertEqual(precedence, shunting_yard, f"differs for {text!r}")
+
+    def test_unclosed_bracket(self):
+        precedence, shunting_yard = parse_both("(1 + (2")
+        self.assertEqual(precedence, shunting_yard)
+        self.assertEqual(str(parse(tokenize("(1 + (2"))), "(1 + 2)")
+
+    def test_consecutive_prefix(self):
+        # rejected by the shunting yard since both operators have the same
+        # precedence
+        self.assertEqual(str(parse(tokenize("!!TRUE"))), "!!True")
+        self.assertEqual(str(parse(tokenize("~NOT 1"))), "~!1")
+
+    def test_long_chain(self):
+        text = " || ".join(f"$(VAR{i}) == {i}" for i in range(5000))
+        tree = parse(tokenize(text))
+        self.assertEqual(tree.right.left.macro, "VAR4999")
+
+    def test_deep_brackets(self):
+        tokens = TokenStream(tokenize("(" * 5000 + "1" + ")" * 5000))
+        tree = parse_precedence_climbing(tokens)
+        self.assertEqual(tree.value, 1)
@@ -0,0 +1,130 @@
+import contextlib
+import io
+import pickle
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import edk2_expression.batch as t
+from edk2_expression.error import CircularReference, DirectiveError
+
+TEMPLATE = """\
+DEFINE INDEX = {index}
+!if $(INDEX) % 2 == 0
+  Even{index}.inf
+!else
+  Odd{index}.inf
+!endif
+!if $(TARGET) == "DEBUG"
+  Debug.inf
+!endif
+"""
+
+
+class TestBatch(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        directory = Path(self.tempdir.name)
+        self.paths = []
+        for index in range(10):
+            path = directory / f"{index}.dsc"
+            path.write_text(TEMPLATE.format(index=index))
+            self.paths.append(str(path))
+        self.broken = directory / "broken.dsc"
+        self.broken.write_text("!if TRUE\n")
+        self.missing = directory / "missing.dsc"
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def expected(self, index, target="DEBUG"):
+        lines = ["Even" if index % 2 == 0 else "Odd"]
+        lines[0] += f"{index}.inf"
+        if target == "DEBUG":
+            lines.append("Debug.inf")
+        return lines
+
+    def texts(self, result):
+        return [line.text.strip() for line in result.lines]
+
+    def test_sequential(self):
+        results = list(t.preprocess_files(self.paths, {"TARGET": "DEBUG"}, workers=0))
+        self.assertEqual([r.path for r in results], self.paths)
+        for index, result in enumerate(results):
+            self.assertTrue(result.ok)
+            self.assertEqual(self.texts(result), self.expected(index))
+            self.assertEqual(repr(result.defines["INDEX"]), f"Integer(value={index})")
+            self.assertNotIn("TARGET", result.defines)
+
+    def test_parallel(self):
+        for ordered in (True, False):
+            for chunksize in (None, 1, 3):
+                with self.subTest(ordered=ordered, chunksize=chunksize):
+                    results = list(
+                        t.preprocess_files(
+                            self.paths,
+                            {"TARGET": "RELEASE"},
+                            workers=2,
+                            chunksize=chunksize,
+                            ordered=ordered,
+                        )
+                    )
+                    if ordered:
+                        self.assertEqual([r.path for r in results], self.paths)
+                    results.sort(key=lambda r: self.paths.index(r.path))
+                    for index, result in enumerate(results):
+                        self.assertEqual(
+                            self.texts(result), self.expected(index, "RELEASE")
+                        )
+
+    def test_errors(self):
+        paths = [self.paths[0], str(self.broken), str(self.missing), self.paths[1]]
+        for workers in (0, 2):
+            with self.subTest(workers=workers):
+                results = list(
+                    t.preprocess_files(paths, {"TARGET": "DEBUG"}, workers=workers)
+                )
+                self.assertEqual([r.ok for r in results], [True, False, False, True])
+                self.assertIsInstance(results[1].error, DirectiveError)
+                self.assertEqual(results[1].error.line, 1)
+                self.assertIsInstance(results[2].error, FileNotFoundError)
+                self.assertEqual(self.texts(results[3]), self.expected(1))
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            list(t.preprocess_files(self.paths, workers=-1))
+        with self.assertRaises(ValueError):
+            list(t.preprocess_files(self.paths, workers=1, chunksize=0))
+
+    def test_pickle_errors(self):
+        for error in (DirectiveError("Missing !endif", 3), CircularReference("ABA")):
+            with self.subTest(error=error):
+                copy = pickle.loads(pickle.dumps(error))
+                self.assertEqual(str(copy), str(error))
+                self.assertEqual(copy.__dict__, error.__dict__)
+
+    def test_main(self):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            status = t.main(
+                ["-D", 'TARGET="DEBUG"', "-j", "0", self.paths[2], str(self.broken)]
+            )
+
+        self.assertEqual(status, 1)
+        self.assertEqual(
+            stdout.getvalue().splitlines(),
+            [f"{self.paths[2]}:3:  Even2.inf", f"{self.paths[2]}:8:  Debug.inf"],
+        )
+        self.assertIn("Missing !endif", stderr.getvalue())
+
+    def test_main_summary(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            status = t.main(["-D", "TARGET=RELEASE", "--summary", *self.paths[:2]])
+
+        self.assertEqual(status, 0)
+        self.assertEqual(
+            stdout.getvalue().splitlines(),
+            [f"{self.paths[0]}: 1 lines", f"{self.paths[1]}: 1 lines"],
+        )
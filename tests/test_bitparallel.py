@@ -0,0 +1,141 @@
+import random
+from unittest import TestCase
+
+import edk2_expression
+import edk2_expression.bitparallel as t
+from edk2_expression.ast.operand import Boolean, Integer, MacroDefined
+from edk2_expression.ast.operator import (
+    LogicalAnd,
+    LogicalNot,
+    LogicalOr,
+    LogicalXor,
+    TernaryOp,
+)
+from edk2_expression.error import EvaluationError, NotSupported
+from tests.util import result
+
+ATOMS = [
+    '$(TARGET) == "DEBUG"',
+    '"RELEASE" != $(TARGET)',
+    "$(ARCH) == 1",
+    "$(TPM)",
+    "$(SIZE) + 1 > 4",
+    "$(NESTED) == TRUE",
+    "TRUE",
+    "0",
+    None,  # DEFINED(OPTIONAL)
+]
+
+
+def generate(rand, depth=0):
+    if depth > 3 or rand.random() < 0.3:
+        atom = rand.choice(ATOMS)
+        return edk2_expression.parse(atom) if atom else MacroDefined("OPTIONAL")
+    kind = rand.randrange(5)
+    if kind == 0:
+        return LogicalNot(generate(rand, depth + 1))
+    if kind == 1:
+        decision = TernaryOp.Decision(
+            generate(rand, depth + 1), generate(rand, depth + 1)
+        )
+        return TernaryOp(generate(rand, depth + 1), decision)
+    type_ = [LogicalAnd, LogicalOr, LogicalXor, LogicalAnd][kind - 1]
+    return type_(generate(rand, depth + 1), generate(rand, depth + 1))
+
+
+def generate_contexts(rand, count):
+    contexts = []
+    for _ in range(count):
+        context = {
+            "TARGET": rand.choice(["DEBUG", "RELEASE", "NOOPT"]),
+            "ARCH": rand.choice([1, True, 2, Integer(1)]),
+            "TPM": rand.choice([True, False, 0, "", "X"]),
+            "SIZE": rand.randrange(8),
+            "NESTED": edk2_expression.parse(rand.choice(["$(TPM)", "$(SIZE) > 3"])),
+        }
+        if rand.random() < 0.5:
+            context["OPTIONAL"] = None
+        contexts.append(context)
+    return contexts
+
+
+def expected_bits(expr, contexts, nest):
+    mask = 0
+    for index, context in enumerate(contexts):
+        if expr.evaluate(context, nest):
+            mask |= 1 << index
+    return mask
+
+
+class TestBitEvaluator(TestCase):
+    def test_cross_check(self):
+        rand = random.Random(0)
+        for count in (1, 64, 200):
+            contexts = generate_contexts(rand, count)
+            evaluator = t.BitEvaluator(contexts, "evaluate")
+            for _ in range(100):
+                expr = generate(rand)
+                with self.subTest(count=count, expr=str(expr)):
+                    # the condition of ?: raises for macros defined as
+                    # expressions with the default nest method; the messages
+                    # may differ, so only the exception types are compared
+                    self.assertEqual(
+                        result(evaluator.evaluate, expr)[:2],
+                        result(expected_bits, expr, contexts, "evaluate")[:2],
+                    )
+
+    def test_nest_error(self):
+        rand = random.Random(1)
+        contexts = generate_contexts(rand, 64)
+        evaluator = t.BitEvaluator(contexts)
+        for text in ('$(TARGET) == "DEBUG" && ($(TPM) || $(ARCH) == 1)', "$(TPM)"):
+            with self.subTest(text=text):
+                expr = edk2_expression.parse(text)
+                self.assertEqual(
+                    evaluator.evaluate(expr), expected_bits(expr, contexts, "error")
+                )
+
+        with self.assertRaises(EvaluationError):
+            evaluator.evaluate(edk2_expression.parse("$(NESTED)"))
+
+    def test_defined(self):
+        contexts = [{}, {"FOO": 0}, {"FOO": 1}]
+        evaluator = t.BitEvaluator(contexts)
+        self.assertEqual(evaluator.truths(MacroDefined("FOO")), [False, True, True])
+        # $(FOO) is not evaluated where it is not defined
+        expr = LogicalOr(
+            LogicalNot(MacroDefined("FOO")), edk2_expression.parse("$(FOO)")
+        )
+        self.assertEqual(evaluator.truths(expr), [True, False, True])
+
+    def test_undefined(self):
+        contexts = [{"FOO": 1}, {"FOO": 2}, {}]
+        evaluator = t.BitEvaluator(contexts)
+        with self.assertRaises(EvaluationError):
+            evaluator.evaluate(edk2_expression.parse("$(FOO) == 1"))
+        # not evaluated for the configuration without FOO
+        expr = edk2_expression.parse("$(BAR) && $(FOO) == 1")
+        contexts[2]["BAR"] = False
+        for context in contexts[:2]:
+            context["BAR"] = True
+        self.assertEqual(t.BitEvaluator(contexts).truths(expr), [True, False, False])
+
+    def test_large_batch(self):
+        contexts = [{"INDEX": index, "ODD": index % 2 == 1} for index in range(1000)]
+        evaluator = t.BitEvaluator(contexts)
+        self.assertEqual(len(evaluator), 1000)
+        self.assertEqual(evaluator.evaluate(Boolean(True)), evaluator.full)
+        mask = evaluator.evaluate(edk2_expression.parse("$(ODD) || $(INDEX) == 998"))
+        self.assertEqual(mask, int("10" * 500, 2) | 1 << 998)
+
+    def test_unhashable(self):
+        contexts = [{"FOO": [1]}, {"FOO": 1}]
+        expr = edk2_expression.parse("$(FOO) != 1")
+        self.assertEqual(t.evaluate_bits(expr, contexts), 0b01)
+
+    def test_empty(self):
+        self.assertEqual(t.evaluate_bits(edk2_expression.parse("TRUE"), []), 0)
+
+    def test_ignore(self):
+        with self.assertRaises(NotSupported):
+            t.BitEvaluator([{}], "ignore")
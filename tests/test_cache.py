@@ -0,0 +1,114 @@
+from unittest import TestCase
+
+import edk2_expression
+import edk2_expression.cache as t
+from edk2_expression.ast.operand import Integer, MacroVal
+from edk2_expression.ast.operator import Addition
+
+
+class TestParseCache(TestCase):
+    def test_get_put(self):
+        cache = t.ParseCache()
+        self.assertIsNone(cache.get("1"))
+
+        expr = Integer(1)
+        cache.put("1", expr)
+        self.assertIs(cache.get("1"), expr)
+        self.assertIn("1", cache)
+        self.assertEqual(len(cache), 1)
+
+        info = cache.info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.evictions, 0)
+        self.assertEqual(info.currsize, 1)
+        self.assertGreater(info.currbytes, 0)
+
+    def test_maxsize(self):
+        cache = t.ParseCache(maxsize=2)
+        cache.put("1", Integer(1))
+        cache.put("2", Integer(2))
+        cache.get("1")  # mark as recently used
+        cache.put("3", Integer(3))
+
+        self.assertIn("1", cache)
+        self.assertNotIn("2", cache)
+        self.assertIn("3", cache)
+        self.assertEqual(cache.info().evictions, 1)
+
+    def test_maxbytes(self):
+        small = t.estimate_size(Integer(1)) + 100
+        cache = t.ParseCache(maxsize=None, maxbytes=small)
+        cache.put("1", Integer(1))
+        cache.put("2", Integer(2))
+        self.assertNotIn("1", cache)
+        self.assertIn("2", cache)
+
+        # entry that never fits
+        cache.put("$(A) + 1", Addition(MacroVal("A"), Integer(1)))
+        self.assertNotIn("$(A) + 1", cache)
+        self.assertIn("2", cache)
+
+    def test_disabled(self):
+        cache = t.ParseCache(maxsize=0)
+        cache.put("1", Integer(1))
+        self.assertEqual(len(cache), 0)
+
+    def test_resize(self):
+        cache = t.ParseCache()
+        for i in range(5):
+            cache.put(str(i), Integer(i))
+
+        cache.resize(maxsize=2)
+        self.assertEqual(len(cache), 2)
+        self.assertIn("3", cache)
+        self.assertIn("4", cache)
+        self.assertEqual(cache.info().evictions, 3)
+        self.assertEqual(cache.info().maxbytes, 16 * 1024 * 1024)
+
+        cache.resize(maxbytes=0)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.info().currbytes, 0)
+
+        with self.assertRaises(ValueError):
+            cache.resize(maxsize=-1)
+
+    def test_clear(self):
+        cache = t.ParseCache()
+        cache.put("1", Integer(1))
+        cache.get("1")
+        cache.clear()
+        self.assertEqual(
+            cache.info(),
+            t.CacheInfo(
+                hits=0,
+                misses=0,
+                evictions=0,
+                currsize=0,
+                maxsize=4096,
+                currbytes=0,
+                maxbytes=16 * 1024 * 1024,
+            ),
+        )
+
+
+class TestEstimateSize(TestCase):
+    def test(self):
+        leaf = t.estimate_size(Integer(1))
+        self.assertGreater(leaf, 0)
+        self.assertGreater(t.estimate_size(Addition(Integer(1), Integer(2))), leaf * 2)
+
+
+class TestParse(TestCase):
+    def setUp(self):
+        edk2_expression.parse_cache.clear()
+
+    def test_shared(self):
+        expr = edk2_expression.parse("$(TARGET) == DEBUG")
+        self.assertIs(edk2_expression.parse("$(TARGET) == DEBUG"), expr)
+        self.assertEqual(edk2_expression.parse_cache.info().hits, 1)
+
+    def test_no_cache(self):
+        expr = edk2_expression.parse("$(TARGET) == DEBUG", cache=False)
+        self.assertIsNot(edk2_expression.parse("$(TARGET) == DEBUG"), expr)
+        self.assertEqual(edk2_expression.parse_cache.info().misses, 1)
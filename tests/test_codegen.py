@@ -0,0 +1,140 @@
+import ast
+import random
+import uuid
+from unittest import TestCase
+from unittest.mock import Mock
+
+import edk2_expression
+import edk2_expression.codegen as t
+from edk2_expression.ast import Expression, NestMethod
+from edk2_expression.ast.operand import CName, Guid, Integer, MacroVal
+from edk2_expression.ast.operator import Addition
+from edk2_expression.error import EvaluationError, NotSupported
+from tests.util import CONTEXTS, generate, result
+
+
+class TestCompileExpression(TestCase):
+    def test_same_as_evaluate(self):
+        rand = random.Random(20231114)
+        for _ in range(500):
+            text = generate(rand, 4)
+            try:
+                expr = edk2_expression.parse(text, cache=False)
+            except edk2_expression.error.ParseError:
+                continue
+            for nest in NestMethod:
+                func = t.compile_expression(expr, nest)
+                for context in CONTEXTS:
+                    self.assertEqual(
+                        result(func, context),
+                        result(expr.evaluate, context, nest),
+                        f"differs for {text!r} with {nest} and {context}",
+                    )
+
+    def test_short_circuit(self):
+        func = t.compile_expression(edk2_expression.parse("$(FOO) && $(BAR)"))
+        self.assertIs(func({"FOO": 0}), False)
+        self.assertIs(func({"FOO": 1, "BAR": 2}), True)
+
+        func = t.compile_expression(edk2_expression.parse("$(FOO) || $(BAR)"))
+        self.assertIs(func({"FOO": 1}), True)
+        self.assertIs(func({"FOO": 0, "BAR": 0}), False)
+
+    def test_ternary_condition(self):
+        # the condition is always evaluated with the default nest method
+        expr = edk2_expression.parse("$(FOO) ? $(BAR) : 0")
+        func = t.compile_expression(expr, "evaluate")
+        context = {"FOO": True, "BAR": MacroVal("BAZ"), "BAZ": 3}
+        self.assertEqual(func(context), 3)
+        with self.assertRaises(EvaluationError):
+            func({"FOO": MacroVal("BAZ"), "BAZ": True})
+
+    def test_nested_memoized(self):
+        # each level references the previous one twice
+        context = {"L0": 1}
+        for i in range(1, 65):
+            context[f"L{i}"] = edk2_expression.parse(f"$(L{i - 1}) + $(L{i - 1})")
+        func = t.compile_expression(edk2_expression.parse("$(L64)"), "evaluate")
+        self.assertEqual(func(context), 2**64)
+
+    def test_nested_shared_session(self):
+        # sibling references share one session per call
+        inner = Mock(spec=Expression, wraps=edk2_expression.parse("$(B) + 1"))
+        context = {"A": inner, "B": 1}
+        for text, value in (("$(A) + $(A)", 4), ("($(A)+$(A))*$(A)", 8)):
+            func = t.compile_expression(edk2_expression.parse(text), "evaluate")
+            inner.reset_mock()
+            self.assertEqual(func(context), value)
+            self.assertEqual(inner.evaluate.call_count, 1, text)
+            self.assertEqual(func(context), value)
+            self.assertEqual(inner.evaluate.call_count, 2, text)
+
+    def test_guid(self):
+        expr = edk2_expression.parse("123e4567-e89b-12d3-a456-426655440000")
+        self.assertIsInstance(expr, Guid)
+        self.assertEqual(
+            t.compile_expression(expr)({}),
+            uuid.UUID("123e4567-e89b-12d3-a456-426655440000"),
+        )
+
+    def test_deep_chain(self):
+        text = " || ".join(f"$(FOO) == {i}" for i in range(2000))
+        func = t.compile_expression(edk2_expression.parse(text, cache=False))
+        self.assertTrue(func({"FOO": 1999}))
+        self.assertFalse(func({"FOO": 2000}))
+
+    def test_deep_arithmetic(self):
+        # not flattened like || and &&; falls back to compile_iterative()
+        for text in (" + ".join(["1"] * 500), "(1 - " * 300 + "1" + ")" * 300):
+            expr = edk2_expression.parse(text, cache=False)
+            self.assertEqual(t.compile_expression(expr)({}), expr.evaluate({}))
+        expr = edk2_expression.parse(" + ".join(["$(FOO)"] * 500), cache=False)
+        results = list(expr.evaluate_many([{"FOO": 1}, {}]))
+        self.assertEqual(results[0], 500)
+        self.assertIsInstance(results[1], EvaluationError)
+
+    def test_deeper_than_recursion_limit(self):
+        for text, context, expected in (
+            (" + ".join(["$(FOO)"] * 20000), {"FOO": 1}, 20000),
+            ("!" * 3000 + "$(FOO)", {"FOO": 0}, False),
+        ):
+            expr = edk2_expression.parse(text, cache=False)
+            self.assertEqual(t.compile_expression(expr)(context), expected)
+            results = list(expr.evaluate_many([context, {}]))
+            self.assertEqual(results[0], expected)
+            self.assertIsInstance(results[1], EvaluationError)
+
+    def test_unsupported(self):
+        expr = Addition(CName("foo"), Integer(1))
+        func = t.compile_expression(expr)
+        with self.assertRaises(NotSupported):
+            func({})
+
+        with self.assertRaises(NotSupported) as cm:
+            t.compile_expression(expr, strict=True)
+        self.assertEqual(
+            str(cm.exception), "Code generation not supported for CName: foo"
+        )
+
+    def test_code_cache(self):
+        t.cache_clear()
+        t.compile_expression(edk2_expression.parse("$(FOO) + 1"))
+        t.compile_expression(edk2_expression.parse("$(FOO) + 1", cache=False))
+        info = t.cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 1)
+
+
+class TestGenerate(TestCase):
+    def test_source(self):
+        tree, namespace = t.generate(edk2_expression.parse("$(FOO) + 1 > 2"))
+        self.assertEqual(
+            ast.unparse(tree),
+            "lambda context: (_v0 if (_v0 := context.get('FOO')).__class__ in "
+            "_PLAIN_TYPES else _lookup(context, 'FOO', _v0)) + 1 > 2",
+        )
+        self.assertIn("_lookup", namespace)
+
+    def test_ignore(self):
+        with self.assertRaises(NotSupported):
+            t.generate(Integer(1), "ignore")
@@ -0,0 +1,204 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+from unittest import TestCase, skipIf
+from unittest.mock import patch
+
+import edk2_expression
+import edk2_expression.diskcache as t
+
+
+def parse_all(*texts):
+    return [edk2_expression.parse(text, cache=False) for text in texts]
+
+
+class TestDiskCache(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tempdir.name)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def files(self):
+        return sorted(path for path in self.directory.rglob("*") if path.is_file())
+
+    def test_round_trip(self):
+        cache = t.DiskCache(self.directory)
+        exprs = parse_all('$(TARGET) == "DEBUG"', "$(FOO) ? 0x10 : 2")
+
+        self.assertIsNone(cache.get("file"))
+        cache.put("file", exprs)
+        self.assertEqual(
+            [repr(expr) for expr in cache.get("file")],
+            [repr(expr) for expr in exprs],
+        )
+
+        info = cache.info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.currbytes, sum(p.stat().st_size for p in self.files()))
+
+    def test_shared_directory(self):
+        t.DiskCache(self.directory).put("text", parse_all("$(FOO)"))
+        exprs = t.DiskCache(self.directory).get("text")
+        self.assertEqual(str(exprs[0]), "$(FOO)")
+
+    def test_keys(self):
+        cache = t.DiskCache(self.directory)
+        cache.put("text", parse_all("1"))
+        cache.put("text", parse_all("2"), options="optimize")
+
+        self.assertEqual(str(cache.get("text")[0]), "1")
+        self.assertEqual(str(cache.get("text", "optimize")[0]), "2")
+        self.assertIsNone(cache.get("other"))
+        self.assertIsNone(t.DiskCache(self.directory, dialect="other").get("text"))
+
+    def test_corrupted(self):
+        cache = t.DiskCache(self.directory)
+        for data in (b"", b"garbage", parse_all("$(FOO)")[0].to_bytes()[:-1]):
+            with self.subTest(data=data):
+                cache.put("text", parse_all("$(FOO)"))
+                [path] = self.files()
+                path.write_bytes(data)
+
+                self.assertIsNone(cache.get("text"))
+                self.assertFalse(path.exists())
+
+    def test_read_error(self):
+        cache = t.DiskCache(self.directory)
+        cache.put("text", parse_all("$(FOO)"))
+        [path] = self.files()
+        with patch.object(Path, "read_bytes", side_effect=PermissionError):
+            self.assertIsNone(cache.get("text"))
+        # not removed, it may be readable by other processes
+        self.assertTrue(path.exists())
+        self.assertIsNotNone(cache.get("text"))
+
+    @skipIf(os.name == "nt", "no POSIX permissions")
+    def test_permissions(self):
+        for umask, mode in ((0o022, 0o644), (0o027, 0o640)):
+            with self.subTest(umask=oct(umask)):
+                mask = os.umask(umask)
+                try:
+                    # the umask of the process is never changed, since other
+                    # threads may create files meanwhile
+                    with patch("os.umask", side_effect=AssertionError):
+                        cache = t.DiskCache(self.directory)
+                        cache.put("text", parse_all("$(FOO)"))
+                finally:
+                    os.umask(mask)
+                [path] = self.files()
+                self.assertEqual(path.stat().st_mode & 0o777, mode)
+                cache.clear()
+
+    def test_overwrite_size(self):
+        cache = t.DiskCache(self.directory)
+        for _ in range(3):
+            cache.put("text", parse_all("$(FOO)"))
+        [path] = self.files()
+        self.assertEqual(cache._currbytes, path.stat().st_size)
+
+    def test_eviction(self):
+        size = len(edk2_expression.serialize.dumps(parse_all("$(MACRO_00)")))
+        cache = t.DiskCache(self.directory, maxbytes=size * 10)
+        for index in range(30):
+            before = set(self.files())
+            cache.put(f"text {index}", parse_all(f"$(MACRO_{index:02})"))
+            # distinct modification times for the LRU order
+            [path] = set(self.files()) - before
+            os.utime(path, (index, index))
+
+        info = cache.info()
+        self.assertLessEqual(info.currbytes, size * 10)
+        self.assertGreater(info.evictions, 0)
+        self.assertIsNotNone(cache.get("text 29"))
+        self.assertIsNone(cache.get("text 0"))
+
+    def test_too_large(self):
+        cache = t.DiskCache(self.directory, maxbytes=4)
+        cache.put("text", parse_all("$(FOO)"))
+        self.assertEqual(self.files(), [])
+        self.assertIsNone(cache.get("text"))
+
+    def test_invalid_maxbytes(self):
+        with self.assertRaises(ValueError):
+            t.DiskCache(self.directory, maxbytes=-1)
+
+    def test_clear(self):
+        cache = t.DiskCache(self.directory)
+        cache.put("text", parse_all("$(FOO)"))
+        cache.get("text")
+        cache.clear()
+
+        self.assertEqual(self.files(), [])
+        self.assertEqual(cache.info(), t.DiskCacheInfo(0, 0, 0, 0, 256 * 1024 * 1024))
+
+    def test_stale_temporary_files(self):
+        cache = t.DiskCache(self.directory)
+        cache.put("text", parse_all("$(FOO)"))
+        [path] = self.files()
+        stale = path.parent / ".tmp-stale"
+        fresh = path.parent / ".tmp-fresh"
+        stale.write_bytes(b"partial")
+        fresh.write_bytes(b"partial")
+        os.utime(stale, (0, 0))
+
+        self.assertEqual(cache.info().currbytes, path.stat().st_size)
+        self.assertFalse(stale.exists())
+        self.assertTrue(fresh.exists())
+
+    def test_concurrent(self):
+        exprs = parse_all('$(TARGET) == "DEBUG" && $(FOO) || 0x10 > $(BAR)')
+        errors = []
+
+        def work():
+            try:
+                # each thread has its own instance, like separate processes
+                cache = t.DiskCache(self.directory)
+                for _ in range(50):
+                    cache.put("text", exprs)
+                    result = cache.get("text")
+                    if result is not None:
+                        self.assertEqual(repr(result), repr(exprs))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.files()), 1)
+
+
+class TestParse(TestCase):
+    def test_parse(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = t.DiskCache(directory)
+            for optimize in (False, True):
+                with self.subTest(optimize=optimize):
+                    text = "$(FOO) + (1 + 2)"
+                    expected = edk2_expression.parse(
+                        text, cache=False, optimize=optimize
+                    )
+                    for _ in range(2):
+                        expr = edk2_expression.parse(
+                            text, cache=False, optimize=optimize, disk_cache=cache
+                        )
+                        self.assertEqual(repr(expr), repr(expected))
+
+            info = cache.info()
+            self.assertEqual(info.hits, 2)
+            self.assertEqual(info.misses, 2)
+
+    def test_memory_cache_first(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = t.DiskCache(directory)
+            text = "$(DISK_CACHE_MEMORY_FIRST)"
+            edk2_expression.parse(text)
+            edk2_expression.parse(text, disk_cache=cache)
+            self.assertEqual(cache.info().misses, 0)
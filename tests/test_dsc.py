@@ -0,0 +1,140 @@
+import io
+import itertools
+from unittest import TestCase
+
+import edk2_expression.dsc as t
+from edk2_expression.ast.operand import MacroVal
+from edk2_expression.error import DirectiveError
+
+DSC = """\
+[Defines]
+  DEFINE FOO = 1  # a comment
+  DEFINE FLAGS = /D DISABLE_NEW_DEPRECATED_INTERFACES
+  DEFINE NAME = "a#b"
+!if $(FOO) == 1
+  A
+  !if $(BAR) == 2
+    B
+  !elseif $(FOO) + 1 == 2
+    C
+    DEFINE BAZ = $(FOO) + 1
+  !else
+    D
+  !endif
+!else
+  E
+  DEFINE SKIPPED = 1
+  !if $(UNDEFINED)
+    F
+  !endif
+!endif
+!ifdef $(BAZ)
+  G
+!endif
+!ifndef SKIPPED
+  H
+!endif
+"""
+
+
+def active_text(lines):
+    return [line.text.strip() for line in lines]
+
+
+class TestPreprocess(TestCase):
+    def test_active_lines(self):
+        lines = t.active_lines(io.StringIO(DSC), {"BAR": 3})
+        self.assertEqual(active_text(lines), ["[Defines]", "A", "C", "G", "H"])
+
+    def test_lines(self):
+        lines = list(t.preprocess(DSC.splitlines(keepends=True), {"BAR": 2}))
+        self.assertEqual([line.number for line in lines], list(range(1, 28)))
+        self.assertEqual([line.text for line in lines], DSC.splitlines())
+
+        kinds = {line.number: line.kind for line in lines}
+        self.assertEqual(kinds[1], t.LineKind.Text)
+        self.assertEqual(kinds[2], t.LineKind.Define)
+        self.assertEqual(kinds[7], t.LineKind.If)
+        self.assertEqual(kinds[9], t.LineKind.ElseIf)
+        self.assertEqual(kinds[12], t.LineKind.Else)
+        self.assertEqual(kinds[14], t.LineKind.EndIf)
+        self.assertEqual(kinds[22], t.LineKind.IfDef)
+        self.assertEqual(kinds[25], t.LineKind.IfNDef)
+
+        active = [line.number for line in lines if line.active]
+        self.assertEqual(active, [1, 2, 3, 4, 5, 6, 7, 8, 14, 21, 24, 25, 26, 27])
+        depths = [line.depth for line in lines[4:14]]
+        self.assertEqual(depths, [0, 1, 1, 2, 1, 2, 2, 1, 2, 1])
+
+    def test_expressions(self):
+        lines = list(t.preprocess(DSC.splitlines(), {"BAR": 2}))
+        self.assertEqual(str(lines[4].expression), "$(FOO) == 1")
+        # skipped conditions are not parsed
+        self.assertIsNone(lines[8].expression)
+        self.assertIsNone(lines[17].expression)
+        # values that are not expressions are kept as text
+        self.assertIsNone(lines[2].expression)
+
+    def test_context(self):
+        preprocessor = t.Preprocessor({"BAR": 3})
+        for _ in preprocessor.process(DSC.splitlines()):
+            pass
+
+        context = preprocessor.context
+        self.assertEqual(repr(context["FOO"]), "Integer(value=1)")
+        self.assertEqual(context["FLAGS"], "/D DISABLE_NEW_DEPRECATED_INTERFACES")
+        self.assertEqual(str(context["NAME"]), '"a#b"')
+        self.assertEqual(str(context["BAZ"]), "($(FOO) + 1)")
+        self.assertNotIn("SKIPPED", context)
+
+    def test_define(self):
+        preprocessor = t.Preprocessor()
+        for value in ("X64", "Build/Ovmf", "gEfiTokenSpaceGuid.PcdFoo", ""):
+            with self.subTest(value=value):
+                self.assertIsNone(preprocessor.define("FOO", value))
+                self.assertEqual(preprocessor.context["FOO"], value)
+
+        expr = preprocessor.define("FOO", '$(BAR) + 1 == "X64"')
+        self.assertIs(preprocessor.context["FOO"], expr)
+
+    def test_nest(self):
+        lines = ["DEFINE FOO = $(BAR)", "!if $(FOO)", "A", "!endif"]
+        self.assertEqual(active_text(t.active_lines(lines, {"BAR": True})), ["A"])
+
+        with self.assertRaises(DirectiveError):
+            list(t.preprocess(lines, {"BAR": True}, nest="error"))
+
+        lines = list(t.preprocess(lines, {"BAR": True}))
+        self.assertIsInstance(lines[0].expression, MacroVal)
+
+    def test_lazy(self):
+        def generate():
+            yield "!if $(FOO)"
+            for index in itertools.count():
+                yield f"line {index}"
+
+        lines = t.active_lines(generate(), {"FOO": True})
+        self.assertEqual(
+            active_text(itertools.islice(lines, 3)), ["line 0", "line 1", "line 2"]
+        )
+
+    def test_errors(self):
+        for lines, number in (
+            (["!else"], 1),
+            (["!elseif TRUE"], 1),
+            (["A", "!endif"], 2),
+            (["!if TRUE", "!else", "!else"], 3),
+            (["!if TRUE", "!else", "!elseif TRUE"], 3),
+            (["!if TRUE", "!if FALSE", "!endif"], 1),
+            (["!if $(FOO)"], 1),
+            (["!if 1 +"], 1),
+            (["!ifdef 1 2"], 1),
+        ):
+            with self.subTest(lines=lines):
+                with self.assertRaises(DirectiveError) as cm:
+                    list(t.preprocess(lines))
+                self.assertEqual(cm.exception.line, number)
+
+    def test_unknown_directive(self):
+        lines = list(t.preprocess(["!include Foo.dsc"]))
+        self.assertEqual(lines[0].kind, t.LineKind.Text)
@@ -0,0 +1,66 @@
+import subprocess
+import sys
+from unittest import TestCase
+
+import edk2_expression as t
+
+DEFERRED = [
+    "pygments.lexer",
+    "edk2_expression.lex",
+    "edk2_expression.diskcache",
+    "edk2_expression.intern",
+]
+
+
+def imported_modules(code):
+    """Run ``code`` in a fresh interpreter and return the names of the modules
+    reported by ``-X importtime``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+class TestImport(TestCase):
+    def test_deferred(self):
+        modules = imported_modules("import edk2_expression; edk2_expression.parse('1')")
+        self.assertIn("edk2_expression.tokenizer", modules)
+        for name in DEFERRED:
+            with self.subTest(name=name):
+                self.assertNotIn(name, modules)
+
+    def test_lazy_attributes(self):
+        # modules imported with importlib are not reported by -X importtime
+        code = (
+            "import sys, edk2_expression;"
+            "edk2_expression.lex.Edk2ExpressionLexer;"
+            "edk2_expression.DiskCache;"
+            "edk2_expression.InternTable;"
+            "print(*sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, check=True, text=True
+        )
+        modules = result.stdout.split()
+        for name in DEFERRED:
+            with self.subTest(name=name):
+                self.assertIn(name, modules)
+
+    def test_attributes(self):
+        from edk2_expression.diskcache import DiskCache
+        from edk2_expression.intern import InternTable
+        from edk2_expression.lex import Edk2ExpressionLexer
+
+        self.assertIs(t.lex.Edk2ExpressionLexer, Edk2ExpressionLexer)
+        self.assertIs(t.DiskCache, DiskCache)
+        self.assertIs(t.InternTable, InternTable)
+        self.assertTrue({"lex", "DiskCache", "InternTable"} <= set(dir(t)))
+        with self.assertRaises(AttributeError):
+            t.missing
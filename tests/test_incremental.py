@@ -0,0 +1,120 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import edk2_expression
+import edk2_expression.incremental as t
+from edk2_expression.error import CircularReference, EvaluationError
+
+
+def parse(text: str):
+    return edk2_expression.parse(text, cache=False)
+
+
+class TestIncrementalEvaluator(TestCase):
+    def setUp(self):
+        self.engine = t.IncrementalEvaluator({"FOO": 1, "BAR": 2})
+        self.engine.register("foo", parse("$(FOO) == 1"))
+        self.engine.register("bar", parse("$(BAR) + 1"))
+        self.engine.register("both", parse("$(FOO) + $(BAR)"))
+        self.engine.register("const", parse("TRUE"))
+
+    def test_register(self):
+        self.assertEqual(
+            self.engine.results(),
+            {"foo": True, "bar": 3, "both": 3, "const": True},
+        )
+        self.assertEqual(len(self.engine), 4)
+        self.assertIn("foo", self.engine)
+
+        self.assertEqual(self.engine.register("foo", parse("$(FOO) + 10")), 11)
+        self.assertEqual(self.engine.update("FOO", 2), {"foo", "both"})
+        self.assertEqual(self.engine.result("foo"), 12)
+
+    def test_unregister(self):
+        self.engine.unregister("foo")
+        self.assertNotIn("foo", self.engine)
+        self.assertEqual(self.engine.update("FOO", 2), {"both"})
+        with self.assertRaises(KeyError):
+            self.engine.unregister("foo")
+
+    def test_update(self):
+        self.assertEqual(self.engine.update("FOO", 2), {"foo", "both"})
+        self.assertEqual(self.engine.result("foo"), False)
+        self.assertEqual(self.engine.result("both"), 4)
+
+        # affected but unchanged results are not reported
+        self.assertEqual(self.engine.update("FOO", 3), {"both"})
+        # same value
+        self.assertEqual(self.engine.update("FOO", 3), set())
+        # bool and int are told apart
+        self.engine.register("raw", parse("$(FOO)"))
+        self.engine.update("FOO", 1)
+        self.assertEqual(self.engine.update("FOO", True), {"raw"})
+
+    def test_update_evaluates_affected_only(self):
+        with patch.object(
+            t.IncrementalEvaluator,
+            "_evaluate",
+            autospec=True,
+            side_effect=t.IncrementalEvaluator._evaluate,
+        ) as evaluate:
+            self.engine.update("BAR", 5)
+        self.assertEqual(
+            sorted(call.args[1] for call in evaluate.call_args_list), ["bar", "both"]
+        )
+
+    def test_update_many(self):
+        self.assertEqual(
+            self.engine.update_many({"FOO": 0, "BAR": 0}), {"foo", "bar", "both"}
+        )
+        self.assertEqual(self.engine.result("both"), 0)
+
+    def test_undefine(self):
+        self.engine.register("defined", parse("$(FOO) ? 1 : 0"))
+        self.assertEqual(self.engine.undefine("FOO"), {"foo", "both", "defined"})
+        self.assertIsInstance(self.engine.result("foo"), EvaluationError)
+        self.assertNotIn("FOO", self.engine.context)
+        self.assertEqual(self.engine.undefine("FOO"), set())
+
+        # same error again
+        self.assertEqual(self.engine.update("FOO", None), set())
+        self.assertEqual(self.engine.update("FOO", 1), {"foo", "both", "defined"})
+
+    def test_nested_define(self):
+        engine = t.IncrementalEvaluator(
+            {"BASE": 1, "MID": parse("$(BASE) + 1"), "TOP": parse("$(MID) * 2")}
+        )
+        engine.register("top", parse("$(TOP) > 5"))
+        engine.register("mid", parse("$(MID)"))
+        engine.register("other", parse("TRUE || $(OTHER)"))
+        self.assertEqual(engine.results(), {"top": False, "mid": 2, "other": True})
+        self.assertEqual(engine.affected(["BASE"]), {"top", "mid"})
+
+        self.assertEqual(engine.update("BASE", 2), {"top", "mid"})
+        self.assertEqual(engine.results(), {"top": True, "mid": 3, "other": True})
+
+        # redefining drops the old dependency
+        self.assertEqual(engine.update("MID", parse("$(OTHER)")), {"top", "mid"})
+        self.assertEqual(engine.affected(["BASE"]), set())
+        self.assertEqual(engine.update("OTHER", 5), {"top", "mid"})
+        self.assertEqual(engine.results(), {"top": True, "mid": 5, "other": True})
+
+        # same expression
+        self.assertEqual(engine.update("MID", parse("$(OTHER)")), set())
+
+    def test_nest_error(self):
+        engine = t.IncrementalEvaluator({"FOO": parse("1 + 1")}, nest="error")
+        engine.register("foo", parse("$(FOO)"))
+        self.assertIsInstance(engine.result("foo"), EvaluationError)
+        self.assertEqual(engine.update("FOO", 2), {"foo"})
+        self.assertEqual(engine.result("foo"), 2)
+
+    def test_circular_define(self):
+        engine = t.IncrementalEvaluator(
+            {"FOO": parse("$(BAR)"), "BAR": parse("$(FOO)")}
+        )
+        engine.register("foo", parse("$(FOO)"))
+        self.assertIsInstance(engine.result("foo"), CircularReference)
+        self.assertEqual(engine.affected(["FOO"]), {"foo"})
+        self.assertEqual(engine.update("BAR", 1), {"foo"})
+        self.assertEqual(engine.result("foo"), 1)
@@ -10,3 +10,11 @@ class Test(TestCase):
         self.assertIsInstance(expr, Expression)
         self.assertTrue(expr.evaluate({"FOO": 6}))
         self.assertFalse(expr.evaluate({"FOO": 4}))
+
+    def test_parse_optimize(self):
+        expr = edk2_expression.parse("$(FOO) > 1 + 4", optimize=True)
+        self.assertEqual(str(expr), "$(FOO) > 5")
+        self.assertIs(edk2_expression.parse("$(FOO) > 1 + 4", optimize=True), expr)
+        self.assertEqual(
+            str(edk2_expression.parse("$(FOO) > 1 + 4")), "$(FOO) > (1 + 4)"
+        )
@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+import edk2_expression
+import edk2_expression.intern as t
+from edk2_expression.ast.operand import Boolean, Integer, MacroVal
+from edk2_expression.ast.operator import Addition, Equal
+
+
+class TestInternTable(TestCase):
+    def test_intern(self):
+        table = t.InternTable()
+        a = table.intern(Equal(MacroVal("TARGET"), Integer(1)))
+        b = table.intern(Equal(MacroVal("TARGET"), Integer(1)))
+        self.assertIs(a, b)
+        self.assertIn(a, table)
+        self.assertEqual(len(table), 3)
+
+        info = table.info()
+        self.assertEqual(info.misses, 3)
+        self.assertEqual(info.hits, 3)
+        self.assertEqual(info.currsize, 3)
+
+    def test_shared_sub_tree(self):
+        table = t.InternTable()
+        foo = table.intern(MacroVal("FOO"))
+        expr = Addition(MacroVal("FOO"), MacroVal("FOO"))
+        interned = table.intern(expr)
+        self.assertIsNot(interned, expr)
+        self.assertIs(interned.left, foo)
+        self.assertIs(interned.right, foo)
+        self.assertEqual(repr(interned), repr(expr))
+
+    def test_unchanged(self):
+        # nodes are reused as-is if none of their children is replaced
+        table = t.InternTable()
+        expr = Addition(MacroVal("FOO"), Integer(1))
+        self.assertIs(table.intern(expr), expr)
+
+        # fast path for an interned tree
+        table.intern(expr)
+        self.assertEqual(table.info().hits, 1)
+
+    def test_value_types(self):
+        # 1 == True in Python, but they are different nodes
+        table = t.InternTable()
+        one = table.intern(Integer(1))
+        true = table.intern(Boolean(True))
+        self.assertIsInstance(one, Integer)
+        self.assertIsInstance(true, Boolean)
+        self.assertIsNot(table.intern(Integer(True)), one)
+
+    def test_ternary(self):
+        table = t.InternTable()
+        a = table.intern(edk2_expression.parse("$(A) ? 1 : 2", cache=False))
+        b = table.intern(edk2_expression.parse("$(B) ? 1 : 2", cache=False))
+        self.assertIs(a.decision, b.decision)
+
+    def test_structural_hash(self):
+        table = t.InternTable()
+        a = table.intern(edk2_expression.parse("$(A) + 1", cache=False))
+        b = table.intern(edk2_expression.parse("$(A) + 1", cache=False))
+        self.assertEqual(table.structural_hash(a), table.structural_hash(b))
+        with self.assertRaises(ValueError):
+            table.structural_hash(Integer(1))
+
+    def test_clear(self):
+        table = t.InternTable()
+        table.intern(Integer(1))
+        table.clear()
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.info(), t.InternInfo(hits=0, misses=0, currsize=0))
+
+    def test_parse(self):
+        table = edk2_expression.InternTable()
+        a = edk2_expression.parse('$(TARGET) == "DEBUG" && $(FOO)', intern=table)
+        b = edk2_expression.parse('$(TARGET) == "DEBUG"', intern=table)
+        self.assertIs(a.left, b)
+        # cached expressions are interned too
+        self.assertIs(edk2_expression.parse('$(TARGET) == "DEBUG"', intern=table), b)
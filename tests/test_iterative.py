@@ -0,0 +1,95 @@
+import random
+import sys
+from unittest import TestCase
+
+import edk2_expression
+import edk2_expression.iterative as t
+from edk2_expression.ast import NestMethod
+from edk2_expression.ast.operand import CName, Guid, Integer, MacroVal
+from edk2_expression.ast.operator import Addition, Equal, LogicalOr
+from edk2_expression.error import CircularReference, NotSupported, ParseError
+from tests.util import CONTEXTS, generate, result
+
+
+class TestEvaluateIterative(TestCase):
+    def test_same_as_evaluate(self):
+        rand = random.Random(20231201)
+        for _ in range(500):
+            text = generate(rand, 4)
+            try:
+                expr = edk2_expression.parse(text, cache=False)
+            except ParseError:
+                continue
+            for nest in NestMethod:
+                func = t.compile_iterative(expr, nest)
+                for context in CONTEXTS:
+                    expected = result(expr.evaluate, context, nest)
+                    self.assertEqual(
+                        result(t.evaluate_iterative, expr, context, nest),
+                        expected,
+                        f"differs for {text!r} with {nest} and {context}",
+                    )
+                    self.assertEqual(result(func, context), expected)
+
+    def test_ignore(self):
+        expr = edk2_expression.parse("$(FOO) + 1")
+        context = {"FOO": edk2_expression.parse("1 + 1")}
+        self.assertIs(t.evaluate_iterative(expr, context, "ignore"), expr)
+
+    def test_short_circuit(self):
+        expr = edk2_expression.parse("$(FOO) && $(BAR)")
+        self.assertIs(t.evaluate_iterative(expr, {"FOO": 0}), False)
+        self.assertIs(t.evaluate_iterative(expr, {"FOO": 1, "BAR": 2}), True)
+
+        expr = edk2_expression.parse("$(FOO) || $(BAR)")
+        self.assertIs(t.evaluate_iterative(expr, {"FOO": 1}), True)
+        self.assertIs(t.evaluate_iterative(expr, {"FOO": 0, "BAR": 0}), False)
+
+        expr = edk2_expression.parse("$(FOO) ? $(BAR) : $(BAZ)")
+        self.assertEqual(t.evaluate_iterative(expr, {"FOO": 1, "BAR": 2}), 2)
+        self.assertEqual(t.evaluate_iterative(expr, {"FOO": 0, "BAZ": 3}), 3)
+
+    def test_nested(self):
+        context = {"L0": 1}
+        for i in range(1, 65):
+            context[f"L{i}"] = edk2_expression.parse(f"$(L{i - 1}) + $(L{i - 1})")
+        expr = edk2_expression.parse("$(L64) == $(L64)")
+        self.assertIs(t.evaluate_iterative(expr, context, "evaluate"), True)
+
+        context = {
+            "FOO": edk2_expression.parse("$(BAR) + 1"),
+            "BAR": edk2_expression.parse("$(FOO)"),
+        }
+        with self.assertRaises(CircularReference) as cm:
+            t.evaluate_iterative(MacroVal("FOO"), context, "evaluate")
+        self.assertEqual(cm.exception.cycle, ("FOO", "BAR", "FOO"))
+
+    def test_fallback(self):
+        expr = edk2_expression.parse("123e4567-e89b-12d3-a456-426655440000")
+        self.assertIsInstance(expr, Guid)
+        self.assertEqual(t.evaluate_iterative(expr, {}), expr.evaluate({}))
+
+        with self.assertRaises(NotSupported):
+            t.evaluate_iterative(Addition(CName("foo"), Integer(1)), {})
+
+    def test_deep(self):
+        depth = sys.getrecursionlimit() * 10
+        expr = Equal(MacroVal("FOO"), Integer(0))
+        for i in range(1, depth):
+            expr = LogicalOr(expr, Equal(MacroVal("FOO"), Integer(i)))
+        self.assertIs(t.evaluate_iterative(expr, {"FOO": depth - 1}), True)
+        self.assertIs(t.evaluate_iterative(expr, {"FOO": depth}), False)
+        with self.assertRaises(RecursionError):
+            expr.evaluate({"FOO": depth})
+
+        expr = Integer(0)
+        for _ in range(depth):
+            expr = Addition(expr, MacroVal("FOO"))
+        self.assertEqual(t.compile_iterative(expr)({"FOO": 2}), depth * 2)
+
+        # chain of nested expressions
+        context = {"L0": 0}
+        for i in range(1, depth):
+            context[f"L{i}"] = Addition(MacroVal(f"L{i - 1}"), Integer(1))
+        expr = MacroVal(f"L{depth - 1}")
+        self.assertEqual(t.evaluate_iterative(expr, context, "evaluate"), depth - 1)
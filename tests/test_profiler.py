@@ -0,0 +1,107 @@
+from unittest import TestCase
+
+import edk2_expression
+import edk2_expression.profiler as t
+from edk2_expression.ast.core import EvaluationSession, Expression
+from edk2_expression.ast.operator import BinaryOp, LogicalAnd
+from edk2_expression.error import EvaluationError
+
+
+class TestProfiler(TestCase):
+    def test_counts(self):
+        expr = edk2_expression.parse("$(FOO) == 1 && $(BAR) || $(FOO) > 2")
+        with t.Profiler() as profiler:
+            self.assertTrue(expr.evaluate({"FOO": 1, "BAR": True}))
+            self.assertTrue(expr.evaluate({"FOO": 3, "BAR": True}))
+
+        nodes = profiler.node_types
+        self.assertEqual(nodes["LogicalOr"].calls, 2)
+        self.assertEqual(nodes["LogicalAnd"].calls, 2)
+        self.assertEqual(nodes["Equal"].calls, 2)
+        self.assertEqual(nodes["GreaterThan"].calls, 1)
+        self.assertEqual(nodes["MacroVal"].calls, 4)
+        self.assertEqual(nodes["Integer"].calls, 3)
+        self.assertEqual(profiler.macros, {"FOO": 3, "BAR": 1})
+        # && skips $(BAR) when $(FOO) is 3, || skips $(FOO) > 2 when it is 1
+        self.assertEqual(profiler.short_circuits, {"LogicalAnd": 1, "LogicalOr": 1})
+
+        [(top, stats)] = profiler.top_expressions()
+        self.assertIs(top, expr)
+        self.assertEqual(stats.calls, 2)
+        self.assertAlmostEqual(stats.cumtime, nodes["LogicalOr"].cumtime)
+        total = sum(stats.tottime for _, stats in profiler.node_totals())
+        self.assertAlmostEqual(total, stats.cumtime)
+
+    def test_nested(self):
+        context = {
+            "FOO": edk2_expression.parse("$(BAR) + 1"),
+            "BAR": edk2_expression.parse("$(BAZ) * 2"),
+            "BAZ": 3,
+        }
+        with t.Profiler() as profiler:
+            expr = edk2_expression.parse("$(FOO) + $(FOO)")
+            expr.evaluate(EvaluationSession(context), "evaluate")
+        # the nested expressions are evaluated once in the session
+        self.assertEqual(profiler.macros, {"FOO": 2, "BAR": 1, "BAZ": 1})
+        self.assertEqual(profiler.node_types["Addition"].calls, 2)
+        self.assertEqual(len(profiler.expressions()), 1)
+        # cumulative time is not counted twice for nested nodes of a type
+        addition = profiler.node_types["Addition"]
+        self.assertLessEqual(addition.cumtime, profiler.expressions()[0][1].cumtime)
+
+    def test_ignore(self):
+        expr = edk2_expression.parse("$(FOO) && $(BAR)")
+        with t.Profiler() as profiler:
+            result = expr.evaluate({"FOO": edk2_expression.parse("$(BAR)")}, "ignore")
+        self.assertIs(result, expr)
+        self.assertEqual(profiler.short_circuits, {})
+
+    def test_error(self):
+        expr = edk2_expression.parse("$(FOO) + 1")
+        with t.Profiler() as profiler:
+            with self.assertRaises(EvaluationError):
+                expr.evaluate({})
+            self.assertEqual(expr.evaluate({"FOO": 1}), 2)
+        self.assertEqual(profiler.node_types["Addition"].calls, 2)
+        self.assertEqual(profiler.top_expressions()[0][1].calls, 2)
+
+    def test_restore(self):
+        originals = {cls: cls.__dict__["evaluate"] for cls in (Expression, BinaryOp)}
+        profiler = t.Profiler()
+        profiler.enable()
+        try:
+            self.assertTrue(profiler.enabled)
+            self.assertIsNot(BinaryOp.__dict__["evaluate"], originals[BinaryOp])
+            with self.assertRaises(RuntimeError):
+                t.Profiler().enable()
+            # enabling twice is a no-op
+            profiler.enable()
+        finally:
+            profiler.disable()
+        self.assertFalse(profiler.enabled)
+        for cls, evaluate in originals.items():
+            self.assertIs(cls.__dict__["evaluate"], evaluate)
+
+        # statistics accumulate until cleared
+        expr = LogicalAnd(edk2_expression.parse("0"), edk2_expression.parse("1"))
+        expr.evaluate({})
+        self.assertEqual(profiler.node_types, {})
+        with profiler:
+            expr.evaluate({})
+        with profiler:
+            expr.evaluate({})
+        self.assertEqual(profiler.short_circuits, {"LogicalAnd": 2})
+        profiler.clear()
+        self.assertEqual(profiler.expressions(), [])
+        self.assertEqual(profiler.short_circuits, {})
+
+    def test_report(self):
+        with t.Profiler() as profiler:
+            for value in range(5):
+                edk2_expression.parse("$(FOO) < 3 || $(BAR)").evaluate(
+                    {"FOO": value, "BAR": False}
+                )
+        report = profiler.report()
+        self.assertIn("$(FOO) < 3 || $(BAR)", report)
+        self.assertIn("LogicalOr (3 short-circuited)", report)
+        self.assertRegex(report, r"\s+5  FOO")
@@ -0,0 +1,110 @@
+from unittest import TestCase
+
+import edk2_expression
+import edk2_expression.resolve as t
+from edk2_expression.ast.operand import Integer, MacroDefined, String
+from edk2_expression.error import CircularReference, EvaluationError
+
+
+def parse(text: str):
+    return edk2_expression.parse(text, cache=False)
+
+
+class TestDependencyGraph(TestCase):
+    def test(self):
+        context = {
+            "FOO": parse("$(BAR) + $(BAZ) + $(BAR)"),
+            "BAR": parse("$(PLAIN) * 2"),
+            "BAZ": Integer(1),
+            "PLAIN": 3,
+            "QUX": parse("$(FOO) == $(UNDEFINED)"),
+        }
+        self.assertEqual(
+            t.dependency_graph(context),
+            {"FOO": ["BAR"], "BAR": [], "QUX": ["FOO"]},
+        )
+
+
+class TestResolutionOrder(TestCase):
+    def test(self):
+        context = {
+            "TOP": parse("$(MID) + $(LEFT)"),
+            "MID": parse("$(BASE) + 1"),
+            "LEFT": parse("$(MID) * 2"),
+            "BASE": 1,
+        }
+        self.assertEqual(t.resolution_order(context), ["MID", "LEFT", "TOP"])
+
+    def test_cycle(self):
+        context = {
+            "FOO": parse("$(BAR) + 1"),
+            "BAR": parse("$(BAZ)"),
+            "BAZ": parse("$(FOO)"),
+        }
+        with self.assertRaises(CircularReference) as cm:
+            t.resolution_order(context)
+        self.assertEqual(cm.exception.cycle, ("FOO", "BAR", "BAZ", "FOO"))
+        self.assertEqual(
+            str(cm.exception), "Circular macro reference: FOO -> BAR -> BAZ -> FOO"
+        )
+
+        with self.assertRaises(CircularReference) as cm:
+            t.resolution_order({"OK": parse("$(FOO)"), "FOO": parse("$(FOO) + 1")})
+        self.assertEqual(cm.exception.cycle, ("FOO", "FOO"))
+
+    def test_defined(self):
+        # DEFINED() does not depend on the value
+        context = {"FOO": parse("$(BAR)"), "BAR": MacroDefined("FOO")}
+        self.assertEqual(t.resolution_order(context), ["BAR", "FOO"])
+
+    def test_deep(self):
+        context = {"L0": 0}
+        for i in range(1, 5001):
+            context[f"L{i}"] = parse(f"$(L{i - 1}) + 1")
+        order = t.resolution_order(context)
+        self.assertEqual(order[0], "L1")
+        self.assertEqual(order[-1], "L5000")
+
+
+class TestResolve(TestCase):
+    def test(self):
+        context = {
+            "TARGET": String("DEBUG"),
+            "DEBUG": parse('$(TARGET) == "DEBUG"'),
+            "SIZE": parse("$(DEBUG) ? 0x100 : 0x10"),
+            "PLAIN": 3,
+        }
+        self.assertEqual(
+            t.resolve(context),
+            {"TARGET": "DEBUG", "DEBUG": True, "SIZE": 0x100, "PLAIN": 3},
+        )
+
+    def test_same_as_evaluate(self):
+        context = {
+            "A": 1,
+            "B": parse("$(A) + $(A)"),
+            "C": parse("$(B) * $(B) + $(A)"),
+            "D": parse("$(C) > 4 && $(B) == 2"),
+        }
+        resolved = t.resolve(context)
+        for name in "BCD":
+            self.assertEqual(
+                resolved[name], context[name].evaluate(context, "evaluate")
+            )
+
+    def test_deep(self):
+        context = {"L0": 0}
+        for i in range(1, 5001):
+            context[f"L{i}"] = parse(f"$(L{i - 1}) + 1")
+        self.assertEqual(t.resolve(context)["L5000"], 5000)
+
+    def test_error(self):
+        with self.assertRaises(EvaluationError) as cm:
+            t.resolve({"FOO": parse("$(BAR) + 1")})
+        self.assertEqual(
+            str(cm.exception),
+            "Failed to resolve macro 'FOO': Macro 'BAR' is not defined",
+        )
+
+        with self.assertRaises(CircularReference):
+            t.resolve({"FOO": parse("$(FOO)")})
@@ -0,0 +1,120 @@
+import pickle
+import random
+from unittest import TestCase
+
+import edk2_expression
+import edk2_expression.serialize as t
+from edk2_expression.ast import Expression
+from edk2_expression.ast.operand import (
+    Array,
+    CName,
+    Guid,
+    HexNumber,
+    Integer,
+    MacroDefined,
+    MacroVal,
+    PcdName,
+    String,
+)
+from edk2_expression.ast.operator import Addition, LogicalOr
+from edk2_expression.error import NotSupported, ParseError
+from tests.util import generate
+
+ATOMS = [
+    "$(FOO)",
+    "$(BAR)",
+    "0",
+    "1",
+    "0x10",
+    "0xFFFFFFFF",
+    "TRUE",
+    "FALSE",
+    '"str"',
+    '""',
+    "123e4567-e89b-12d3-a456-426655440000",
+]
+
+
+class TestSerialize(TestCase):
+    def test_round_trip(self):
+        rand = random.Random(20231205)
+        exprs = []
+        for _ in range(300):
+            try:
+                exprs.append(
+                    edk2_expression.parse(generate(rand, 4, ATOMS), cache=False)
+                )
+            except ParseError:
+                continue
+
+        for expr in exprs:
+            decoded = Expression.from_bytes(expr.to_bytes())
+            self.assertEqual(repr(decoded), repr(expr))
+
+        decoded = t.loads(t.dumps(exprs))
+        self.assertEqual([repr(expr) for expr in decoded], [repr(e) for e in exprs])
+        self.assertLess(len(t.dumps(exprs)), len(pickle.dumps(exprs)))
+
+    def test_operands(self):
+        exprs = [
+            Integer(0),
+            Integer(-1),
+            Integer(2**70),
+            Integer(-(2**70)),
+            HexNumber(0xFFFFFFFF),
+            String("é文"),
+            Guid(bytes(range(16))),
+            MacroDefined("FOO"),
+            CName("gEfiGuid"),
+            PcdName("gTokenSpace.PcdFoo"),
+            Array("{0x1, 0x2}"),
+        ]
+        decoded = t.loads(t.dumps(exprs))
+        self.assertEqual([repr(expr) for expr in decoded], [repr(e) for e in exprs])
+        for expr, other in zip(decoded, exprs):
+            self.assertIs(type(expr), type(other))
+
+    def test_string_table(self):
+        exprs = [MacroVal("SOME_LONG_MACRO_NAME")] * 100
+        data = t.dumps(exprs)
+        self.assertEqual(data.count(b"SOME_LONG_MACRO_NAME"), 1)
+        self.assertEqual(len(t.loads(data)), 100)
+
+    def test_deep(self):
+        expr = MacroVal("FOO")
+        for i in range(100000):
+            expr = LogicalOr(expr, Addition(MacroVal("FOO"), Integer(i)))
+        decoded = Expression.from_bytes(expr.to_bytes())
+        self.assertEqual(decoded.right.right, Integer(99999))
+        self.assertIsInstance(decoded.left.left, LogicalOr)
+
+    def test_unsupported(self):
+        class Custom(MacroVal):
+            pass
+
+        with self.assertRaises(NotSupported):
+            t.dumps([Addition(Custom("FOO"), Integer(1))])
+
+    def test_invalid(self):
+        data = Addition(MacroVal("FOO"), Integer(1)).to_bytes()
+        with self.assertRaises(ValueError) as cm:
+            t.loads(b"pickle")
+        self.assertEqual(str(cm.exception), "Not an encoded expression")
+        with self.assertRaises(ValueError) as cm:
+            t.loads(data[:3] + b"\x02" + data[4:])
+        self.assertEqual(str(cm.exception), "Unsupported format version 2, expected 1")
+        for end in range(4, len(data)):
+            with self.assertRaises(ValueError):
+                t.loads(data[:end])
+        with self.assertRaises(ValueError):
+            t.loads(data + b"\xff")
+
+    def test_from_bytes(self):
+        data = t.dumps([Integer(1), Integer(2)])
+        with self.assertRaises(ValueError):
+            Expression.from_bytes(data)
+
+        data = Integer(1).to_bytes()
+        self.assertEqual(Integer.from_bytes(data), Integer(1))
+        with self.assertRaises(TypeError):
+            MacroVal.from_bytes(data)
@@ -0,0 +1,98 @@
+import random
+import unittest
+
+from pygments.token import Token
+
+from edk2_expression.lex import Edk2ExpressionLexer
+from edk2_expression.tokenizer import Edk2ExpressionTokenizer, tokenize
+
+CORPUS = [
+    "",
+    "$(FOO) > 5",
+    '$(TARGET) == DEBUG && $(ARCH) == "X64"',
+    "L'SampleString' + \"AnotherString\"",
+    "TRUE || False ? 0XFF : 12345",
+    "gUefiCpuPkgTokenSpaceGuid.PcdCpuLocalApicBaseAddress",
+    "123e4567-e89b-12d3-a456-426655440000",
+    "{0x123e4567, 0xe89b, 0x12d3, {0xa4, 0x56, 0x42, 0x66, 0x55, 0x44, 0x00, 0x00}}",
+    "{UINT8(8), UINT64(12), LABEL(testLabel), OFFSET_OF(foo)}",
+    '{DEVICE_PATH("..."), GUID("123e4567-e89b-12d3-a456-426655440000"), GUID(gFoo)}',
+    "{GUID({0x1, 0x2, {0x3}}), 'a', L\"b\", TRUE}",
+    "not $(A) and NOT $(B) or $(C) XOR $(D) xor XORxor",
+    "1 EQ 2 NE 3 LT 4 GT 5 LE 6 GE 7",
+    "1 << 2 >> 3 <= 4 >= 5 == 6 != 7 || 8 && 9 | 1 ^ 2 & 3 % 4 ~ !5",
+    "(($(FOO) + 3) * (4 - 2)) / 1 # trailing comment",
+    "$(FOO) # comment\n$(BAR)\n",
+    "{1, 2\n3}",
+    "3 +$ @ `",
+    "DEFINED(FOO)",
+    '"unterminated',
+    "\t$(A)\t== 0x1\n",
+]
+
+FRAGMENTS = [
+    *"{}()[],.\"'$#@ \t\n+-*/%<>=!&|^~?:",
+    "$(",
+    "L'",
+    'L"',
+    "0x",
+    "0X1F",
+    "0xdeadbeef",
+    "123",
+    "TRUE",
+    "false",
+    "EQ",
+    "and",
+    "XOR",
+    "XORxor",
+    "UINT8",
+    "UINT32",
+    "LABEL",
+    "GUID",
+    "DEVICE_PATH",
+    "FOO",
+    "foo",
+    "Foo.Bar",
+    "123e4567-e89b-12d3-a456-426655440000",
+    "\\n",
+    "\\\\",
+]
+
+
+class TestEdk2ExpressionTokenizer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.lexer = Edk2ExpressionLexer()
+        self.tokenizer = Edk2ExpressionTokenizer()
+
+    def assertConform(self, text: str, stack=("root",)):
+        self.assertEqual(
+            list(self.tokenizer.get_tokens_unprocessed(text, stack)),
+            list(self.lexer.get_tokens_unprocessed(text, stack)),
+            f"token stream differs for {text!r} in state {stack}",
+        )
+
+    def test_corpus(self):
+        for text in CORPUS:
+            for state in ("root", "array", "constants"):
+                self.assertConform(text, (state,))
+
+    def test_random(self):
+        rand = random.Random(20231124)
+        for _ in range(2000):
+            text = "".join(rand.choices(FRAGMENTS, k=rand.randint(1, 24)))
+            for state in ("root", "array", "constants"):
+                self.assertConform(text, (state,))
+
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize("$(FOO) + 1"),
+            [
+                (0, Token.Keyword.Declaration, "$("),
+                (2, Token.Name.Variable, "FOO"),
+                (5, Token.Keyword.Declaration, ")"),
+                (6, Token.Text.Whitespace, " "),
+                (7, Token.Operator, "+"),
+                (8, Token.Text.Whitespace, " "),
+                (9, Token.Literal.Number.Integer, "1"),
+            ],
+        )
@@ -0,0 +1,153 @@
+import importlib.util
+import random
+import unittest
+from unittest import TestCase
+
+import edk2_expression
+from edk2_expression.ast import NestMethod
+from edk2_expression.ast.operand import CName
+from edk2_expression.error import (
+    CircularReference,
+    EvaluationError,
+    NotSupported,
+    ParseError,
+)
+from tests.util import generate
+
+if importlib.util.find_spec("numpy"):
+    import numpy
+
+    import edk2_expression.vectorize as t
+
+
+def evaluate_rows(expr, columns, size) -> list | None:
+    results = []
+    for i in range(size):
+        context = {name: values[i] for name, values in columns.items()}
+        try:
+            result = expr.evaluate(context)
+        except Exception:
+            return None
+        if isinstance(result, int) and not -(2**63) <= result < 2**63:
+            return None
+        results.append(result)
+    return results
+
+
+@unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy is not installed")
+class TestEvaluateColumns(TestCase):
+    def test_same_as_evaluate(self):
+        rand = random.Random(20231124)
+        size = 32
+        columns = {
+            "FOO": [rand.randint(-3, 5) for _ in range(size)],
+            "BAR": [rand.randint(0, 4) for _ in range(size)],
+            "BAZ": [rand.choice(["", "str", "X64"]) for _ in range(size)],
+        }
+
+        compared = 0
+        for _ in range(1000):
+            text = generate(rand, 3)
+            try:
+                expr = edk2_expression.parse(text, cache=False)
+            except ParseError:
+                continue
+            if (expected := evaluate_rows(expr, columns, size)) is None:
+                continue
+            result = t.evaluate_columns(expr, columns)
+            # compare the types too, since True == 1
+            self.assertEqual(
+                [(type(item), item) for item in result.tolist()],
+                [(type(item), item) for item in expected],
+                f"differs for {text!r}",
+            )
+            compared += 1
+        self.assertGreater(compared, 300)
+
+    def test_boolean_as_integer(self):
+        # ! returns NumPy booleans, which ~ and arithmetic treat as integers
+        for text, columns, expected in (
+            ('~!""', {}, -2),
+            ("~!0", {}, -2),
+            ('~!"" & 0x10 * 2', {"B": [1, 2]}, [32, 32]),
+            ('$(B) >= ~!"X64"', {"B": [-1, 2]}, [True, True]),
+            ('!~0 * "X64"', {"B": [1, 2]}, ["", ""]),
+            ("$(B) > 1 ? TRUE : 2", {"B": [1, 2]}, [2, True]),
+        ):
+            result = t.evaluate_columns(edk2_expression.parse(text), columns)
+            items = result.tolist()
+            if not isinstance(expected, list):
+                items, expected = [items], [expected]
+            self.assertEqual(
+                [(type(item), item) for item in items],
+                [(type(item), item) for item in expected],
+                text,
+            )
+
+    def test_columns(self):
+        expr = edk2_expression.parse(
+            '$(ARCH) == "X64" && $(TARGET) != "RELEASE" ? 0x10 : $(SIZE)'
+        )
+        result = t.evaluate_columns(
+            expr,
+            {
+                "ARCH": numpy.array(["X64", "IA32", "X64"]),
+                "TARGET": ["DEBUG", "DEBUG", "RELEASE"],
+                "SIZE": 4,
+            },
+        )
+        self.assertIsInstance(result, numpy.ndarray)
+        self.assertEqual(result.tolist(), [16, 4, 4])
+
+    def test_scalar(self):
+        result = t.evaluate_columns(edk2_expression.parse("$(FOO) + 1"), {"FOO": 1})
+        self.assertEqual(result.shape, ())
+        self.assertEqual(result.item(), 2)
+
+    def test_short_circuit(self):
+        expr = edk2_expression.parse("$(FOO) != 0 || $(BAR)")
+        self.assertEqual(t.evaluate_columns(expr, {"FOO": [1, 2]}).tolist(), [1, 1])
+        with self.assertRaises(EvaluationError):
+            t.evaluate_columns(expr, {"FOO": [0, 2]})
+
+    def test_nested(self):
+        expr = edk2_expression.parse("$(FOO) + 1")
+        columns = {"FOO": edk2_expression.parse("$(BAR) * 2"), "BAR": [1, 2]}
+        self.assertEqual(t.evaluate_columns(expr, columns, "evaluate").tolist(), [3, 5])
+        with self.assertRaises(EvaluationError):
+            t.evaluate_columns(expr, columns)
+        with self.assertRaises(NotSupported):
+            t.evaluate_columns(expr, columns, NestMethod.Ignore)
+
+    def test_nested_memoized(self):
+        columns = {"L0": [1, 2]}
+        for i in range(1, 41):
+            columns[f"L{i}"] = edk2_expression.parse(f"$(L{i - 1}) + $(L{i - 1})")
+        expr = edk2_expression.parse("$(L40)")
+        self.assertEqual(
+            t.evaluate_columns(expr, columns, "evaluate").tolist(), [2**40, 2**41]
+        )
+
+    def test_nested_circular(self):
+        columns = {"A": edk2_expression.parse("$(A) + 1")}
+        with self.assertRaises(CircularReference) as cm:
+            t.evaluate_columns(edk2_expression.parse("$(A)"), columns, "evaluate")
+        self.assertEqual(cm.exception.cycle, ("A", "A"))
+
+        columns = {
+            "A": edk2_expression.parse("$(B) + 1"),
+            "B": edk2_expression.parse("$(A) * 2"),
+        }
+        with self.assertRaises(CircularReference) as cm:
+            t.evaluate_columns(edk2_expression.parse("$(B)"), columns, "evaluate")
+        self.assertEqual(cm.exception.cycle, ("B", "A", "B"))
+
+    def test_unsupported(self):
+        with self.assertRaises(NotSupported):
+            t.evaluate_columns(CName("foo"), {})
+
+    def test_shape_mismatch(self):
+        with self.assertRaises(ValueError):
+            t.evaluate_columns(
+                edk2_expression.parse("$(FOO)"), {"FOO": [1, 2], "BAR": [1]}
+            )
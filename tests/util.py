@@ -0,0 +1,72 @@
+"""Helpers shared by the tests that check an evaluator or a parser against the
+reference implementation on random expressions."""
+import random
+
+import edk2_expression
+from edk2_expression.ast.operand import Integer
+
+ATOMS = ["$(FOO)", "$(BAR)", "$(BAZ)", "0", "1", "0x10", "TRUE", "FALSE", '"str"']
+
+OPERATORS = [
+    *"* / % + - < > & ^ | << >> <= >= == != && ||".split(),
+]
+
+PREFIXES = ["!", "~"]
+
+CONTEXTS = [
+    {"FOO": 1, "BAR": 2, "BAZ": "str"},
+    {"FOO": 0, "BAR": 0, "BAZ": "abc"},
+    {"FOO": True, "BAR": Integer(3), "BAZ": edk2_expression.parse('"str"')},
+    {"FOO": 5, "BAR": edk2_expression.parse("$(FOO) - 3"), "BAZ": "str"},
+    {"FOO": edk2_expression.parse("$(BAR) * 2"), "BAR": 4, "BAZ": 1},
+    {"FOO": 2},
+]
+"""Contexts for :data:`ATOMS`, with plain values, constants, nested
+expressions and an undefined macro."""
+
+
+def generate(
+    rand: random.Random,
+    depth: int,
+    atoms: list[str] = ATOMS,
+    operators: list[str] = OPERATORS,
+    prefixes: list[str] = PREFIXES,
+) -> str:
+    """Return the text of a random expression.
+
+    :param rand: The random generator.
+    :type rand: random.Random
+    :param depth: The maximum nesting depth of the operators.
+    :type depth: int
+    :param atoms: The operands.
+    :type atoms: list[str]
+    :param operators: The binary operators.
+    :type operators: list[str]
+    :param prefixes: The prefix operators, including a trailing space for
+        words such as ``NOT``.
+    :type prefixes: list[str]
+    :rtype: str
+    """
+
+    def sub() -> str:
+        return generate(rand, depth - 1, atoms, operators, prefixes)
+
+    if depth == 0 or rand.random() < 0.2:
+        return rand.choice(atoms)
+    kind = rand.random()
+    if kind < 0.15:
+        return f"({sub()})"
+    if kind < 0.25:
+        return f"{rand.choice(prefixes)}{sub()}"
+    if kind < 0.35:
+        return f"{sub()} ? {sub()} : {sub()}"
+    return f"{sub()} {rand.choice(operators)} {sub()}"
+
+
+def result(func, *args) -> tuple:
+    """Call the function and return its outcome in a comparable form: the
+    value, or the type and message of the exception raised."""
+    try:
+        return "value", func(*args)
+    except Exception as e:
+        return "error", type(e), str(e)